@@ -0,0 +1,178 @@
+"""Runs config actions off the critical path of qtile's event loop"""
+import asyncio
+import statistics
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile.log_utils import logger
+
+
+class ActionExecutor:
+    """Schedules actions as tasks with per-action cancellation
+
+    Submitting an action under a name cancels the task previously submitted
+    under the same name, so a newer keypress supersedes an older one that is
+    still in flight. Blocking backends go through a small thread pool and
+    processes are spawned with asyncio so nothing waits on the loop itself.
+    """
+
+    def __init__(self, max_workers=2, budget=0.1):
+        self.budget = budget
+        self.durations = defaultdict(lambda: deque(maxlen=100))
+        self._budgets = {}
+        self._tasks = {}
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="qtile-action")
+
+    def submit(self, name, coro) -> asyncio.Task:
+        self.cancel(name)
+        task = asyncio.get_running_loop().create_task(self._guard(name, coro))
+        self._tasks[name] = task
+        task.add_done_callback(lambda t: self._forget(name, t))
+        return task
+
+    def cancel(self, name):
+        task = self._tasks.pop(name, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    def _forget(self, name, task):
+        if self._tasks.get(name) is task:
+            del self._tasks[name]
+
+    async def _guard(self, name, coro):
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Action {name} failed")
+
+    def guarded(self, name, func, *args, timeout=None, budget=None):
+        """Returns a callback running `func(*args)` off the loop, once at a time
+
+        Meant for mouse callbacks and lazy functions, whose own arguments are
+        ignored. Calls made while the previous run is in flight are dropped,
+        a run is abandoned after `timeout` seconds and its duration is
+        recorded against `budget` (the executor's budget by default).
+        Interactive actions (menus, the lock screen) pass math.inf.
+        """
+        if budget is not None:
+            self._budgets[name] = budget
+
+        def callback(*_):
+            task = self._tasks.get(name)
+            if task is not None and not task.done():
+                logger.debug(f"Action {name} is already running")
+                return
+            self.submit(name, self._timed(name, func, args, timeout))
+
+        return callback
+
+    async def _timed(self, name, func, args, timeout):
+        start = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                await asyncio.wait_for(func(*args), timeout)
+            else:
+                # a timed out thread is left to finish on its own
+                await asyncio.wait_for(self.run_blocking(func, *args), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Action {name} timed out after {timeout}s")
+        finally:
+            self.record(name, time.monotonic() - start)
+
+    def record(self, name, duration):
+        self.durations[name].append(duration)
+        budget = self._budgets.get(name, self.budget)
+        if duration > budget:
+            logger.warning(
+                f"Action {name} took {duration * 1000:.0f} ms, "
+                f"over the {budget * 1000:.0f} ms budget"
+            )
+
+    def report(self) -> str:
+        """Returns the recorded durations of each action, slowest first"""
+        lines = [f"{'action':<16} {'runs':>5} {'median':>9} {'max':>9} {'over':>5}"]
+        rows = sorted(self.durations.items(), key=lambda item: -max(item[1]))
+        for name, durations in rows:
+            budget = self._budgets.get(name, self.budget)
+            over = sum(d > budget for d in durations)
+            lines.append(
+                f"{name:<16} {len(durations):>5} "
+                f"{statistics.median(durations) * 1000:>7.1f}ms "
+                f"{max(durations) * 1000:>7.1f}ms {over:>5}"
+            )
+        return "\n".join(lines)
+
+    async def run_blocking(self, func, *args):
+        """Runs a blocking callable in the thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def run(self, *cmd, timeout=None) -> tuple[int, str]:
+        """Runs a process, returns its exit code and stdout
+
+        The process is killed if the action is cancelled or times out.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        return proc.returncode, stdout.decode()
+
+    def shutdown(self):
+        for name in list(self._tasks):
+            self.cancel(name)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class Coalescer:
+    """Merges repeated keypresses into rate-limited changes
+
+    The first press is applied immediately. Presses arriving within `window`
+    seconds of the last applied change are summed and applied as one change
+    when the window closes, so holding a key applies at most one change per
+    window. `counters` tracks presses received, changes applied and
+    notifications sent (the latter incremented by whoever notifies).
+    """
+
+    def __init__(self, apply, window=0.05, counters=None):
+        self.apply = apply
+        self.window = window
+        self.counters = counters if counters is not None else Counter()
+        self._pending = 0
+        self._handle = None
+
+    def push(self, delta=1):
+        self.counters["presses"] += 1
+        self._pending += delta
+        if self._handle is None:
+            self._flush()
+
+    def _flush(self):
+        delta, self._pending = self._pending, 0
+        if not delta:
+            self._handle = None
+            return
+
+        self.counters["changes"] += 1
+        self._handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        self.apply(delta)
+
+    def notified(self):
+        self.counters["notifications"] += 1
+
+    def report(self) -> str:
+        """Returns the counters and the share of presses merged away"""
+        presses = self.counters["presses"]
+        saved = 1 - self.counters["changes"] / presses if presses else 0
+        return (
+            f"{presses} presses, {self.counters['changes']} changes, "
+            f"{self.counters['notifications']} notifications ({saved:.0%} merged)"
+        )
@@ -0,0 +1,154 @@
+"""Declarative autostart jobs run concurrently by a small supervisor"""
+import asyncio
+import os
+from dataclasses import dataclass
+
+from libqtile.log_utils import logger
+
+NEVER = "never"
+ON_FAILURE = "on-failure"
+ALWAYS = "always"
+
+
+@dataclass(frozen=True)
+class Job:
+    """A command started with the session
+
+    One-shot jobs are ready once they exit successfully, daemons as soon as
+    they are spawned. A job only starts when every job named in `after` is
+    ready. `timeout` applies to one-shot jobs only.
+    """
+
+    name: str
+    cmd: tuple[str, ...]
+    after: tuple[str, ...] = ()
+    daemon: bool = False
+    timeout: float | None = 10
+    restart: str = NEVER
+    restart_delay: float = 2
+    max_restarts: int = 5
+
+
+@dataclass
+class JobTiming:
+    started: float | None = None
+    finished: float | None = None
+    status: str = "pending"
+    restarts: int = 0
+
+
+class Supervisor:
+    """Runs autostart jobs concurrently while respecting their dependencies"""
+
+    def __init__(self, jobs):
+        self.jobs = {job.name: job for job in jobs}
+        for job in jobs:
+            missing = set(job.after) - self.jobs.keys()
+            if missing:
+                raise ValueError(f"Job {job.name} depends on unknown jobs: {missing}")
+
+        self.timings = {name: JobTiming() for name in self.jobs}
+        self._ready = {}
+        self._tasks = []
+        self._origin = None
+
+    def start(self):
+        """Starts every job, returns once they are scheduled"""
+        loop = asyncio.get_running_loop()
+        self._origin = loop.time()
+        self._ready = {name: loop.create_future() for name in self.jobs}
+        self._tasks = [loop.create_task(self._run(job)) for job in self.jobs.values()]
+        loop.create_task(self._report_when_ready())
+
+    def stop(self):
+        """Stops supervising; running daemons are left alone"""
+        for task in self._tasks:
+            task.cancel()
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time() - self._origin
+
+    def _set_ready(self, job, ok):
+        future = self._ready[job.name]
+        if not future.done():
+            future.set_result(ok)
+
+    async def _run(self, job):
+        timing = self.timings[job.name]
+        if job.after and not all(
+            await asyncio.gather(*(self._ready[name] for name in job.after))
+        ):
+            timing.status = "skipped"
+            self._set_ready(job, False)
+            return
+
+        while True:
+            timing.started = timing.started or self._now()
+            try:
+                returncode = await self._spawn(job, timing)
+            except OSError as e:
+                # a missing or non-executable command won't start on retry
+                timing.finished = self._now()
+                timing.status = "failed to start"
+                logger.warning(f"Autostart job {job.name} failed to start: {e}")
+                self._set_ready(job, False)
+                return
+            timing.finished = self._now()
+
+            if returncode == 0 and not job.daemon:
+                timing.status = "done"
+                self._set_ready(job, True)
+                return
+
+            timing.status = f"exited {returncode}"
+            failed = returncode != 0
+            restart = job.restart == ALWAYS or (job.restart == ON_FAILURE and failed)
+            if not restart or timing.restarts >= job.max_restarts:
+                logger.warning(f"Autostart job {job.name}: {timing.status}")
+                self._set_ready(job, False)
+                return
+
+            timing.restarts += 1
+            await asyncio.sleep(job.restart_delay)
+
+    async def _spawn(self, job, timing) -> int | None:
+        proc = await asyncio.create_subprocess_exec(*job.cmd)
+        if job.daemon:
+            timing.status = "running"
+            self._set_ready(job, True)
+            return await proc.wait()
+
+        try:
+            return await asyncio.wait_for(proc.wait(), job.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+
+    async def _report_when_ready(self):
+        await asyncio.gather(*self._ready.values())
+        logger.info(f"Autostart finished after {self._now():.3f}s\n{self.report()}")
+
+    def report(self) -> str:
+        """Returns a table with start time, duration and status of each job"""
+        lines = []
+        for name, timing in sorted(
+            self.timings.items(), key=lambda item: item[1].started or float("inf")
+        ):
+            started = "-" if timing.started is None else f"{timing.started:.3f}s"
+            if timing.started is not None and timing.finished is not None:
+                took = f"{timing.finished - timing.started:.3f}s"
+            else:
+                took = "-"
+            lines.append(f"{name:<20} {started:>9} {took:>9}  {timing.status}")
+        return "\n".join(lines)
+
+
+def process_uptime() -> float:
+    """Returns the seconds since this process was started, from /proc"""
+    with open("/proc/self/stat") as f:
+        # the fields after the command name, which may contain spaces
+        fields = f.read().rpartition(")")[2].split()
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
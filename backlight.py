@@ -0,0 +1,67 @@
+"""In-process backlight control through sysfs"""
+import os
+from functools import cached_property
+
+SYSFS_BACKLIGHT = "/sys/class/backlight"
+
+
+class Backlight:
+    """Steps the brightness of a sysfs backlight without spawning processes
+
+    `max_brightness` is read once and the `brightness` file is kept open, so a
+    keypress costs one pread and one pwrite.
+    """
+
+    def __init__(
+        self, name="intel_backlight", step=10, minimum=1, root=SYSFS_BACKLIGHT
+    ):
+        self.path = os.path.join(root, name)
+        self.step_percent = step
+        self.minimum = minimum
+        self._fd = None
+
+    @cached_property
+    def max_brightness(self) -> int:
+        with open(os.path.join(self.path, "max_brightness")) as f:
+            return int(f.read())
+
+    @cached_property
+    def step_size(self) -> int:
+        return max(1, self.max_brightness * self.step_percent // 100)
+
+    def _file(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(os.path.join(self.path, "brightness"), os.O_RDWR)
+        return self._fd
+
+    def read(self) -> int:
+        """Returns the raw brightness value"""
+        return int(os.pread(self._file(), 16, 0))
+
+    def write(self, value: int) -> int:
+        """Clamps and writes a raw brightness value, returns the percent"""
+        value = min(max(value, self.minimum), self.max_brightness)
+        data = f"{value}\n".encode()
+        fd = self._file()
+        os.pwrite(fd, data, 0)
+        try:
+            os.ftruncate(fd, len(data))
+        except OSError:
+            pass  # sysfs attributes can't be truncated and don't need to be
+
+        return self.to_percent(value)
+
+    def step(self, steps: int) -> int:
+        """Moves the brightness by a number of steps, returns the percent"""
+        return self.write(self.read() + steps * self.step_size)
+
+    def percent(self) -> int:
+        return self.to_percent(self.read())
+
+    def to_percent(self, value: int) -> int:
+        return value * 100 // self.max_brightness
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,101 @@
+"""Immutable descriptions of bar widgets, materialised once per screen
+
+Widgets are described once as frozen specs and every screen builds its own
+widget instances from them, so shared parts of the bars (group boxes,
+spacers, clocks...) are declared a single time and can be compared cheaply.
+"""
+from dataclasses import dataclass, replace
+
+from libqtile import bar
+
+
+class FrozenList(tuple):
+    """A list argument stored in a spec"""
+
+
+class FrozenDict(tuple):
+    """A dict argument stored in a spec as sorted items"""
+
+
+class Deferred(tuple):
+    """Widget specs passed on unbuilt, for the widget to build when needed"""
+
+
+def freeze(value):
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return FrozenDict(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+def thaw(value):
+    if isinstance(value, WidgetSpec):
+        return value.build()
+    if isinstance(value, FrozenList):
+        return [thaw(v) for v in value]
+    if isinstance(value, FrozenDict):
+        return {k: thaw(v) for k, v in value}
+    return value
+
+
+@dataclass(frozen=True)
+class WidgetSpec:
+    """A widget to build: a qtile_extras widget name or a custom widget class"""
+
+    kind: str | type
+    args: tuple = ()
+    config: FrozenDict = FrozenDict()
+
+    @property
+    def name(self) -> str:
+        return self.kind if isinstance(self.kind, str) else self.kind.__name__
+
+    def with_config(self, **config) -> "WidgetSpec":
+        merged = dict(self.config)
+        merged.update((k, freeze(v)) for k, v in config.items())
+        return replace(self, config=FrozenDict(sorted(merged.items())))
+
+    def build(self):
+        # qtile_extras loads cairo, specs are compared and diffed without it
+        from qtile_extras import widget
+
+        config = {k: thaw(v) for k, v in self.config}
+        if isinstance(self.kind, str):
+            built = getattr(widget, self.kind)(*self.args, **config)
+        else:
+            # custom widgets need qtile_extras' mixins to support decorations
+            built = widget.modify(self.kind, *self.args, **config)
+        # lets an incremental reload tell which widgets changed
+        built.spec = self
+        return built
+
+
+def spec(kind, *args, **config) -> WidgetSpec:
+    return WidgetSpec(kind, args, freeze(config))
+
+
+def deferred(specs) -> Deferred:
+    """Widget specs a WatchedWidgetBox only builds when first opened"""
+    return Deferred(specs)
+
+
+@dataclass(frozen=True)
+class BarSpec:
+    widgets: tuple[WidgetSpec, ...]
+    size: int
+    config: FrozenDict = FrozenDict()
+    kind: type = bar.Bar
+
+    def build(self) -> bar.Bar:
+        built = self.kind(
+            [w.build() for w in self.widgets],
+            self.size,
+            **{k: thaw(v) for k, v in self.config},
+        )
+        built.spec = self
+        return built
+
+
+def bar_spec(widgets, size, kind=bar.Bar, **config) -> BarSpec:
+    return BarSpec(tuple(widgets), size, freeze(config), kind)
@@ -0,0 +1,214 @@
+"""Bar batching the window paints of its widgets"""
+import functools
+import time
+import weakref
+
+import cairocffi
+from libqtile import bar
+from libqtile.command.base import expose_command
+from qtile_extras.widget.decorations import RectDecoration
+
+
+class BatchedBar(bar.Bar):
+    """Bar painting what its widgets drew in a loop iteration at its end
+
+    Normally every widget draw paints its slice of the bar to the window and
+    flushes it, so a full bar draw makes one paint per widget and widgets
+    updating together paint one by one. Here widget draws only mark their
+    region dirty; when the loop iteration is over, regions that touch (the
+    whole bar, a decoration group updating together) are composited and
+    painted at once, and a widget drawn several times is painted once.
+
+    The rounded backgrounds of decorated widgets are drawn once per widget
+    size and place in their group span (first, last, in between) and
+    replayed from a cache on the following draws.
+    """
+
+    def __init__(self, widgets, size, **config):
+        bar.Bar.__init__(self, widgets, size, **config)
+        self.widget_draws = 0
+        self.paints = 0
+        self.flushes = 0
+        self._dirty = {}
+        self._batched = weakref.WeakSet()
+        self._compositor = None
+        self._backgrounds = weakref.WeakKeyDictionary()
+        self._checked = weakref.WeakSet()
+        self._spans = {}
+        self._spans_of = ()
+        self._create_drawer = None
+        self._flush_queued = False
+        self._since = time.monotonic()
+
+    def _configure(self, qtile, screen, reconfigure=False):
+        bar.Bar._configure(self, qtile, screen, reconfigure=reconfigure)
+        if self._create_drawer is None:
+            # drawers of widgets configured later (box contents, widgets
+            # rebuilt by a reload) are batched as they are created
+            self._create_drawer = self.window.create_drawer
+            self.window.create_drawer = self._batched_drawer
+        if self._compositor is None or self._compositor.width != self.width:
+            self._compositor = self._create_drawer(self.width, self.height)
+        for widget in self.widgets:
+            for w in (widget, *getattr(widget, "widgets", ())):
+                if getattr(w, "drawer", None) is not None:
+                    self._batch(w.drawer)
+
+    def _batched_drawer(self, width, height):
+        drawer = self._create_drawer(width, height)
+        self._batch(drawer)
+        return drawer
+
+    def _batch(self, drawer):
+        if drawer in self._batched:
+            return
+        self._batched.add(drawer)
+        paint = drawer.draw
+
+        @functools.wraps(paint)
+        def draw(offsetx=0, offsety=0, width=None, height=None, src_x=0, src_y=0):
+            width = drawer.width if width is None else width
+            height = drawer.height if height is None else height
+            self._dirty[drawer] = paint, offsetx, offsety, width, height, src_x, src_y
+            if drawer not in self._checked:
+                # decorations replace the clear once the widget is configured
+                self._cache_background(drawer)
+            self.widget_draws += 1
+            if not self._flush_queued:
+                self._flush_queued = True
+                self.qtile.call_soon(self._flush)
+
+        drawer.draw = draw
+
+    def _flush(self):
+        self._flush_queued = False
+        self.flushes += 1
+        dirty, self._dirty = self._dirty, {}
+        run = []
+        for drawer, region in sorted(dirty.items(), key=lambda item: item[1][1:3]):
+            if not getattr(drawer, "_enabled", True) or drawer.has_mirrors:
+                # hidden or mirrored, left to the drawer itself
+                region[0](*region[1:])
+                continue
+            if run and not touching(run[-1][1], region):
+                self._paint(run)
+                run = []
+            run.append((drawer, region))
+        if run:
+            self._paint(run)
+
+    def _paint(self, run):
+        self.paints += 1
+        if len(run) == 1:
+            _, (paint, *region) = run[0]
+            paint(*region)
+            return
+
+        compositor = self._compositor
+        compositor._reset_surface()
+        ctx = compositor.ctx
+        for drawer, (_, x, y, width, height, src_x, src_y) in run:
+            ctx.save()
+            ctx.rectangle(x, y, width, height)
+            ctx.clip()
+            ctx.set_source_surface(drawer.surface, x - src_x, y - src_y)
+            ctx.paint()
+            ctx.restore()
+            # what the drawer's own paint does once done with its operations
+            drawer._reset_surface()
+
+        x = min(region[1] for _, region in run)
+        y = min(region[2] for _, region in run)
+        width = max(region[1] + region[3] for _, region in run) - x
+        height = max(region[2] + region[4] for _, region in run) - y
+        compositor.draw(
+            offsetx=x, offsety=y, width=width, height=height, src_x=x, src_y=y
+        )
+
+    def _cache_background(self, drawer):
+        """Makes a decorated widget's clear replay its cached background"""
+        widget = getattr(drawer.clear, "__self__", None)
+        if widget is None or widget is drawer:
+            # undecorated, or decorations not configured yet
+            return
+        self._checked.add(drawer)
+        decorations = getattr(widget, "decorations", ())
+        if not decorations or widget.drawer is not drawer:
+            return
+        if not all(isinstance(d, RectDecoration) and not d.clip for d in decorations):
+            # powerlines depend on their neighbours, clips on the drawer state
+            return
+        clear = drawer.clear
+
+        def cached_clear(colour):
+            if drawer.ctx is None:
+                drawer._reset_surface()
+            key = colour, widget.background, widget.length, drawer.height
+            key += self._span_position(widget)
+            cached = self._backgrounds.get(widget)
+            if cached is None or cached[0] != key:
+                cached = key, self._render_background(drawer, clear, colour)
+                self._backgrounds[widget] = cached
+            ctx = drawer.ctx
+            ctx.save()
+            ctx.set_operator(cairocffi.OPERATOR_SOURCE)
+            ctx.set_source_surface(cached[1])
+            ctx.paint()
+            ctx.restore()
+
+        drawer.clear = cached_clear
+
+    def _render_background(self, drawer, clear, colour):
+        """Runs the decorated clear on a surface of the widget's size"""
+        widget = clear.__self__
+        width = max(widget.length, 1)
+        surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, drawer.height)
+        drawn, ctx = drawer.surface, drawer.ctx
+        drawer.surface = surface
+        drawer.ctx = drawer.new_ctx()
+        try:
+            clear(colour)
+        finally:
+            drawer.surface, drawer.ctx = drawn, ctx
+        surface.flush()
+        return surface
+
+    def _span_position(self, widget) -> tuple[bool, bool]:
+        """Whether a widget is the first and last visible one of its group"""
+        widgets = tuple(self.widgets)
+        if widgets != self._spans_of:
+            # finding a group scans the bar, only done when the widgets change
+            self._spans_of, self._spans = widgets, {}
+        if widget not in self._spans:
+            grouped = [d for d in widget.decorations if d.group]
+            in_bar = widget in widgets
+            span = grouped[0]._get_parent_group() if grouped and in_bar else ()
+            self._spans[widget] = tuple(span)
+        visible = [w for w in self._spans[widget] if w.length > 0]
+        if not visible:
+            return True, True
+        return visible[0] is widget, visible[-1] is widget
+
+    @expose_command()
+    def draw_stats(self, reset=False) -> dict:
+        """Widget draws, window paints and flushes per second"""
+        now = time.monotonic()
+        elapsed = max(now - self._since, 1e-6)
+        stats = {
+            "widget_draws_per_second": round(self.widget_draws / elapsed, 2),
+            "paints_per_second": round(self.paints / elapsed, 2),
+            "flushes_per_second": round(self.flushes / elapsed, 2),
+        }
+        if reset:
+            self.widget_draws = self.paints = self.flushes = 0
+            self._since = now
+        return stats
+
+
+def touching(a, b) -> bool:
+    """Whether the second of two dirty regions continues the first"""
+    _, ax, ay, aw, ah, *_ = a
+    _, bx, by, bw, bh, *_ = b
+    return (ax + aw == bx and (ay, ah) == (by, bh)) or (
+        ay + ah == by and (ax, aw) == (bx, bw)
+    )
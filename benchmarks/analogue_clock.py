@@ -0,0 +1,58 @@
+"""Cost of drawing the analogue clock with and without the cached face
+
+Draws a day's worth of per-minute frames onto an offscreen surface, once
+rendering the face from scratch every frame and once reusing the cached face:
+
+    python benchmarks/analogue_clock.py [diameter]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import cairocffi
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import clockface  # noqa: E402
+
+FACE = ("circle", "#a6e3a1", "#a6e3a1", 0)
+HANDS = dict(
+    hour_colour="#1e1e2e",
+    hour_size=1,
+    hour_length=0.75,
+    minute_colour="#1e1e2e",
+    minute_size=1,
+    minute_length=0.95,
+)
+FRAMES = 24 * 60
+
+
+def run(diameter, cached) -> float:
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, diameter, diameter)
+    ctx = cairocffi.Context(surface)
+    start = datetime(2024, 1, 1)
+    clockface.render_face.cache_clear()
+
+    begin = time.perf_counter()
+    for minute in range(FRAMES):
+        if not cached:
+            clockface.render_face.cache_clear()
+        now = start + timedelta(minutes=minute)
+        clockface.draw_clock(ctx, 0, 0, diameter, now, FACE, HANDS)
+    surface.flush()
+    return (time.perf_counter() - begin) / FRAMES
+
+
+def main():
+    diameter = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    uncached = run(diameter, cached=False)
+    cached = run(diameter, cached=True)
+    print(f"{FRAMES} frames at {diameter}px")
+    print(f"  face rendered every frame: {uncached * 1e6:8.1f} µs/frame")
+    print(f"  cached face:               {cached * 1e6:8.1f} µs/frame")
+    print(f"  speedup:                   {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
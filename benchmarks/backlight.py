@@ -0,0 +1,74 @@
+"""Keypress-to-write latency of the native backlight against a script fork chain
+
+Runs against a fake sysfs tree in a temporary directory, so it works anywhere:
+
+    python benchmarks/backlight.py [presses]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backlight import Backlight  # noqa: E402
+
+MAXIMUM = 937
+
+# same shape as the old change_backlight.sh: bash, cat and bc per keypress
+SCRIPT = """
+brightness=$(cat "$1/brightness")
+brightness=$((brightness + 93))
+if [[ $brightness -gt 937 ]]; then brightness=1; fi
+echo "$brightness" >"$1/brightness"
+echo "($brightness / 937)" | bc -l 2>/dev/null || echo "$brightness"
+"""
+
+
+def make_sysfs(root):
+    path = os.path.join(root, "intel_backlight")
+    os.makedirs(path)
+    for name, value in (("max_brightness", MAXIMUM), ("brightness", MAXIMUM // 2)):
+        with open(os.path.join(path, name), "w") as f:
+            f.write(f"{value}\n")
+
+
+def measure(func, presses):
+    samples = []
+    for i in range(presses):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    print(
+        f"{name:>8}: median {statistics.median(samples) * 1e6:9.1f} us, "
+        f"max {max(samples) * 1e6:9.1f} us"
+    )
+
+
+def main(presses=200):
+    with tempfile.TemporaryDirectory() as root:
+        make_sysfs(root)
+        backlight = Backlight("intel_backlight", root=root)
+        path = os.path.join(root, "intel_backlight")
+
+        native = measure(lambda i: backlight.step(1 if i % 2 else -1), presses)
+        script = measure(
+            lambda i: subprocess.run(
+                ["bash", "-c", SCRIPT, "bash", path], stdout=subprocess.PIPE, check=True
+            ),
+            presses // 10,
+        )
+        backlight.close()
+
+    report("native", native)
+    report("script", script)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,85 @@
+"""Window paints of the primary bar, plain and batched, drawn offscreen
+
+Needs qtile and qtile-extras installed but no X server: the primary bar with
+its current widgets is configured against a headless stand-in for qtile
+(headless.py) as a plain Bar and as a BatchedBar. For a full bar draw,
+adjacent widgets updating in the same loop iteration and a single widget
+update, it reports the time, window paints and pixels painted per update:
+
+    python benchmarks/bar_draw.py [rounds]
+"""
+import asyncio
+import dataclasses
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from libqtile import bar  # noqa: E402
+
+import config  # noqa: E402
+from bars import BatchedBar  # noqa: E402
+from headless import configure  # noqa: E402
+
+SCREEN = 1920, 1080
+TOGETHER = 3  # adjacent widgets updating at once, like the sampler's texts
+
+
+def full(qtile, top):
+    top.draw()
+    qtile.run_pending("_actual_draw")
+
+
+def together(qtile, top):
+    for widget in visible(top)[-TOGETHER:]:
+        widget.draw()
+
+
+def single(qtile, top):
+    visible(top)[-1].draw()
+
+
+def visible(top):
+    return [w for w in top.widgets if w.length]
+
+
+async def measure(kind, rounds):
+    screen = config.create_screen(dataclasses.replace(config.PRIMARY_BAR, kind=kind))
+    qtile = configure(screen, *SCREEN)
+    # providers started by the widgets are stopped before they run
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+    top = screen.top
+    window = top.window
+    full(qtile, top)
+    qtile.run_pending("_flush")
+
+    for scenario in (full, together, single):
+        samples = []
+        paints, painted = window.paints, window.painted
+        for _ in range(rounds):
+            start = time.perf_counter()
+            scenario(qtile, top)
+            # the end of the loop iteration
+            qtile.run_pending("_flush")
+            samples.append(time.perf_counter() - start)
+        print(
+            f"{kind.__name__:<10} {scenario.__name__:<9} "
+            f"{statistics.median(samples) * 1e3:7.3f} ms, "
+            f"{(window.paints - paints) / rounds:5.1f} paints, "
+            f"{(window.painted - painted) / rounds / 1e3:7.1f} kpx"
+        )
+    if isinstance(top, BatchedBar):
+        print(f"{kind.__name__:<10} {top.draw_stats()}")
+
+
+def main(rounds=50):
+    for kind in (bar.Bar, BatchedBar):
+        asyncio.run(measure(kind, rounds))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
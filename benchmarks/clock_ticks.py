@@ -0,0 +1,58 @@
+"""Clock widget wakeups over a simulated day
+
+Drives the shared clock with a fake time source through 24 hours, with the
+clock widgets of both bars subscribed, and compares the callbacks made to
+per-widget timers firing every second:
+
+    python benchmarks/clock_ticks.py [hours]
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from clock import ClockProvider  # noqa: E402
+
+# the formats displayed by the clock widgets of both bars
+WIDGETS = {
+    "date": "%Y-%m-%d",
+    "clock (primary)": "%H:%M",
+    "clock (secondary)": "%H:%M",
+    "analogue (primary)": "%H:%M",
+    "analogue (secondary)": "%H:%M",
+}
+TIMER_INTERVAL = 1  # seconds, the default of the stock clock widgets
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    start = datetime(2024, 3, 1, 12, 34, 56, 789000)
+    end = start + timedelta(hours=hours)
+    clock = ClockProvider(now=lambda: now)
+
+    redraws = dict.fromkeys(WIDGETS, 0)
+    for name, format in WIDGETS.items():
+
+        def on_tick(_, name=name):
+            redraws[name] += 1
+
+        # passive, so that subscribing does not start the real-time task
+        clock.subscribe(on_tick, passive=True, format=format)
+
+    now = start
+    while now < end:
+        now = clock.tick(now)
+
+    naive = len(WIDGETS) * int((end - start).total_seconds() / TIMER_INTERVAL)
+    print(f"{hours:g} simulated hours")
+    for name, count in redraws.items():
+        print(f"  {name:<22} {count:6} redraws")
+    print(f"  clock wakeups          {clock.reads:6}")
+    print(f"  per-widget timers      {naive:6} wakeups")
+    print(f"  unchanged, skipped     {clock.skipped:6}")
+    print(f"  redraws avoided        {naive - clock.wakeups:6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Time config import and bar construction
+
+Needs qtile and qtile-extras installed, but no running qtile:
+
+    python benchmarks/config_load.py [rounds]
+
+Run it on two checkouts to compare before and after a change.
+"""
+import importlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main(rounds=20):
+    start = time.perf_counter()
+    config = importlib.import_module("config")
+    print(f"import config: {(time.perf_counter() - start) * 1e3:8.2f} ms")
+
+    # older revisions only build their screens while importing
+    if not hasattr(config, "create_screen"):
+        return
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        config.create_screen(config.PRIMARY_BAR)
+        config.create_screen(config.SECONDARY_BAR)
+        samples.append(time.perf_counter() - start)
+    print(f"build screens: {statistics.median(samples) * 1e3:8.2f} ms (median)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,71 @@
+"""Event loop stall during a burst of simulated keypresses
+
+Each keypress runs a short process, once blocking the loop the way the old
+lazy functions did and once through ActionExecutor. A probe task measures how
+late the loop wakes up while the burst is processed:
+
+    python benchmarks/event_loop_stall.py [presses]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from actions import ActionExecutor  # noqa: E402
+
+COMMAND = ["sleep", "0.02"]
+PROBE_INTERVAL = 0.001
+
+
+async def probe(stop, lags):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(loop.time() - start - PROBE_INTERVAL)
+
+
+async def burst(press, presses):
+    stop = asyncio.Event()
+    lags = []
+    probing = asyncio.create_task(probe(stop, lags))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    for _ in range(presses):
+        await press()
+        await asyncio.sleep(0)  # the next key event arrives from the loop
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probing
+    return elapsed, lags
+
+
+async def main(presses=50):
+    async def blocking_press():
+        asyncio.get_running_loop().call_soon(subprocess.run, COMMAND)
+
+    executor = ActionExecutor()
+    tasks = []
+
+    async def executor_press():
+        tasks.append(executor.submit("key", executor.run(*COMMAND)))
+
+    for name, press in (("blocking", blocking_press), ("executor", executor_press)):
+        elapsed, lags = await burst(press, presses)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(
+            f"{name:>8}: burst {elapsed * 1e3:7.1f} ms, "
+            f"worst stall {max(lags, default=0) * 1e3:6.1f} ms, "
+            f"total stall {sum(lags) * 1e3:7.1f} ms"
+        )
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*map(int, sys.argv[1:])))
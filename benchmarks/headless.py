@@ -0,0 +1,126 @@
+"""A headless stand-in for a running qtile, to configure and draw bars offscreen
+
+Bars and widgets are the real libqtile and qtile_extras objects, only the core
+is replaced: internal windows are cairo image surfaces, and the callbacks qtile
+would schedule on its loop are collected, to be run on demand.
+"""
+import cairocffi
+from libqtile.backend.base.drawer import Drawer
+from libqtile.log_utils import logger
+
+
+class HeadlessDrawer(Drawer):
+    """Paints recorded drawing operations onto the window's image surface"""
+
+    def _draw(self, offsetx=0, offsety=0, width=None, height=None, src_x=0, src_y=0):
+        width = self.width if width is None else width
+        height = self.height if height is None else height
+        ctx = cairocffi.Context(self._win.surface)
+        ctx.set_source_surface(self.surface, offsetx - src_x, offsety - src_y)
+        ctx.rectangle(offsetx, offsety, width, height)
+        ctx.fill()
+        self._win.paints += 1
+        self._win.painted += width * height
+
+
+class HeadlessWindow:
+    """An internal window backed by an image surface, counting paints"""
+
+    def __init__(self, qtile, x, y, width, height):
+        self.qtile = qtile
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+        self.opacity = 1
+        self.paints = 0
+        self.painted = 0  # pixels
+
+    def create_drawer(self, width, height):
+        return HeadlessDrawer(self.qtile, self, width, height)
+
+    def place(self, x, y, width, height, *args, **kwargs):
+        if (width, height) != (self.width, self.height):
+            self.surface = cairocffi.ImageSurface(
+                cairocffi.FORMAT_ARGB32, width, height
+            )
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+    def unhide(self):
+        pass
+
+    def hide(self):
+        pass
+
+    def kill(self):
+        pass
+
+    def info(self):
+        return dict(x=self.x, y=self.y, width=self.width, height=self.height)
+
+
+class HeadlessCore:
+    name = "headless"
+
+    def __init__(self, qtile):
+        self.qtile = qtile
+        self.windows = []
+
+    def create_internal(self, x, y, width, height):
+        window = HeadlessWindow(self.qtile, x, y, width, height)
+        self.windows.append(window)
+        return window
+
+
+class HeadlessQtile:
+    """The parts of the qtile manager that bars and widgets use"""
+
+    def __init__(self):
+        self.core = HeadlessCore(self)
+        # no groups or windows, group boxes and window names draw empty
+        self.groups = []
+        self.screens = []
+        self.widgets_map = {}
+        self.renamed_widgets = []
+        self.pending = []
+
+    def call_soon(self, func, *args):
+        self.pending.append((func, args))
+
+    call_soon_threadsafe = call_soon
+
+    def call_later(self, delay, func, *args):
+        self.pending.append((func, args))
+
+    def register_widget(self, widget):
+        name = widget.name
+        i = 0
+        while name in self.widgets_map:
+            i += 1
+            name = f"{widget.name}_{i}"
+        widget.name = name
+        self.widgets_map[name] = widget
+
+    def run_pending(self, match=None) -> int:
+        """Runs the collected callbacks (whose name contains `match`) once"""
+        pending, self.pending = self.pending, []
+        ran = 0
+        for func, args in pending:
+            if match and match not in getattr(func, "__name__", ""):
+                self.pending.append((func, args))
+                continue
+            try:
+                func(*args)
+            except Exception:
+                logger.exception(f"Headless callback {func} failed")
+            ran += 1
+        return ran
+
+
+def configure(screen, width, height, qtile=None) -> HeadlessQtile:
+    """Lays out a config screen of the given size and configures its bars"""
+    qtile = qtile or HeadlessQtile()
+    screen.qtile = qtile
+    screen.index = 0
+    screen.x, screen.y, screen.width, screen.height = 0, 0, width, height
+    for gap in screen.gaps:
+        gap._configure(qtile, screen)
+    return qtile
@@ -0,0 +1,85 @@
+"""Icon lookup tables: lookup time and notification latency
+
+Builds the fixture icon theme of tests/test_icons.py (which checks the
+bucket boundaries), times a table lookup against the old per-call
+functions, rasterises the theme off the event loop, then measures
+end-to-end notification latency (icon lookup included) against the
+stand-in server of tests/test_notifications.py:
+
+    python benchmarks/icons.py [count]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from icons import IconTheme, lookup  # noqa: E402
+from notifications import Notifier  # noqa: E402
+from test_icons import VOLUME, make_theme, old_volume_icon  # noqa: E402
+from test_notifications import serve  # noqa: E402
+
+
+def time_lookups(root, volume):
+    n = 100_000
+    old = timeit.timeit(lambda: old_volume_icon(root, 50), number=n) / n
+    new = timeit.timeit(lambda: lookup(volume, 50), number=n) / n
+    print(f"path per call: {old * 1e9:7.0f} ns, table: {new * 1e9:7.0f} ns")
+
+
+async def rasterise(root):
+    theme = IconTheme(root, raster_dir=os.path.join(root, "png"))
+    start = timeit.default_timer()
+    theme.levels(VOLUME)
+    resolved = timeit.default_timer() - start
+    await theme.rasterise_pending(asyncio.to_thread)
+    print(
+        f"resolved in {resolved * 1e3:.2f} ms, rasterised off the loop in "
+        f"{(timeit.default_timer() - start) * 1e3:.1f} ms"
+    )
+
+
+async def notify_all(address, volume, count):
+    server_bus, _ = await serve(address)
+    notifier = Notifier(bus_address=address)
+    samples = []
+    for i in range(count):
+        start = timeit.default_timer()
+        await notifier.notify(
+            "Volume", f"{i % 101}%", icon=lookup(volume, i % 101), tag="volume"
+        )
+        samples.append(timeit.default_timer() - start)
+    notifier.disconnect()
+    server_bus.disconnect()
+    print(
+        f"notify+icon: median {statistics.median(samples) * 1e6:9.1f} us, "
+        f"max {max(samples) * 1e6:9.1f} us"
+    )
+
+
+def main(count=200):
+    with tempfile.TemporaryDirectory() as root:
+        make_theme(root)
+        volume = IconTheme(root).levels(VOLUME)
+        time_lookups(root, volume)
+        asyncio.run(rasterise(root))
+
+        daemon = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            address = daemon.stdout.readline().strip()
+            asyncio.run(notify_all(address, volume, count))
+        finally:
+            daemon.terminate()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+"""Overhead of the instrumentation layer and what it records
+
+Times a trivial lazy-function-like call bare, wrapped with instrumentation
+disabled and enabled, then records a coroutine that blocks the loop for a
+while and awaits a child process:
+
+    python benchmarks/instrumentation.py [calls]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from instrument import Instrumentation  # noqa: E402
+
+
+def noop(qtile):
+    pass
+
+
+async def action():
+    time.sleep(0.005)  # blocks the loop
+    proc = await asyncio.create_subprocess_exec("sleep", "0.05")
+    await proc.wait()
+
+
+async def record(instrument):
+    timed = instrument.timed(action)
+    for _ in range(5):
+        await timed()
+
+
+def main(calls=200_000):
+    instrument = Instrumentation()
+    wrapped = instrument.timed(noop)
+
+    bare = timeit.timeit(lambda: noop(None), number=calls) / calls
+    disabled = timeit.timeit(lambda: wrapped(None), number=calls) / calls
+    instrument.enabled = True
+    # reading /proc makes enabled calls much slower, time fewer of them
+    enabled = timeit.timeit(lambda: wrapped(None), number=calls // 100) * 100 / calls
+    print(f"bare call:             {bare * 1e9:9.0f} ns")
+    print(f"wrapped, disabled:     {disabled * 1e9:9.0f} ns")
+    print(f"wrapped, enabled:      {enabled * 1e9:9.0f} ns")
+
+    instrument.reset()
+    asyncio.run(record(instrument))
+    print(json.dumps(instrument.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
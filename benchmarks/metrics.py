@@ -0,0 +1,64 @@
+"""CPU time the shared metrics sampler spends polling
+
+Builds the fixture /proc tree of tests/test_metrics.py in a temporary
+directory, times sampler ticks and extrapolates to an hour of polling with
+the box open. With the box closed, the sampler is deactivated and left to
+run for as many intervals, shortened, which must not read anything:
+
+    python benchmarks/metrics.py [ticks]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from metrics import SystemSampler  # noqa: E402
+from test_metrics import write_fixture  # noqa: E402
+
+CLOSED_INTERVAL = 0.001  # seconds, the interval while measuring a closed box
+
+
+async def closed_box(root, ticks) -> tuple[int, float]:
+    """Returns the reads and CPU time of a deactivated sampler over the ticks"""
+    sampler = SystemSampler(interval=CLOSED_INTERVAL, proc=root, mount=root)
+    sampler.subscribe(lambda sample: None)
+    await asyncio.sleep(CLOSED_INTERVAL)
+    sampler.set_active(False)
+    reads = sampler.reads
+    start = time.process_time()
+    await asyncio.sleep(ticks * CLOSED_INTERVAL)
+    cpu = time.process_time() - start
+    return sampler.reads - reads, cpu
+
+
+def main(ticks=2000):
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, 0)
+        sampler = SystemSampler(proc=root, mount=root)
+
+        cpu = 0.0
+        for i in range(ticks):
+            write_fixture(root, i)
+            start = time.process_time()
+            sampler.sample()
+            cpu += time.process_time() - start
+        closed_reads, closed_cpu = asyncio.run(closed_box(root, ticks))
+
+    per_tick = cpu / ticks
+    per_hour = per_tick * 3600 / sampler.interval
+    print(f"one tick: {per_tick * 1e6:8.1f} us CPU")
+    print(f"box open: {per_hour * 1e3:8.1f} ms CPU per hour")
+    assert closed_reads == 0, f"{closed_reads} reads with the box closed"
+    print(
+        f"box closed: {closed_reads} reads in {ticks} intervals, "
+        f"{closed_cpu * 1e3:.1f} ms CPU of the idle loop"
+    )
+    print(f"last sample: {sampler.history[-1]}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
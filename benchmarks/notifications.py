@@ -0,0 +1,80 @@
+"""Notification latency over one bus connection against the subprocess path
+
+Starts a private session bus with the stand-in notification server of
+tests/test_notifications.py (which checks the behaviour), so no notification
+daemon or desktop session is needed. The subprocess path is what the config
+used to run per keypress, `dunstctl close-all` then `notify-send`; it is
+skipped if they are not installed:
+
+    python benchmarks/notifications.py [count]
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from notifications import Notifier  # noqa: E402
+from test_notifications import serve  # noqa: E402
+
+COMMANDS = (("dunstctl", "close-all"), ("notify-send", "Volume", "{}%"))
+
+
+def report(name, samples):
+    print(
+        f"{name:>12}: median {statistics.median(samples) * 1e6:9.1f} us, "
+        f"max {max(samples) * 1e6:9.1f} us"
+    )
+
+
+async def run(address, count):
+    server_bus, server = await serve(address)
+    notifier = Notifier(bus_address=address)
+
+    dbus = []
+    for i in range(count):
+        start = time.perf_counter()
+        await notifier.notify("Volume", f"{i}%", tag="volume", value=i)
+        dbus.append(time.perf_counter() - start)
+    report("dbus", dbus)
+
+    missing = [cmd[0] for cmd in COMMANDS if shutil.which(cmd[0]) is None]
+    if missing:
+        print(f"{'subprocess':>12}: skipped, {', '.join(missing)} not installed")
+    else:
+        env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS=address)
+        forks = []
+        for i in range(count // 10):
+            start = time.perf_counter()
+            for cmd in COMMANDS:
+                args = [arg.format(i) for arg in cmd]
+                proc = await asyncio.create_subprocess_exec(*args, env=env)
+                await proc.wait()
+            forks.append(time.perf_counter() - start)
+        report("subprocess", forks)
+
+    notifier.disconnect()
+    server_bus.disconnect()
+    print(f"server saw {len({r[0] for r in server.received[1:count]})} replaced id(s)")
+
+
+def main(count=200):
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        address = daemon.stdout.readline().strip()
+        asyncio.run(run(address, count))
+    finally:
+        daemon.terminate()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,59 @@
+"""Frame times of the in-bar OSD under rapid repeated updates
+
+Subscribes one offscreen OSD per bar to an Osd and pushes a burst of
+volume updates through it, like a held volume key, timing each frame:
+
+    python benchmarks/osd.py [updates] [bars]
+"""
+import os
+import statistics
+import sys
+import time
+
+import cairocffi
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from osd import Osd, draw  # noqa: E402
+
+WIDTH, HEIGHT = 160, 34
+COLOURS = ("#1e1e2e", "#f5e0dc", "#313244")
+FRAME_BUDGET = 1 / 60
+
+
+class OffscreenOsd:
+    def __init__(self):
+        self.surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, WIDTH, HEIGHT)
+        self.ctx = cairocffi.Context(self.surface)
+        self.frames = []
+
+    def on_update(self, update):
+        start = time.perf_counter()
+        draw(self.ctx, WIDTH, HEIGHT, update, COLOURS, "sans", 16)
+        self.surface.flush()
+        self.frames.append(time.perf_counter() - start)
+
+
+def main(updates=1000, bars=2):
+    osd = Osd()
+    widgets = [OffscreenOsd() for _ in range(bars)]
+    for widget in widgets:
+        osd.subscribe(widget.on_update)
+
+    start = time.perf_counter()
+    for i in range(updates):
+        osd.show("V", i % 101, "volume")
+    elapsed = time.perf_counter() - start
+
+    frames = sorted(f for widget in widgets for f in widget.frames)
+    print(f"{updates} updates on {bars} bars in {elapsed * 1e3:.1f} ms")
+    print(
+        f"frame: median {statistics.median(frames) * 1e6:.1f} us, "
+        f"p99 {frames[int(len(frames) * 0.99)] * 1e6:.1f} us, "
+        f"max {frames[-1] * 1e6:.1f} us"
+    )
+    print(f"updates per 60 Hz frame budget: {FRAME_BUDGET / (elapsed / updates):.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
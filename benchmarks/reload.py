@@ -0,0 +1,106 @@
+"""Incremental against full config reload for a one-widget change
+
+Needs qtile and qtile-extras installed, but no running qtile. Loads the
+config, then a copy with the clock format edited, and reloads it both ways.
+A full reload executes the config twice (qtile loads it once to check it and
+once to apply it) and replaces every widget and bar window, so each bar is
+repainted from blank (the flicker); an incremental one executes it once,
+diffs it and rebuilds only the changed widgets in the existing bars, which
+redraw in place. The counts are taken from the bars each reload leaves:
+
+    python benchmarks/reload.py [rounds]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from reload import diff, dispose, load_config  # noqa: E402
+
+CONFIG = os.path.join(os.path.dirname(__file__), "..", "config.py")
+EDIT = 'format="%H:%M",', 'format="%H:%M:%S",'
+
+
+def bars(config):
+    return [
+        getattr(screen, position)
+        for screen in config.screens
+        for position in ("top", "bottom", "left", "right")
+        if hasattr(getattr(screen, position, None), "widgets")
+    ]
+
+
+def snapshot(config) -> dict:
+    return {bar: list(bar.widgets) for bar in bars(config)}
+
+
+def replaced(before, after) -> tuple[int, int]:
+    """Counts the widgets and bars of `after` not in the `before` snapshot"""
+    widgets = {id(w) for bar_widgets in before.values() for w in bar_widgets}
+    return (
+        sum(id(w) not in widgets for bar in after for w in bar.widgets),
+        sum(bar not in before for bar in after),
+    )
+
+
+def retire(config):
+    for name in config.RETIRED_ON_RELOAD:
+        dispose(getattr(config, name))
+
+
+def full(old, path):
+    start = time.perf_counter()
+    for _ in range(2):
+        new = load_config(path)
+        retire(new)
+    return time.perf_counter() - start, replaced(snapshot(old), bars(new))
+
+
+def incremental(old, path):
+    before = snapshot(old)
+    start = time.perf_counter()
+    changes = diff(old, load_config(path, old))
+    # what apply does to the running bars, without their windows
+    for bar, position, _, spec in changes.widgets:
+        bar.widgets[position] = spec.build()
+    elapsed = time.perf_counter() - start
+    counts = replaced(before, bars(old))
+    for bar, widgets in before.items():
+        bar.widgets[:] = widgets
+    return elapsed, counts, len(changes.ungrab) + len(changes.grab)
+
+
+def main(rounds=5):
+    with open(CONFIG) as f:
+        source = f.read()
+    assert EDIT[0] in source, "the edited line is gone, update EDIT"
+    old = load_config(CONFIG)
+
+    fulls, incrementals = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        edited = os.path.join(directory, "config.py")
+        with open(edited, "w") as f:
+            f.write(source.replace(*EDIT))
+        for _ in range(rounds):
+            elapsed, full_counts = full(old, edited)
+            fulls.append(elapsed)
+            elapsed, incremental_counts, keys = incremental(old, edited)
+            incrementals.append(elapsed)
+    retire(old)
+
+    for name, samples, (widgets, windows) in (
+        ("full", fulls, full_counts),
+        ("incremental", incrementals, incremental_counts),
+    ):
+        print(
+            f"{name + ' reload:':20}{statistics.median(samples) * 1e3:7.1f} ms, "
+            f"{widgets} widgets and {windows} bar windows replaced"
+        )
+    print(f"incremental reload regrabbed {keys} keys")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
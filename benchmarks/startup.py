@@ -0,0 +1,87 @@
+"""Import-time profile of the config, up to its bars being built
+
+Needs qtile and qtile-extras installed, but no running qtile. Imports the
+config in a fresh interpreter with `-X importtime`, so the time includes
+building both bars (all that precedes their first paint), then prints the
+costliest modules and packages, how many widgets were left for their widget
+box to build when it opens and which heavy modules were kept out:
+
+    python benchmarks/startup.py [modules listed]
+
+Run it on two checkouts to compare before and after a change.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# imported by widgets, menus and requests that are not needed to show the bars
+WATCHED = ("dbus_next", "ssl", "urllib.request", "iwlib", "PIL", "wifi")
+PROFILE = f"""
+import json, sys, time
+sys.path.insert(0, {ROOT!r})
+start = time.perf_counter()
+import config
+elapsed = time.perf_counter() - start
+deferred = sum(
+    len(getattr(w, "_specs", ()))
+    for screen in config.screens
+    for w in screen.top.widgets
+)
+built = sum(len(screen.top.widgets) for screen in config.screens)
+print(json.dumps(dict(
+    elapsed=elapsed, built=built, deferred=deferred, modules=sorted(sys.modules)
+)))
+"""
+
+
+def parse(stderr) -> dict[str, tuple[int, int]]:
+    """Returns module -> (self, cumulative) microseconds from -X importtime"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(own), int(cumulative)
+    return times
+
+
+def main(listed=15):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROFILE],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    result = json.loads(proc.stdout.splitlines()[-1])
+    times = parse(proc.stderr)
+
+    print(
+        f"import config and build bars: {result['elapsed'] * 1e3:8.1f} ms, "
+        f"{result['built']} widgets built, {result['deferred']} deferred"
+    )
+    print(f"\n{'self ms':>8} {'cumul ms':>9}  module")
+    by_self = sorted(times.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (own, cumulative) in by_self[:listed]:
+        print(f"{own / 1e3:8.1f} {cumulative / 1e3:9.1f}  {name}")
+
+    packages = defaultdict(int)
+    for name, (own, _) in times.items():
+        packages[name.split(".")[0]] += own
+    print(f"\n{'self ms':>8}  package")
+    by_package = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    for name, own in by_package[:listed]:
+        print(f"{own / 1e3:8.1f}  {name}")
+
+    loaded = set(result["modules"])
+    print()
+    for name in WATCHED:
+        print(f"{name:<15} {'loaded' if name in loaded else 'not loaded'}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,153 @@
+"""Config load and bar render benchmarks, tracked across commits
+
+Needs qtile and qtile-extras installed but no X server: bars are configured
+and drawn offscreen against a headless stand-in for qtile (headless.py).
+Times, as medians:
+
+- importing the config, in a fresh interpreter each round
+- create_group_boxes, create_spacer and create_separator
+- building both screens
+- drawing each widget of the primary bar into an offscreen surface
+
+Results are appended to history.json with the commit they were measured on.
+The run fails if a stage got slower than the median of the last recorded
+runs by more than the threshold:
+
+    python benchmarks/suite.py [rounds] [threshold percent]
+"""
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from headless import configure  # noqa: E402
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+BASELINE_RUNS = 5  # recorded runs the current one is compared with
+MIN_DELTA = 0.05  # ms, differences below it are noise whatever the ratio
+IMPORT_ROUNDS = 5
+SCREEN = 1920, 1080
+IMPORT = f"""
+import sys, time
+sys.path.insert(0, {ROOT!r})
+start = time.perf_counter()
+import config
+print(time.perf_counter() - start)
+"""
+
+
+def median_ms(func, rounds) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1e3, 4)
+
+
+def time_import() -> float:
+    samples = []
+    for _ in range(IMPORT_ROUNDS):
+        proc = subprocess.run(
+            [sys.executable, "-c", IMPORT], capture_output=True, text=True, check=True
+        )
+        samples.append(float(proc.stdout.splitlines()[-1]))
+    return round(statistics.median(samples) * 1e3, 4)
+
+
+async def time_draws(config, rounds) -> dict[str, float]:
+    screen = config.create_screen(config.PRIMARY_BAR)
+    qtile = configure(screen, *SCREEN)
+    # providers started by the widgets are stopped before they run
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+
+    results = {}
+    for widget in screen.top.widgets:
+
+        def draw():
+            widget.draw()
+            # a batching bar paints at the end of the loop iteration
+            qtile.run_pending("_flush")
+
+        results[f"draw {widget.name}"] = median_ms(draw, rounds)
+    return results
+
+
+def run(rounds) -> dict[str, float]:
+    results = {"import config": time_import()}
+    import config
+
+    for name in ("create_group_boxes", "create_spacer", "create_separator"):
+        results[name] = median_ms(getattr(config, name), rounds)
+
+    def create_screens():
+        config.create_screen(config.PRIMARY_BAR)
+        config.create_screen(config.SECONDARY_BAR)
+
+    results["create screens"] = median_ms(create_screens, rounds)
+    results.update(asyncio.run(time_draws(config, rounds)))
+    return results
+
+
+def commit() -> str:
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, cwd=ROOT
+        ).stdout.strip()
+
+    dirty = "-dirty" if git("status", "--short") else ""
+    return git("rev-parse", "--short", "HEAD") + dirty
+
+
+def regressions(results, history, threshold) -> list[str]:
+    found = []
+    for stage, ms in results.items():
+        previous = [e["results"][stage] for e in history if stage in e["results"]]
+        if not previous:
+            continue
+        baseline = statistics.median(previous[-BASELINE_RUNS:])
+        if ms - baseline > MIN_DELTA and ms > baseline * (1 + threshold / 100):
+            found.append(f"{stage}: {ms:.3f} ms, was {baseline:.3f} ms")
+    return found
+
+
+def main(rounds=20, threshold=20):
+    try:
+        with open(HISTORY) as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        history = []
+
+    results = run(rounds)
+    width = max(map(len, results))
+    for stage, ms in results.items():
+        print(f"{stage:<{width}} {ms:9.3f} ms")
+
+    found = regressions(results, history, threshold)
+    history.append(
+        {
+            "commit": commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "results": results,
+        }
+    )
+    with open(HISTORY, "w") as f:
+        json.dump(history, f, indent=1)
+        f.write("\n")
+
+    if found:
+        sys.exit(f"Regressed by more than {threshold}%:\n" + "\n".join(found))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,92 @@
+"""Reload-to-wallpaper-painted time with and without the scaled cache
+
+Paints the repository wallpaper on one and two simulated outputs offscreen
+the way qtile does, decoding the PNG for each screen and stretching it, and
+from the cache: a reload (a new cache object) paints the scaled surfaces kept
+in memory, a restart (the memory cache cleared) decodes the scaled copies on
+disk, once per output size:
+
+    python benchmarks/wallpaper.py [runs]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import cairocffi
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import wallpaper  # noqa: E402
+from wallpaper import WallpaperCache  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(__file__), "..", "wallpaper.png")
+LAYOUTS = {
+    "one output": [(1920, 1080)],
+    "two outputs": [(1920, 1080), (1366, 768)],
+    "two equal outputs": [(1920, 1080), (1920, 1080)],
+}
+
+
+def paint(path, width, height, stretch):
+    """Paints a PNG on an output-sized surface, like qtile's painter"""
+    image = cairocffi.ImageSurface.create_from_png(path)
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_RGB24, width, height)
+    ctx = cairocffi.Context(surface)
+    if stretch:
+        ctx.scale(width / image.get_width(), height / image.get_height())
+    ctx.set_source_surface(image)
+    ctx.paint()
+    surface.flush()
+
+
+def stretched(outputs, _):
+    for width, height in outputs:
+        paint(SOURCE, width, height, stretch=True)
+
+
+def blit(image, width, height):
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_RGB24, width, height)
+    ctx = cairocffi.Context(surface)
+    ctx.set_source_surface(image)
+    ctx.paint()
+    surface.flush()
+
+
+def cached(outputs, cache_dir):
+    wallpapers = WallpaperCache(SOURCE, cache_dir)
+    for width, height in outputs:
+        blit(wallpapers.surface(width, height), width, height)
+
+
+def restarted(outputs, cache_dir):
+    wallpaper._surfaces.clear()
+    cached(outputs, cache_dir)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(runs=5):
+    for label, outputs in LAYOUTS.items():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            wallpaper._surfaces.clear()
+            cold = timed(cached, outputs, cache_dir)
+            warm = [timed(cached, outputs, cache_dir) for _ in range(runs)]
+            restart = [timed(restarted, outputs, cache_dir) for _ in range(runs)]
+            stretch = [timed(stretched, outputs, None) for _ in range(runs)]
+            rendered = len(os.listdir(cache_dir))
+        print(
+            f"{label:<18} stretch {statistics.median(stretch) * 1e3:7.1f} ms, "
+            f"reload {statistics.median(warm) * 1e3:7.1f} ms, "
+            f"restart {statistics.median(restart) * 1e3:7.1f} ms "
+            f"(first run {cold * 1e3:.1f} ms, {rendered} scaled copies)"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,106 @@
+"""Time to first weather paint, online, offline and from the cache
+
+Serves OpenWeather-like JSON from a local HTTP stand-in that answers slowly
+and honours ETags, and measures how long the weather provider takes to
+publish on a cold start, a warm start with a stale cache and a start with
+the stand-in unreachable:
+
+    python benchmarks/weather.py [latency]
+"""
+import asyncio
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from weather import HttpBackend, WeatherProvider  # noqa: E402
+
+DATA = {"name": "Kraków", "main": {"temp": 12.3}, "weather": [{"description": "fog"}]}
+ETAG = '"1"'
+
+
+class StandIn(http.server.BaseHTTPRequestHandler):
+    latency = 0.5
+    requests = 0
+    not_modified = 0
+
+    def do_GET(self):
+        StandIn.requests += 1
+        time.sleep(self.latency)
+        if self.headers.get("If-None-Match") == ETAG:
+            StandIn.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(DATA).encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def first_paint(url, cache_path, ttl) -> tuple[float, object, int]:
+    provider = WeatherProvider(HttpBackend(url), cache_path, ttl=ttl, retry=0.2)
+    published = asyncio.get_running_loop().create_future()
+    updates = []
+
+    def on_weather(weather):
+        updates.append(weather)
+        if not published.done():
+            published.set_result(weather)
+
+    start = time.perf_counter()
+    provider.subscribe(on_weather)
+    weather = await published
+    elapsed = time.perf_counter() - start
+    # leave time for a revalidation or a retry to happen
+    await asyncio.sleep(StandIn.latency * 2 + 0.5)
+    provider.unsubscribe(on_weather)
+    return elapsed, weather, len(updates)
+
+
+async def main():
+    StandIn.latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/weather"
+
+    with tempfile.TemporaryDirectory() as root:
+        cache_path = os.path.join(root, "weather.json")
+        runs = [
+            ("cold start", url, 600),
+            ("stale cache", url, 0.1),
+            ("fresh cache", url, 600),
+        ]
+        for label, target, ttl in runs:
+            if label == "stale cache":
+                await asyncio.sleep(0.2)
+            elapsed, weather, updates = await first_paint(target, cache_path, ttl)
+            print(
+                f"{label:<12} first paint {elapsed * 1000:7.1f} ms, "
+                f"stale={weather.stale}, {updates} updates"
+            )
+
+        server.shutdown()
+        server.server_close()
+        await asyncio.sleep(0.2)
+        elapsed, weather, updates = await first_paint(url, cache_path, 0.1)
+        print(
+            f"{'offline':<12} first paint {elapsed * 1000:7.1f} ms, "
+            f"stale={weather.stale}, {updates} updates"
+        )
+
+    print(f"stand-in answered {StandIn.requests} requests, {StandIn.not_modified} 304")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
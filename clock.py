@@ -0,0 +1,96 @@
+"""Time source shared by every clock widget"""
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+from libqtile.log_utils import logger
+
+from providers import Provider
+
+SECOND = 1
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# strftime directives finer than a day, anything else changes once a day
+DIRECTIVES = {
+    **dict.fromkeys("STXcrsf", SECOND),
+    **dict.fromkeys("MR", MINUTE),
+    **dict.fromkeys("HIklp", HOUR),
+}
+
+
+def resolution(format) -> int:
+    """Returns how often, in seconds, a strftime format can change"""
+    if format is None:
+        return SECOND
+    directives = re.findall(r"%[-_0^#]?([A-Za-z])", format)
+    return min((DIRECTIVES.get(d, DAY) for d in directives), default=DAY)
+
+
+def next_boundary(now, seconds) -> datetime:
+    """Returns the first whole `seconds` interval after `now`, from midnight"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (now - midnight).total_seconds()
+    return midnight + timedelta(seconds=(elapsed // seconds + 1) * seconds)
+
+
+class ClockProvider(Provider):
+    """Publishes the time at the boundaries its subscribers need
+
+    Subscribers may pass the strftime format they display. The clock then
+    wakes up exactly when the finest of those formats can change (a date
+    only needs midnight, `%H:%M` the minute) and calls back only the
+    subscribers whose formatted text changed. Subscribers without a format
+    are called every second.
+    """
+
+    def __init__(self, now=datetime.now):
+        Provider.__init__(self)
+        self.now = now
+        self.wakeups = 0
+        self.skipped = 0
+        self._formats = {}
+        self._texts = {}
+        self._seconds = DAY
+
+    def subscribe(self, callback, passive=False, format=None):
+        seconds = resolution(format)
+        self._formats[callback] = format, seconds
+        if format is not None and self.value is not None:
+            self._texts[callback] = self.value.strftime(format)
+        if seconds < self._seconds:
+            # the running task may be asleep until a coarser boundary
+            self.stop()
+        Provider.subscribe(self, callback, passive)
+
+    def unsubscribe(self, callback):
+        self._formats.pop(callback, None)
+        self._texts.pop(callback, None)
+        Provider.unsubscribe(self, callback)
+
+    async def run(self):
+        while True:
+            wake = self.tick(self.now())
+            await asyncio.sleep(max((wake - self.now()).total_seconds(), 0))
+
+    def tick(self, now) -> datetime:
+        """Calls back the subscribers whose text changed, returns the next wake"""
+        self.reads += 1
+        self.value = now
+        for callback, _ in list(self._callbacks):
+            format, _ = self._formats.get(callback, (None, SECOND))
+            if format is not None:
+                text = now.strftime(format)
+                if text == self._texts.get(callback):
+                    self.skipped += 1
+                    continue
+                self._texts[callback] = text
+            self.wakeups += 1
+            try:
+                callback(now)
+            except Exception:
+                logger.exception("ClockProvider subscriber failed")
+
+        self._seconds = min((r for _, r in self._formats.values()), default=DAY)
+        return next_boundary(now, self._seconds)
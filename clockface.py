@@ -0,0 +1,80 @@
+"""Analogue clock rendering with a cached, pre-rendered face"""
+import math
+from functools import lru_cache
+
+import cairocffi
+from libqtile.utils import rgb
+
+
+@lru_cache(maxsize=16)
+def render_face(diameter, shape, background, border_colour, border_width):
+    """Returns the static clock face as an image surface
+
+    Surfaces are cached per size and colour combination, so a clock only has
+    to paint this surface and its hands on every update.
+    """
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, diameter, diameter)
+    ctx = cairocffi.Context(surface)
+    inset = border_width / 2
+    if shape == "circle":
+        radius = diameter / 2
+        ctx.arc(radius, radius, radius - inset, 0, 2 * math.pi)
+    else:
+        ctx.rectangle(inset, inset, diameter - border_width, diameter - border_width)
+
+    ctx.set_source_rgba(*rgb(background))
+    if border_width:
+        ctx.fill_preserve()
+        ctx.set_line_width(border_width)
+        ctx.set_source_rgba(*rgb(border_colour))
+        ctx.stroke()
+    else:
+        ctx.fill()
+
+    surface.flush()
+    return surface
+
+
+def draw_hand(ctx, centre, radius, fraction, length, size, colour):
+    """Draws one hand pointing at `fraction` of a full turn"""
+    angle = fraction * 2 * math.pi - math.pi / 2
+    x, y = centre
+    reach = radius * length
+    ctx.set_source_rgba(*rgb(colour))
+    ctx.set_line_width(size)
+    ctx.set_line_cap(cairocffi.LINE_CAP_ROUND)
+    ctx.move_to(x, y)
+    ctx.line_to(x + math.cos(angle) * reach, y + math.sin(angle) * reach)
+    ctx.stroke()
+
+
+def draw_clock(ctx, x, y, diameter, now, face, hands):
+    """Paints a cached face at (x, y) and the hands for `now` on top of it
+
+    `face` holds the render_face arguments after the diameter and `hands` is
+    a dict with hour/minute colours, sizes and lengths.
+    """
+    ctx.set_source_surface(render_face(diameter, *face), x, y)
+    ctx.paint()
+
+    radius = diameter / 2
+    centre = x + radius, y + radius
+    hours = (now.hour % 12 + now.minute / 60) / 12
+    draw_hand(
+        ctx,
+        centre,
+        radius,
+        hours,
+        hands["hour_length"],
+        hands["hour_size"],
+        hands["hour_colour"],
+    )
+    draw_hand(
+        ctx,
+        centre,
+        radius,
+        now.minute / 60,
+        hands["minute_length"],
+        hands["minute_size"],
+        hands["minute_colour"],
+    )
@@ -23,34 +23,82 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import asyncio
+import functools
+import math
 import os
-import subprocess
 
-from libqtile import bar, layout, hook
+from libqtile import bar, layout, hook, qtile
 from libqtile.config import Click, Drag, Group, Key, Match, Screen
 from libqtile.lazy import lazy
+from libqtile.log_utils import logger
 from libqtile.utils import guess_terminal
-from qtile_extras import widget
 from qtile_extras.widget.decorations import PowerLineDecoration, RectDecoration
 
+from actions import ActionExecutor, Coalescer
+from autostart import ON_FAILURE, Job, Supervisor, process_uptime
+from backlight import Backlight
+from clock import ClockProvider
+from icons import IconTheme, lookup
+from instrument import Instrumentation
+from bar_spec import bar_spec, deferred, spec
+from bars import BatchedBar
+from notifications import Notifier
+from outputs import Output, OutputManager, Profile
+from osd import Osd
+from metrics import SystemSampler
+from power import LowBatteryPolicy, PowerMonitor
+from providers import Registry
+from reload import IncrementalReload, dispose
+from visibility import Visibility, log_wakeups
+from volume import VolumeController
+from wallpaper import WallpaperCache
+from weather import open_weather
+from widgets import (
+    AnalogueClock,
+    BatteryGauge,
+    BatteryText,
+    ClockText,
+    CpuText,
+    DiskText,
+    InstrumentationCommands,
+    MemoryText,
+    NetText,
+    OsdBar,
+    WatchedWidgetBox,
+    WeatherText,
+)
+
 
 mod = "mod4"
 alt = "mod1"
 terminal = guess_terminal()
 
-# variables
-is_muted = False
-
 # constants
 GAP_SIZE = 4
 BORDER_SIZE = 1
 WALLPAPER = "~/.config/qtile/wallpaper.png"
 ICONS_DIR = "/usr/share/icons/Catppuccin-SE"
-SCRIPTS_DIR = "~/.config/qtile/scripts"
+CACHE_DIR = os.path.expanduser("~/.cache/qtile")
 IMAGE_PADDING = 5
+BACKLIGHT_NAME = "intel_backlight"
+BRIGHTNESS_STEP = 10  # percent of max_brightness
+VOLUME_STEP = 5  # percent
+METRICS_INTERVAL = 2  # seconds between system metrics samples
+WEATHER_LOCATION = "Kraków"
+SHUTDOWN_GRACE_PERIOD = 5  # seconds windows get to close before poweroff
+LOW_BATTERY_WARNING = 10  # percent below which a warning is shown
+LOW_BATTERY_SHUTDOWN = 5  # percent below which the session is shut down
+KEY_REPEAT_WINDOW = 0.05  # seconds over which repeated OSD keys are merged
+ACTION_BUDGET = 0.1  # seconds a click or key action may take before a warning
+OUTPUT_TIMEOUT = 10  # seconds xrandr gets to apply a profile
+INSTRUMENT_LOG_INTERVAL = 300  # seconds between instrumentation log dumps
 
 
 FONT = "NotoSans Nerd Font"
+VOLUME_GLYPH = "󰕾"
+VOLUME_MUTED_GLYPH = "󰝟"
+BRIGHTNESS_GLYPH = "󰃟"
 
 
 # colorscheme
@@ -76,197 +124,357 @@ ACCENT = BLUE
 SURFACE_0 = "#313244"
 SUBTEXT = "#bac2de"
 
+# objects holding threads, connections or polling tasks, disposed of when a
+# reload replaces them
+RETIRED_ON_RELOAD = (
+    "backlight",
+    "notifier",
+    "executor",
+    "instrument",
+    "sources",
+    "volume",
+)
+
+# a reload executes this file again in the same globals, and qtile's full
+# reload does so twice: the objects of the previous runs are collected here
+# and disposed of once the new config has started
+_retired = [
+    *globals().get("_retired", ()),
+    *(globals()[name] for name in RETIRED_ON_RELOAD if name in globals()),
+]
+
+backlight = Backlight(BACKLIGHT_NAME, step=BRIGHTNESS_STEP)
+notifier = Notifier()
+osd = Osd()
+executor = ActionExecutor(budget=ACTION_BUDGET)
+# set QTILE_INSTRUMENT=1 to time lazy functions and hooks from startup, or
+# toggle it with: qtile cmd-obj -o widget instrumentation -f enable
+instrument = Instrumentation(
+    enabled=bool(os.environ.get("QTILE_INSTRUMENT")),
+    log_interval=INSTRUMENT_LOG_INTERVAL,
+)
+
+
+async def shutdown_session():
+    """Closes every window gracefully before powering off"""
+    for group in qtile.groups:
+        for window in list(group.windows):
+            window.kill()
+
+    for _ in range(SHUTDOWN_GRACE_PERIOD * 10):
+        if not any(group.windows for group in qtile.groups):
+            break
+        await asyncio.sleep(0.1)
+
+    autostart.stop()
+    await executor.run("systemctl", "poweroff")
+
+
+visibility = Visibility()
+
+# data sources shared by every bar that displays them
+sources = Registry()
+sources.register("battery", PowerMonitor)
+sources.register("clock", ClockProvider)
+sources.register("metrics", functools.partial(SystemSampler, METRICS_INTERVAL))
+sources.register("weather", functools.partial(open_weather, WEATHER_LOCATION))
+
+power = sources.get("battery")
+clock = sources.get("clock")
+sampler = sources.get("metrics")
+weather = sources.get("weather")
+
+# metrics and weather are only fetched while their box is open and unlocked
+visibility.add_listener(sampler.set_active, "box:system", "locked")
+visibility.add_listener(weather.set_active, "box:system", "locked")
+
+# shuts down the PC on low battery like the old poweroff_on_low_battery.sh,
+# also while the screen is locked and the battery widgets are paused
+LowBatteryPolicy(
+    notifier,
+    shutdown_session,
+    warn_below=LOW_BATTERY_WARNING,
+    critical_below=LOW_BATTERY_SHUTDOWN,
+).attach(power)
+
+# the first profile whose outputs are all connected is applied on hotplug
+OUTPUT_PROFILES = (
+    # external monitor as primary, laptop screen to the right of it
+    Profile(
+        "docked",
+        (Output("DP-1-1", primary=True), Output("eDP-1", right_of="DP-1-1")),
+    ),
+    Profile("laptop", (Output("eDP-1", primary=True), Output("DP-1-1", off=True))),
+    Profile("external", (Output("DP-1-1", primary=True), Output("eDP-1", off=True))),
+)
+_previous_outputs = globals().get("outputs")
+outputs = OutputManager(
+    OUTPUT_PROFILES,
+    executor.run,
+    screen_info=lambda: qtile.core.get_screen_info(),
+    reconfigure=lambda: qtile.reconfigure_screens(),
+)
+if _previous_outputs is not None:
+    # a reload runs this file again, the new manager carries on from the
+    # running one instead of applying the first matching profile
+    outputs.take_over(_previous_outputs)
+hook.subscribe.screen_change(instrument.timed(outputs.hotplug, "screen_change"))
+
+TOUCHPAD = "AlpsPS/2 ALPS DualPoint TouchPad"
+# a reload executes this file again but keeps its globals: the supervisor
+# started with the session keeps watching its daemons instead of being
+# replaced by one that startup_once never starts
+if "autostart" not in globals():
+    autostart = Supervisor(
+        [
+            # compositor
+            Job("picom", ("picom",), daemon=True, restart=ON_FAILURE),
+            # invert touchpad scrolling
+            Job("touchpad-scroll", ("xinput", "set-prop", TOUCHPAD, "315", "1")),
+            # touchpad tapping
+            Job("touchpad-tap", ("xinput", "set-prop", TOUCHPAD, "344", "1")),
+            # blue light filter
+            Job(
+                "redshift",
+                ("redshift", "-l", "50.06143:19.93658"),
+                daemon=True,
+                restart=ON_FAILURE,
+            ),
+            # notifications
+            Job("dunst", ("dunst",), daemon=True, restart=ON_FAILURE),
+        ]
+    )
+
 
 # functions
-@hook.subscribe.startup
+@hook.subscribe.startup_once
+@instrument.timed
 def run_on_startup():
-    script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "autostart.sh"))
-    subprocess.call([script])
+    instrument.set_enabled(instrument.enabled)
+    autostart.start()
+    # applies the profile matching the connected outputs
+    outputs.start()
+    outputs.hotplug()
 
 
-def lock_screen():
-    return lazy.spawn("betterlockscreen -l dimblur")
+@hook.subscribe.startup
+def dispose_retired():
+    """Stops the executors, connections and providers of previous runs"""
+    while _retired:
+        dispose(_retired.pop())
 
 
-def open_rofi():
-    return lazy.spawn("rofi -show drun -show-icons")
+@hook.subscribe.startup_complete
+def log_first_paint():
+    def painted():
+        logger.info(f"Bars first painted {process_uptime():.3f}s after start")
 
+    # the bars draw in the next loop iteration, and a batched bar paints what
+    # was drawn at the end of it
+    qtile.call_soon(qtile.call_soon, painted)
 
-def open_rofimoji():
-    return lazy.spawn("rofimoji -a clipboard")
 
+@hook.subscribe.shutdown
+@instrument.timed
+def stop_autostart():
+    autostart.stop()
+    logger.info(f"Action durations:\n{executor.report()}")
+    logger.info(f"Brightness keys: {brightness_keys.report()}")
+    logger.info(f"Volume keys: {volume_keys.report()}")
 
-def turn_off_laptop_screen():
-    script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "turn_off_laptop_screen.sh"))
-    subprocess.call([script])
 
+async def lock():
+    """Locks the screen, suspending the bars until it is unlocked"""
+    log_wakeups(visibility, "while unlocked")
+    visibility.set("locked", True)
+    try:
+        await executor.run("betterlockscreen", "-l", "dimblur")
+    finally:
+        log_wakeups(visibility, "while locked")
+        visibility.set("locked", False)
 
-def get_volume_icon(volume):
-    volume = int(volume[:-1])  # drop the % sign
-
-    if volume == 0:
-        icon = "notification-audio-volume-off.svg"
-    elif volume <= 33:
-        icon = "notification-audio-volume-low.svg"
-    elif volume <= 66:
-        icon = "notification-audio-volume-medium.svg"
-    else:
-        icon = "notification-audio-volume-high.svg"
 
-    return os.path.join(ICONS_DIR, "48x48", "status", icon)
+# guarded, so that pressing the key again while locked is ignored
+lock_screen = lazy.function(
+    executor.guarded("lock", instrument.timed(lock), budget=math.inf)
+)
 
 
-def get_brightness_icon(brightness):
-    if brightness == 0:
-        icon = "notification-display-brightness-off.svg"
-    elif brightness <= 33:
-        icon = "notification-display-brightness-low.svg"
-    elif brightness <= 66:
-        icon = "notification-display-brightness-medium.svg"
-    elif brightness <= 99:
-        icon = "notification-display-brightness-high.svg"
-    else:
-        icon = "notification-display-brightness-full.svg"
+def open_rofi():
+    return lazy.spawn("rofi -show drun -show-icons")
 
-    return os.path.join(ICONS_DIR, "48x48", "status", icon)
 
+def open_rofimoji():
+    return lazy.spawn("rofimoji -a clipboard")
 
-@lazy.function
-def increase_brightness(qtile):
-    def change_brightness():
-        """Helper function for brightness wrappers"""
-        nonlocal qtile
 
-        script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "change_backlight.sh"))
+@functools.cache
+def get_wifi_menu():
+    # imported on first use, keeping D-Bus out of the config's import
+    from wifi import WifiMenu
 
-        try:
-            completed_process = subprocess.run(
-                [script, "increase"], stdout=subprocess.PIPE, check=True
-            )
+    return WifiMenu(notifier)
 
-            brightness = completed_process.stdout.decode().strip()[:4]
-            brightness = int(float(brightness) * 100)
-            icon = get_brightness_icon(brightness)
 
-            subprocess.run(["dunstctl", "close-all"], check=True)
-            subprocess.run(
-                ["notify-send", "Increased Brightness", f"{brightness}%", "-i", icon],
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            qtile.log.error(f"Failed to increase brightness or send notification:\n{e}")
+async def wifi_menu():
+    await get_wifi_menu().run()
 
-    qtile.call_soon(change_brightness)
 
+open_wifi_menu = lazy.function(
+    executor.guarded("wifi", instrument.timed(wifi_menu), budget=math.inf)
+)
+turn_off_laptop_screen = executor.guarded(
+    "laptop-screen",
+    instrument.timed(outputs.apply, "turn_off_laptop_screen"),
+    "external",
+    timeout=OUTPUT_TIMEOUT,
+)
+# regrabs changed keys and rebuilds changed widgets, anything else reloads fully
+reload_config = lazy.function(instrument.timed(IncrementalReload(), "reload_config"))
 
-@lazy.function
-def decrease_brightness(qtile):
-    def change_brightness():
-        """Helper function for brightness wrappers"""
-        nonlocal qtile
 
-        script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "change_backlight.sh"))
+icon_theme = IconTheme(ICONS_DIR, raster_dir=os.path.join(CACHE_DIR, "icons"))
+VOLUME_ICONS = icon_theme.levels(
+    [
+        (0, "notification-audio-volume-off.svg"),
+        (33, "notification-audio-volume-low.svg"),
+        (66, "notification-audio-volume-medium.svg"),
+        (100, "notification-audio-volume-high.svg"),
+    ],
+    fallback="audio-volume-high",
+)
+VOLUME_MUTED_ICON = "notification-audio-volume-muted.svg"
+icon_theme.icon(VOLUME_MUTED_ICON, fallback="audio-volume-muted")
+BRIGHTNESS_ICONS = icon_theme.levels(
+    [
+        (0, "notification-display-brightness-off.svg"),
+        (33, "notification-display-brightness-low.svg"),
+        (66, "notification-display-brightness-medium.svg"),
+        (99, "notification-display-brightness-high.svg"),
+        (100, "notification-display-brightness-full.svg"),
+    ],
+    fallback="display-brightness",
+)
 
-        try:
-            completed_process = subprocess.run(
-                [script, "decrease"], stdout=subprocess.PIPE, check=True
-            )
 
-            brightness = completed_process.stdout.decode().strip()[:4]
-            brightness = int(float(brightness) * 100)
-            icon = get_brightness_icon(brightness)
+def get_volume_icon(volume):
+    return lookup(VOLUME_ICONS, volume)
 
-            subprocess.run(["dunstctl", "close-all"], check=True)
-            subprocess.run(
-                ["notify-send", "Decreased Brightness", f"{brightness}%", "-i", icon],
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            qtile.log.error(f"Failed to decrease brightness or send notification:\n{e}")
 
-    qtile.call_soon(change_brightness)
+def get_brightness_icon(brightness):
+    return lookup(BRIGHTNESS_ICONS, brightness)
 
 
-@lazy.function
-def increase_vol(qtile):
-    def change_volume():
-        """Helper function for volume wrappers"""
-        nonlocal qtile
+@hook.subscribe.startup
+def rasterise_icons():
+    """Converts the notification icons without a PNG yet, off the event loop"""
+    executor.submit("icons", icon_theme.rasterise_pending(executor.run_blocking))
+
+
+@instrument.timed
+def change_brightness(steps):
+    """Applies a coalesced brightness change and shows the result"""
+    try:
+        brightness = backlight.step(steps)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to change brightness:\n{e}")
+        return
+
+    if osd.show(BRIGHTNESS_GLYPH, brightness, "brightness"):
+        brightness_keys.notified()
+        return
+
+    # no bar to show the OSD in, fall back to a notification
+    summary = "Increased Brightness" if steps > 0 else "Decreased Brightness"
+    executor.submit(
+        "brightness",
+        notify(
+            brightness_keys,
+            summary,
+            f"{brightness}%",
+            icon=get_brightness_icon(brightness),
+            tag="brightness",
+            value=brightness,
+        ),
+    )
 
-        script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "change_volume.sh"))
 
-        try:
-            completed_process = subprocess.run(
-                [script, "increase"], stdout=subprocess.PIPE, check=True
-            )
+@instrument.timed
+def notify_volume(level, muted):
+    glyph = VOLUME_MUTED_GLYPH if muted else VOLUME_GLYPH
+    if osd.show(glyph, None if muted else level, "volume"):
+        volume_keys.notified()
+        return
 
-            volume = completed_process.stdout.decode().strip()
-            icon = get_volume_icon(volume)
+    if muted:
+        icon = icon_theme.icon(VOLUME_MUTED_ICON, fallback="audio-volume-muted")
+        body = "Muted"
+    else:
+        icon = get_volume_icon(level)
+        body = f"{level}%"
+
+    executor.submit(
+        "volume",
+        notify(
+            volume_keys,
+            "Volume",
+            body,
+            icon=icon,
+            tag="volume",
+            value=None if muted else level,
+        ),
+    )
 
-            subprocess.run(["dunstctl", "close-all"], check=True)
-            subprocess.run(
-                ["notify-send", "Increased Volume", volume, "-i", icon], check=True
-            )
-        except subprocess.CalledProcessError as e:
-            qtile.log.error(f"Failed to increase volume or send notification:\n{e}")
 
-    qtile.call_soon(change_volume)
+async def notify(keys, *args, **kwargs):
+    await notifier.notify(*args, **kwargs)
+    keys.notified()
 
 
-@lazy.function
-def decrease_vol(qtile):
-    def change_volume():
-        """Helper function for volume wrappers"""
-        nonlocal qtile
+@instrument.timed
+def toggle_mute(presses):
+    if presses % 2:
+        volume.toggle_mute()
 
-        script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "change_volume.sh"))
-        try:
-            completed_process = subprocess.run(
-                [script, "decrease"], stdout=subprocess.PIPE, check=True
-            )
 
-            volume = completed_process.stdout.decode().strip()
-            icon = get_volume_icon(volume)
+volume = VolumeController(step=VOLUME_STEP)
+volume.subscribe(notify_volume)
+
+brightness_keys = Coalescer(change_brightness, KEY_REPEAT_WINDOW)
+volume_keys = Coalescer(
+    instrument.timed(volume.step, "volume_step"), KEY_REPEAT_WINDOW
+)
+mute_keys = Coalescer(toggle_mute, KEY_REPEAT_WINDOW, counters=volume_keys.counters)
 
-            subprocess.run(["dunstctl", "close-all"], check=True)
-            subprocess.run(
-                ["notify-send", "Decreased Volume", volume, "-i", icon], check=True
-            )
-        except subprocess.CalledProcessError as e:
-            qtile.log.error(f"Failed to decrease volume or send notification:\n{e}")
 
-    qtile.call_soon(change_volume)
+@lazy.function
+@instrument.timed
+def increase_brightness(qtile):
+    brightness_keys.push(1)
 
 
 @lazy.function
-def mute_vol(qtile):
-    global is_muted
-    is_muted = not is_muted
+@instrument.timed
+def decrease_brightness(qtile):
+    brightness_keys.push(-1)
+
 
-    def change_volume():
-        """Helper function for volume wrappers"""
-        nonlocal qtile
+@lazy.function
+@instrument.timed
+def increase_vol(qtile):
+    volume_keys.push(1)
 
-        script = os.path.expanduser(os.path.join(SCRIPTS_DIR, "change_volume.sh"))
-        try:
-            completed_process = subprocess.run(
-                [script, "mute"], stdout=subprocess.PIPE, check=True
-            )
 
-            if is_muted:
-                icon = os.path.join(
-                    ICONS_DIR, "48x48", "status", "notification-audio-volume-muted.svg"
-                )
-            else:
-                volume = completed_process.stdout.decode().strip()
-                icon = get_volume_icon(volume)
+@lazy.function
+@instrument.timed
+def decrease_vol(qtile):
+    volume_keys.push(-1)
 
-            subprocess.run(["dunstctl", "close-all"], check=True)
-            subprocess.run(["notify-send", "Toggled Mute", "-i", icon], check=True)
-        except subprocess.CalledProcessError as e:
-            qtile.log.error(f"Failed to toggle mute or send notification:\n{e}")
 
-    qtile.call_soon(change_volume)
+@lazy.function
+@instrument.timed
+def mute_vol(qtile):
+    mute_keys.push(1)
 
 
 keys = [
@@ -326,11 +534,18 @@ keys = [
         lazy.window.toggle_floating(),
         desc="Toggle floating on the focused window",
     ),
-    Key([mod, "control"], "r", lazy.reload_config(), desc="Reload the config"),
+    Key([mod, "control"], "r", reload_config(), desc="Reload what changed"),
+    Key(
+        [mod, "control", "shift"],
+        "r",
+        lazy.reload_config(),
+        desc="Reload the whole config",
+    ),
     Key([mod, "control"], "q", lazy.shutdown(), desc="Shutdown Qtile"),
     Key([mod], "p", lazy.spawncmd(), desc="Spawn a command using a prompt widget"),
     Key([alt], "space", open_rofi(), desc="Spawn Rofi"),
     Key([mod], "period", open_rofimoji(), desc="Spawn emoji picker"),
+    Key([mod], "w", open_wifi_menu(), desc="Open the Wi-Fi menu"),
     Key(
         [],
         "XF86MonBrightnessUp",
@@ -427,87 +642,60 @@ extension_defaults = widget_defaults.copy()
 
 
 # bar widget functions
+@functools.cache
+def rect_decoration() -> RectDecoration:
+    """Returns the rounded background shared by all grouped widgets
+
+    qtile_extras copies decorations into each widget when it is configured,
+    so a single instance can be shared by every widget spec.
+    """
+    return RectDecoration(
+        colour=MANTLE,
+        radius=16,
+        filled=True,
+        padding_y=0,
+        group=True,
+    )
+
+
+@functools.cache
+def powerline_decoration(path, **config) -> PowerLineDecoration:
+    return PowerLineDecoration(path=path, **config)
+
+
+def create_rect_decoration() -> dict:
+    return {"decorations": [rect_decoration()]}
+
+
+# (highlight colour, groups) of each GroupBox
+GROUP_BOXES = [
+    (YELLOW, ["1"]),
+    (ROSEWATER, ["2", "3", "4", "5"]),
+    (RED, ["6"]),
+    (PEACH, ["7"]),
+    (SKY, ["8"]),
+    (PINK, ["9"]),
+]
+
+
 def create_group_boxes() -> list:
     """Returns a list with GroupBox widgets in Pacman style"""
     return [
-        widget.GroupBox(
+        spec(
+            "GroupBox",
             highlight_method="text",
-            this_current_screen_border=YELLOW,
-            this_screen_border=YELLOW,
+            this_current_screen_border=colour,
+            this_screen_border=colour,
             other_current_screen_border=GRAY,
             other_screen_border=GRAY,
             disable_drag=True,
             foreground=FOREGROUND_LIGHT,
             active=FOREGROUND_LIGHT,
             inactive=GRAY,
-            visible_groups=["1"],
+            visible_groups=visible_groups,
             **create_rect_decoration(),
-        ),
-        widget.GroupBox(
-            highlight_method="text",
-            this_current_screen_border=ROSEWATER,
-            this_screen_border=ROSEWATER,
-            other_current_screen_border=GRAY,
-            other_screen_border=GRAY,
-            disable_drag=True,
-            foreground=FOREGROUND_LIGHT,
-            active=FOREGROUND_LIGHT,
-            inactive=GRAY,
-            visible_groups=["2", "3", "4", "5"],
-            **create_rect_decoration(),
-        ),
-        widget.GroupBox(
-            highlight_method="text",
-            this_current_screen_border=RED,
-            this_screen_border=RED,
-            other_current_screen_border=GRAY,
-            other_screen_border=GRAY,
-            disable_drag=True,
-            foreground=FOREGROUND_LIGHT,
-            active=FOREGROUND_LIGHT,
-            inactive=GRAY,
-            visible_groups=["6"],
-            **create_rect_decoration(),
-        ),
-        widget.GroupBox(
-            highlight_method="text",
-            this_current_screen_border=PEACH,
-            this_screen_border=PEACH,
-            other_current_screen_border=GRAY,
-            other_screen_border=GRAY,
-            disable_drag=True,
-            foreground=FOREGROUND_LIGHT,
-            active=FOREGROUND_LIGHT,
-            inactive=GRAY,
-            visible_groups=["7"],
-            **create_rect_decoration(),
-        ),
-        widget.GroupBox(
-            highlight_method="text",
-            this_current_screen_border=SKY,
-            this_screen_border=SKY,
-            other_current_screen_border=GRAY,
-            other_screen_border=GRAY,
-            disable_drag=True,
-            foreground=FOREGROUND_LIGHT,
-            active=FOREGROUND_LIGHT,
-            inactive=GRAY,
-            visible_groups=["8"],
-            **create_rect_decoration(),
-        ),
-        widget.GroupBox(
-            highlight_method="text",
-            this_current_screen_border=PINK,
-            this_screen_border=PINK,
-            other_current_screen_border=GRAY,
-            other_screen_border=GRAY,
-            disable_drag=True,
-            foreground=FOREGROUND_LIGHT,
-            active=FOREGROUND_LIGHT,
-            inactive=GRAY,
-            visible_groups=["9"],
-            **create_rect_decoration(),
-        ),
+        )
+        for colour, visible_groups in GROUP_BOXES
     ]
 
 
@@ -515,44 +703,40 @@ def create_spacer() -> list:
     """Returns the spacer with added left and right decorations"""
     padding_y = 0
     return [
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
             background=BACKGROUND,
             padding=1,
-            decorations=[
-                PowerLineDecoration(path="rounded_right", padding_y=padding_y)
-            ],
+            decorations=[powerline_decoration("rounded_right", padding_y=padding_y)],
         ),
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
             background=MANTLE,
             padding=1,
-            decorations=[
-                PowerLineDecoration(path="rounded_right", padding_y=padding_y)
-            ],
+            decorations=[powerline_decoration("rounded_right", padding_y=padding_y)],
         ),
-        widget.Prompt(
+        spec(
+            "Prompt",
             background=CRUST,
             foreground=SUBTEXT,
             fontsize=14,
-            decorations=[PowerLineDecoration(path="rounded_left", padding_y=padding_y)],
+            decorations=[powerline_decoration("rounded_left", padding_y=padding_y)],
         ),
-        widget.WindowName(
+        spec(
+            "WindowName",
             foreground=SUBTEXT,
             fontsize=14,
             background=CRUST,
-            decorations=[PowerLineDecoration(path="rounded_left", padding_y=padding_y)],
+            decorations=[powerline_decoration("rounded_left", padding_y=padding_y)],
         ),
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
             background=MANTLE,
             padding=1,
-            decorations=[
-                PowerLineDecoration(
-                    path="rounded_left",
-                    padding_y=padding_y,
-                )
-            ],
+            decorations=[powerline_decoration("rounded_left", padding_y=padding_y)],
         ),
     ]
 
@@ -560,406 +744,436 @@ def create_spacer() -> list:
 def create_separator() -> list:
     """Returns a list with widgets that create a nice separator"""
     return [
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
         ),
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
             padding=0,
             background=BACKGROUND,
             decorations=[
-                PowerLineDecoration(
-                    path="rounded_left",
+                powerline_decoration(
+                    "rounded_left",
                     shift=10,
                     ignore_extrawidth=True,
                 ),
             ],
         ),
-        widget.Sep(
+        spec(
+            "Sep",
             linewidth=0,
         ),
     ]
 
 
-def create_rect_decoration() -> dict:
-    return {
-        "decorations": [
-            RectDecoration(
-                colour=MANTLE,
-                radius=16,
-                filled=True,
-                padding_y=0,
-                group=True,
-            )
-        ]
-    }
-
-
-screens = [
-    Screen(
-        top=bar.Bar(
-            [
-                widget.Sep(
-                    linewidth=0,
-                    padding=10,
-                    background=MANTLE,
-                    **create_rect_decoration(),
-                ),
-                widget.TextBox(
-                    "󰣇",
-                    mouse_callbacks={"Button1": open_rofi()},
-                    foreground=ROSEWATER,
-                    fontsize=24,
-                    margin=0,
-                    **create_rect_decoration(),
-                ),
-                *create_group_boxes(),
-                widget.StatusNotifier(
-                    icon_theme="Catppuccin-SE",
-                    highlight_colour=ACCENT,
-                    menu_background=BACKGROUND,
-                    menu_border=MANTLE,
-                    menu_border_width=1,
-                    menu_font=FONT,
-                    menu_foreground=FOREGROUND_LIGHT,
-                    menu_foreground_disabled=GRAY,
-                    menu_foreground_highlighted=FOREGROUND_DARK,
-                    padding=8,
-                    **create_rect_decoration(),
-                ),
-                *create_separator(),
-                *create_spacer(),
-                *create_separator(),
-                widget.Sep(
-                    linewidth=0,
-                    padding=10,
-                    **create_rect_decoration(),
-                ),
-                widget.WidgetBox(
-                    text_closed="",
-                    text_open="",
-                    close_button_location="right",
-                    foreground=FLAMINGO,
-                    **create_rect_decoration(),
-                    widgets=[
-                        widget.WiFiIcon(
-                            active_colour=FLAMINGO,
-                            disconnected_colour=FLAMINGO,
-                            inactive_colour=FLAMINGO,
-                            padding_y=8,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Net(
-                            format="{down:.0f}{down_suffix} ↓↑ {up:.0f}{up_suffix}",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.CPU(
-                            format=" {load_percent}%",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Memory(
-                            format=" {MemPercent}%",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.DF(
-                            foreground=FLAMINGO,
-                            warn_color=RED,
-                            visible_on_warn=False,
-                            format="{uf}{m}, {r:.0f}%",
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "󰖙",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                        widget.OpenWeather(
-                            location="Kraków",
-                            format=" {temp}°C",
-                            foreground=FLAMINGO,
-                            **create_rect_decoration(),
-                        ),
-                    ],
-                ),
-                widget.WidgetBox(
-                    foreground=ROSEWATER,
-                    text_closed="",
-                    text_open="",
-                    close_button_location="right",
-                    **create_rect_decoration(),
-                    widgets=[
-                        widget.TextBox(
-                            "󰕾",
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Volume(
-                            fmt="{}",
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "󰌌",
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.KeyboardLayout(
-                            configured_keyboards=["us", "pl"],
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.CurrentLayoutIcon(
-                            use_mask=True,
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                            scale=0.5,
-                        ),
-                        widget.CurrentLayout(
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.TextBox(
-                            "",
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                        widget.Backlight(
-                            backlight_name="intel_backlight",
-                            scroll=True,
-                            foreground=ROSEWATER,
-                            change_command="light -S {0}",
-                            **create_rect_decoration(),
-                        ),
-                        widget.Sep(
-                            linewidth=0,
-                            foreground=ROSEWATER,
-                            **create_rect_decoration(),
-                        ),
-                    ],
-                ),
-                widget.TextBox(
-                    "󰃭",
-                    foreground=MAUVE,
-                    **create_rect_decoration(),
-                ),
-                widget.Clock(
-                    format="%Y-%m-%d",
-                    foreground=MAUVE,
-                    **create_rect_decoration(),
-                ),
-                widget.AnalogueClock(
-                    face_shape="circle",
-                    face_background=GREEN,
-                    face_border_colour=GREEN,
-                    face_border_width=0,
-                    hour_colour=BACKGROUND,
-                    hour_size=1,
-                    minute_colour=BACKGROUND,
-                    minute_size=1,
-                    minute_length=0.95,
-                    margin=10,
-                    adjust_y=-2,
-                    **create_rect_decoration(),
-                ),
-                widget.Clock(
-                    format="%H:%M",
-                    foreground=GREEN,
-                    **create_rect_decoration(),
-                ),
-                widget.UPowerWidget(
-                    border_colour=YELLOW,
-                    border_charge_colour=YELLOW,
-                    border_critical_colour=RED,
-                    fill_low=PEACH,
-                    fill_normal=YELLOW,
-                    fill_critical=RED,
-                    fill_charge=FLAMINGO,
-                    **create_rect_decoration(),
-                ),
-                widget.Battery(
-                    format="{char} {percent:2.0%}",
-                    notify_below=10.0,
-                    charge_char="󰶣",
-                    discharge_char="󰶡",
-                    empty_char="󰚌",
-                    full_char="󱐋",
-                    foreground=YELLOW,
-                    **create_rect_decoration(),
-                ),
-                widget.TextBox(
-                    "󰐥",
-                    foreground=RED,
-                    **create_rect_decoration(),
-                    margin=3,
-                ),
-                widget.QuickExit(
-                    default_text="Exit",
-                    countdown_format="{} s",
-                    foreground=RED,
-                    **create_rect_decoration(),
-                ),
-                widget.Sep(
-                    linewidth=0,
-                    padding=10,
-                    background=MANTLE,
-                    **create_rect_decoration(),
-                ),
-            ],
-            34,
-            background=BACKGROUND,
-            opacity=0.9,
-            margin=[
-                0,  # GAP_SIZE * 2,
-                0,  # GAP_SIZE * 2,
-                GAP_SIZE,
-                0,  # GAP_SIZE * 2,
-            ],
-            border_color=GRAY,
-            border_width=0,  # BORDER_SIZE,
+GROUP_BOX_SPECS = create_group_boxes()
+SPACER_SPECS = create_spacer()
+SEPARATOR_SPECS = create_separator()
+
+BAR_SIZE = 34
+BAR_CONFIG = dict(
+    background=BACKGROUND,
+    opacity=0.9,
+    margin=[
+        0,  # GAP_SIZE * 2,
+        0,  # GAP_SIZE * 2,
+        GAP_SIZE,
+        0,  # GAP_SIZE * 2,
+    ],
+    border_color=GRAY,
+    border_width=0,  # BORDER_SIZE,
+)
+
+ROFI_BUTTON = spec(
+    "TextBox",
+    "󰣇",
+    mouse_callbacks={"Button1": open_rofi()},
+    foreground=ROSEWATER,
+    fontsize=24,
+    margin=0,
+    **create_rect_decoration(),
+)
+ANALOGUE_CLOCK = spec(
+    AnalogueClock,
+    clock=clock,
+    face_shape="circle",
+    face_background=GREEN,
+    face_border_colour=GREEN,
+    face_border_width=0,
+    hour_colour=BACKGROUND,
+    hour_size=1,
+    minute_colour=BACKGROUND,
+    minute_size=1,
+    minute_length=0.95,
+    margin=10,
+    adjust_y=-2,
+    **create_rect_decoration(),
+)
+CLOCK = spec(
+    ClockText,
+    clock=clock,
+    format="%H:%M",
+    foreground=GREEN,
+    **create_rect_decoration(),
+)
+UPOWER = spec(
+    BatteryGauge,
+    monitor=power,
+    border_colour=YELLOW,
+    border_charge_colour=YELLOW,
+    border_critical_colour=RED,
+    fill_low=PEACH,
+    fill_normal=YELLOW,
+    fill_critical=RED,
+    fill_charge=FLAMINGO,
+    **create_rect_decoration(),
+)
+BATTERY = spec(
+    BatteryText,
+    monitor=power,
+    format="{char} {percent:2.0%}",
+    charge_char="󰶣",
+    discharge_char="󰶡",
+    empty_char="󰚌",
+    full_char="󱐋",
+    foreground=YELLOW,
+    **create_rect_decoration(),
+)
+OSD = spec(
+    OsdBar,
+    osd=osd,
+    foreground=ROSEWATER,
+    track_colour=GRAY,
+)
+EDGE = spec(
+    "Sep",
+    linewidth=0,
+    padding=10,
+    **create_rect_decoration(),
+)
+
+PRIMARY_BAR = bar_spec(
+    [
+        EDGE.with_config(background=MANTLE),
+        ROFI_BUTTON,
+        *GROUP_BOX_SPECS,
+        spec(
+            "StatusNotifier",
+            icon_theme="Catppuccin-SE",
+            highlight_colour=ACCENT,
+            menu_background=BACKGROUND,
+            menu_border=MANTLE,
+            menu_border_width=1,
+            menu_font=FONT,
+            menu_foreground=FOREGROUND_LIGHT,
+            menu_foreground_disabled=GRAY,
+            menu_foreground_highlighted=FOREGROUND_DARK,
+            padding=8,
+            **create_rect_decoration(),
         ),
-        wallpaper=WALLPAPER,
-        wallpaper_mode="stretch",
-        left=bar.Gap(size=GAP_SIZE),
-        right=bar.Gap(size=GAP_SIZE),
-        bottom=bar.Gap(size=GAP_SIZE),
-    ),
-    Screen(
-        top=bar.Bar(
-            [
-                widget.Sep(
-                    linewidth=0,
-                    padding=10,
-                    **create_rect_decoration(),
-                ),
-                widget.TextBox(
-                    "󰣇",
-                    mouse_callbacks={"Button1": open_rofi()},
-                    foreground=ROSEWATER,
-                    fontsize=24,
-                    margin=0,
-                    **create_rect_decoration(),
-                ),
-                *create_group_boxes(),
-                *create_spacer(),
-                widget.TextBox(" "),
-                widget.AnalogueClock(
-                    face_shape="circle",
-                    face_background=GREEN,
-                    face_border_colour=GREEN,
-                    face_border_width=0,
-                    hour_colour=BACKGROUND,
-                    hour_size=1,
-                    minute_colour=BACKGROUND,
-                    minute_size=1,
-                    minute_length=0.95,
-                    margin=12,
-                    adjust_y=-2,
-                    **create_rect_decoration(),
-                ),
-                widget.Clock(
-                    format="%H:%M",
-                    foreground=GREEN,
-                    **create_rect_decoration(),
-                ),
-                widget.UPowerWidget(
-                    border_colour=YELLOW,
-                    border_charge_colour=YELLOW,
-                    border_critical_colour=RED,
-                    fill_low=PEACH,
-                    fill_normal=YELLOW,
-                    fill_critical=RED,
-                    fill_charge=FLAMINGO,
-                    **create_rect_decoration(),
-                ),
-                widget.Battery(
-                    format="{char} {percent:2.0%}",
-                    notify_below=10.0,
-                    charge_char="󰶣",
-                    discharge_char="󰶡",
-                    empty_char="󰚌",
-                    full_char="󱐋",
-                    foreground=YELLOW,
-                    **create_rect_decoration(),
-                ),
-                widget.TextBox(
-                    "󰍹  Off",
-                    foreground=RED,
-                    mouse_callbacks={"Button1": turn_off_laptop_screen},
-                    **create_rect_decoration(),
-                ),
-                widget.Sep(
-                    linewidth=0,
-                    padding=10,
-                    **create_rect_decoration(),
-                ),
-            ],
-            34,
-            background=BACKGROUND,
-            opacity=0.9,
-            margin=[
-                0,  # GAP_SIZE * 2,
-                0,  # GAP_SIZE * 2,
-                GAP_SIZE,
-                0,  # GAP_SIZE * 2,
-            ],
-            border_color=GRAY,
-            border_width=0,  # BORDER_SIZE,
+        *SEPARATOR_SPECS,
+        *SPACER_SPECS,
+        *SEPARATOR_SPECS,
+        EDGE,
+        spec(
+            WatchedWidgetBox,
+            text_closed="",
+            text_open="",
+            close_button_location="right",
+            foreground=FLAMINGO,
+            observers=[visibility.watch_box("system")],
+            **create_rect_decoration(),
+            widgets=deferred(
+                [
+                    spec(
+                        "WiFiIcon",
+                        active_colour=FLAMINGO,
+                        disconnected_colour=FLAMINGO,
+                        inactive_colour=FLAMINGO,
+                        padding_y=8,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        NetText,
+                        sampler=sampler,
+                        format="{down:.0f}{down_suffix} ↓↑ {up:.0f}{up_suffix}",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        CpuText,
+                        sampler=sampler,
+                        format=" {load_percent}%",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        MemoryText,
+                        sampler=sampler,
+                        format=" {MemPercent}%",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        DiskText,
+                        sampler=sampler,
+                        foreground=FLAMINGO,
+                        warn_color=RED,
+                        format="{uf}{m}, {r:.0f}%",
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "󰖙",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        WeatherText,
+                        weather=weather,
+                        format=" {temp}°C",
+                        foreground=FLAMINGO,
+                        **create_rect_decoration(),
+                    ),
+                ]
+            ),
+        ),
+        spec(
+            WatchedWidgetBox,
+            foreground=ROSEWATER,
+            text_closed="",
+            text_open="",
+            close_button_location="right",
+            observers=[visibility.watch_box("controls")],
+            **create_rect_decoration(),
+            widgets=deferred(
+                [
+                    spec(
+                        "TextBox",
+                        "󰕾",
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Volume",
+                        fmt="{}",
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "󰌌",
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "KeyboardLayout",
+                        configured_keyboards=["us", "pl"],
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "CurrentLayoutIcon",
+                        use_mask=True,
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                        scale=0.5,
+                    ),
+                    spec(
+                        "CurrentLayout",
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "TextBox",
+                        "",
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Backlight",
+                        backlight_name=BACKLIGHT_NAME,
+                        scroll=True,
+                        foreground=ROSEWATER,
+                        change_command="light -S {0}",
+                        **create_rect_decoration(),
+                    ),
+                    spec(
+                        "Sep",
+                        linewidth=0,
+                        foreground=ROSEWATER,
+                        **create_rect_decoration(),
+                    ),
+                ]
+            ),
+        ),
+        OSD,
+        spec(
+            "TextBox",
+            "󰃭",
+            foreground=MAUVE,
+            **create_rect_decoration(),
+        ),
+        spec(
+            ClockText,
+            clock=clock,
+            format="%Y-%m-%d",
+            foreground=MAUVE,
+            **create_rect_decoration(),
+        ),
+        ANALOGUE_CLOCK,
+        CLOCK,
+        UPOWER,
+        BATTERY,
+        spec(
+            "TextBox",
+            "󰐥",
+            foreground=RED,
+            **create_rect_decoration(),
+            margin=3,
+        ),
+        spec(
+            "QuickExit",
+            default_text="Exit",
+            countdown_format="{} s",
+            foreground=RED,
+            **create_rect_decoration(),
+        ),
+        EDGE.with_config(background=MANTLE),
+        # no width, exposes the instrumentation commands
+        spec(
+            InstrumentationCommands,
+            instrumentation=instrument,
+            coalescers={"brightness": brightness_keys, "volume": volume_keys},
+        ),
+    ],
+    BAR_SIZE,
+    kind=BatchedBar,
+    **BAR_CONFIG,
+)
+
+SECONDARY_BAR = bar_spec(
+    [
+        EDGE,
+        ROFI_BUTTON,
+        *GROUP_BOX_SPECS,
+        *SPACER_SPECS,
+        spec("TextBox", " "),
+        OSD,
+        ANALOGUE_CLOCK.with_config(margin=12),
+        CLOCK,
+        UPOWER,
+        BATTERY,
+        spec(
+            "TextBox",
+            "󰍹  Off",
+            foreground=RED,
+            mouse_callbacks={"Button1": turn_off_laptop_screen},
+            **create_rect_decoration(),
         ),
-        wallpaper=WALLPAPER,
-        wallpaper_mode="stretch",
+        EDGE,
+    ],
+    BAR_SIZE,
+    kind=BatchedBar,
+    **BAR_CONFIG,
+)
+
+
+def create_screen(top) -> Screen:
+    """Returns a screen with its own widgets materialised from the bar spec"""
+    return Screen(
+        top=top.build(),
         left=bar.Gap(size=GAP_SIZE),
         right=bar.Gap(size=GAP_SIZE),
         bottom=bar.Gap(size=GAP_SIZE),
-    ),
-]
+    )
+
+
+screens = [create_screen(PRIMARY_BAR), create_screen(SECONDARY_BAR)]
+
+visibility.add_widgets(
+    "locked", lambda: [w for screen in screens for w in screen.top.widgets]
+)
+for i, screen in enumerate(screens):
+    visibility.add_widgets(f"screen:{i}", lambda bar=screen.top: bar.widgets)
+
+# the wallpaper is stretched once per output size instead of on every paint
+wallpapers = WallpaperCache(WALLPAPER, os.path.join(CACHE_DIR, "wallpaper"))
+
+
+@hook.subscribe.startup_complete
+@hook.subscribe.screens_reconfigured
+@instrument.timed
+def paint_wallpapers():
+    executor.submit(
+        "wallpaper", wallpapers.paint(qtile.screens, executor.run_blocking)
+    )
+
+
+@hook.subscribe.screens_reconfigured
+@instrument.timed
+def suspend_disabled_screens():
+    """Suspends the bars of config screens without an enabled output"""
+    for i, screen in enumerate(screens):
+        visibility.set(f"screen:{i}", screen not in qtile.screens)
+    visibility.refresh()
+
 
 # Drag floating layouts.
 mouse = [
@@ -1000,7 +1214,8 @@ floating_layout = layout.Floating(
 )
 auto_fullscreen = True
 focus_on_window_activation = "smart"
-reconfigure_screens = True
+# screen changes are debounced and handled by the OutputManager
+reconfigure_screens = False
 
 # If things like steam games want to auto-minimize themselves when losing
 # focus, should we respect this or not?
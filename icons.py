@@ -0,0 +1,110 @@
+"""Notification icons resolved once from the icon theme"""
+import os
+import shutil
+import subprocess
+
+from libqtile.log_utils import logger
+
+LEVELS = 101  # levels are percentages, 0 to 100
+
+
+class IconTheme:
+    """Resolves icons of one size and context of a theme, once per name
+
+    Missing icons fall back to a standard icon name the notification daemon
+    looks up itself. With a `raster_dir`, SVG icons are converted once to
+    PNGs of the theme size there (with rsvg-convert, when installed), so the
+    daemon is handed a ready bitmap instead of parsing the SVG every time.
+    Resolving only checks for an up-to-date PNG; the SVGs without one are
+    handed out until `rasterise_pending` has converted them.
+    """
+
+    def __init__(self, root, size=48, context="status", raster_dir=None):
+        self.directory = os.path.join(root, f"{size}x{size}", context)
+        self.size = size
+        self.raster_dir = raster_dir
+        self._icons = {}
+        self._tables = []
+        self._pending = set()
+        if raster_dir is not None and shutil.which("rsvg-convert") is None:
+            logger.info("rsvg-convert not found, notification icons stay SVGs")
+            self.raster_dir = None
+
+    def icon(self, name, fallback="") -> str:
+        """Returns the path of the icon file `name`, or `fallback`"""
+        if name not in self._icons:
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(path):
+                logger.warning(f"Icon {path} not found, using '{fallback}'")
+                path = fallback
+            elif self.raster_dir is not None and path.endswith(".svg"):
+                png = self.png(path)
+                if fresh(png, path):
+                    path = png
+                else:
+                    self._pending.add(name)
+            self._icons[name] = path
+        return self._icons[name]
+
+    def levels(self, buckets, fallback="") -> list[str]:
+        """Returns a table of icon paths indexed by level
+
+        `buckets` are (highest level, icon name) pairs in increasing order.
+        """
+        table = []
+        for level in range(LEVELS):
+            name = next(name for bound, name in buckets if level <= bound)
+            table.append(self.icon(name, fallback))
+        # updated in place once its icons are rasterised
+        self._tables.append(table)
+        return table
+
+    def png(self, path) -> str:
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.raster_dir, f"{name}-{self.size}.png")
+
+    async def rasterise_pending(self, run_blocking):
+        """Converts the SVGs handed out so far, then hands out their PNGs"""
+        while self._pending:
+            name = self._pending.pop()
+            svg = self._icons[name]
+            png = await run_blocking(self.rasterise, svg)
+            if png == svg:
+                continue
+            self._icons[name] = png
+            for table in self._tables:
+                for level, path in enumerate(table):
+                    if path == svg:
+                        table[level] = png
+
+    def rasterise(self, path) -> str:
+        png = self.png(path)
+        if fresh(png, path):
+            return png
+
+        try:
+            os.makedirs(self.raster_dir, exist_ok=True)
+            size = str(self.size)
+            subprocess.run(
+                ["rsvg-convert", "-w", size, "-h", size, "-o", png, path],
+                check=True,
+                capture_output=True,
+                timeout=5,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Failed to rasterise {path}, using the SVG: {e}")
+            return path
+        return png
+
+
+def fresh(png, svg) -> bool:
+    """Whether a PNG exists and is newer than the SVG it was made from"""
+    try:
+        return os.path.getmtime(png) >= os.path.getmtime(svg)
+    except OSError:
+        return False
+
+
+def lookup(table, level) -> str:
+    """Looks up a level table, clamping `level` to 0-100"""
+    return table[min(max(round(level), 0), LEVELS - 1)]
@@ -0,0 +1,202 @@
+"""Latency instrumentation for the config's lazy functions and hooks"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import subprocess
+import time
+import types
+from bisect import bisect_left
+from collections import defaultdict
+
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+# upper bounds of the histogram buckets, in milliseconds
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
+
+# the spawn counters of the timed calls in progress, innermost last
+_counters = contextvars.ContextVar("instrument_counters", default=())
+
+
+def _counted(spawn):
+    @functools.wraps(spawn)
+    def wrapper(*args, **kwargs):
+        result = spawn(*args, **kwargs)
+        for counter in _counters.get():
+            counter[0] += 1
+        return result
+
+    wrapper.counts_spawns = True
+    return wrapper
+
+
+def count_spawns():
+    """Counts the children spawned from now on towards the timed calls
+
+    Wraps `subprocess.Popen`, which asyncio's subprocesses go through too,
+    and the `os` spawn functions qtile's own spawn uses. Counting at the
+    source catches children that are reaped before the call returns, which
+    a look at /proc afterwards misses.
+    """
+    if getattr(subprocess.Popen.__init__, "counts_spawns", False):
+        return
+    subprocess.Popen.__init__ = _counted(subprocess.Popen.__init__)
+    for name in ("fork", "posix_spawn", "posix_spawnp"):
+        if hasattr(os, name):
+            setattr(os, name, _counted(getattr(os, name)))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect_left(BUCKETS, ms)] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def as_dict(self) -> dict:
+        return {
+            "buckets": {
+                f"<={bound}ms": count
+                for bound, count in zip(BUCKETS, self.counts)
+                if count
+            },
+            "mean_ms": round(self.total / max(sum(self.counts), 1), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class Stats:
+    def __init__(self):
+        self.calls = 0
+        self.children = 0
+        self.wall = Histogram()
+        self.blocking = Histogram()
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "children": self.children,
+            "wall": self.wall.as_dict(),
+            "blocking": self.blocking.as_dict(),
+        }
+
+
+class Instrumentation:
+    """Times wrapped callables while enabled
+
+    For each call it records the wall time, the time spent blocking the
+    event loop (the whole call for plain functions, the sum of the steps
+    between awaits for coroutines) and how many child processes it spawned.
+    While disabled a wrapped call costs one attribute check.
+    """
+
+    def __init__(self, enabled=False, log_interval=None):
+        self.enabled = enabled
+        if enabled:
+            count_spawns()
+        self.log_interval = log_interval
+        self.stats = defaultdict(Stats)
+        self._task = None
+
+    def timed(self, func=None, name=None):
+        """Wraps `func`, usable as a decorator with or without a name"""
+        if func is None:
+            return functools.partial(self.timed, name=name)
+        name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                return await self._drive(name, func(*args, **kwargs))
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                spawned = [0]
+                token = _counters.set((*_counters.get(), spawned))
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    _counters.reset(token)
+                    self.record(name, elapsed, elapsed, spawned[0])
+
+        return wrapper
+
+    @types.coroutine
+    def _drive(self, name, coro):
+        """Runs a coroutine step by step, timing the steps"""
+        spawned = [0]
+        blocking = 0.0
+        start = time.perf_counter()
+        value = error = None
+        try:
+            while True:
+                step = time.perf_counter()
+                token = _counters.set((*_counters.get(), spawned))
+                try:
+                    if error is None:
+                        future = coro.send(value)
+                    else:
+                        future = coro.throw(error)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    blocking += time.perf_counter() - step
+                    _counters.reset(token)
+                try:
+                    value, error = (yield future), None
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            self.record(name, time.perf_counter() - start, blocking, spawned[0])
+
+    def record(self, name, wall, blocking, children):
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.children += children
+        stats.wall.add(wall)
+        stats.blocking.add(blocking)
+
+    def report(self) -> dict:
+        return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            count_spawns()
+        if enabled and self.log_interval and self._task is None:
+            self._task = create_task(self._log())
+        elif not enabled and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stop(self):
+        """Stops the periodic log dump, the enabled state is kept"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self):
+        self.stats.clear()
+
+    async def _log(self):
+        while True:
+            await asyncio.sleep(self.log_interval)
+            for name, stats in self.report().items():
+                logger.info(f"Instrumentation {name}: {stats}")
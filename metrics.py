@@ -0,0 +1,111 @@
+"""One system metrics sampler shared by the Net, CPU, Memory and DF widgets"""
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from libqtile.log_utils import logger
+
+from providers import Provider
+
+
+@dataclass(frozen=True)
+class Sample:
+    time: float
+    cpu_percent: float
+    mem_percent: float
+    net_down: float  # bytes per second
+    net_up: float
+    disk_size: int  # bytes
+    disk_free: int  # bytes available to the user
+
+
+class SystemSampler(Provider):
+    """Reads /proc and statfs in a single tick and publishes the result
+
+    The config deactivates it while the WidgetBox holding the metric widgets
+    is closed. The last `history` samples are kept in a ring buffer.
+    """
+
+    def __init__(self, interval=2, history=60, proc="/proc", mount="/"):
+        Provider.__init__(self)
+        self.interval = interval
+        self.history = deque(maxlen=history)
+        self.proc = proc
+        self.mount = mount
+        self._cpu = None
+        self._net = None
+
+    async def run(self):
+        while True:
+            try:
+                self.publish(self.sample())
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to sample system metrics: {e}")
+            await asyncio.sleep(self.interval)
+
+    def sample(self) -> Sample:
+        """Reads every source once and returns the new sample"""
+        now = time.monotonic()
+        self.reads += 1
+
+        busy, total = self._read_cpu()
+        if self._cpu is None or total == self._cpu[1]:
+            cpu_percent = 0.0
+        else:
+            cpu_percent = (busy - self._cpu[0]) / (total - self._cpu[1]) * 100
+        self._cpu = busy, total
+
+        rx, tx = self._read_net()
+        if self._net is None:
+            down = up = 0.0
+        else:
+            elapsed = max(now - self._net[0], 1e-6)
+            down = (rx - self._net[1]) / elapsed
+            up = (tx - self._net[2]) / elapsed
+        self._net = now, rx, tx
+
+        statfs = os.statvfs(self.mount)
+        sample = Sample(
+            time=now,
+            cpu_percent=cpu_percent,
+            mem_percent=self._read_memory(),
+            net_down=down,
+            net_up=up,
+            disk_size=statfs.f_blocks * statfs.f_frsize,
+            disk_free=statfs.f_bavail * statfs.f_frsize,
+        )
+        self.history.append(sample)
+        return sample
+
+    def _read_cpu(self) -> tuple[int, int]:
+        with open(os.path.join(self.proc, "stat")) as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + fields[4]  # idle + iowait
+        total = sum(fields[:8])  # guest time is already counted in user
+        return total - idle, total
+
+    def _read_memory(self) -> float:
+        values = {}
+        with open(os.path.join(self.proc, "meminfo")) as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                if key in ("MemTotal", "MemAvailable"):
+                    values[key] = int(value.split()[0])
+                    if len(values) == 2:
+                        break
+        total = values["MemTotal"]
+        return (total - values["MemAvailable"]) / total * 100
+
+    def _read_net(self) -> tuple[int, int]:
+        rx = tx = 0
+        with open(os.path.join(self.proc, "net", "dev")) as f:
+            for line in f.readlines()[2:]:
+                name, data = line.split(":", 1)
+                if name.strip() == "lo":
+                    continue
+                fields = data.split()
+                rx += int(fields[0])
+                tx += int(fields[8])
+        return rx, tx
@@ -0,0 +1,103 @@
+"""Desktop notifications over a single session bus connection"""
+import asyncio
+
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+BUS_NAME = "org.freedesktop.Notifications"
+OBJECT_PATH = "/org/freedesktop/Notifications"
+
+URGENCY_LOW = 0
+URGENCY_NORMAL = 1
+URGENCY_CRITICAL = 2
+
+
+class Notifier:
+    """Sends org.freedesktop.Notifications.Notify without spawning processes
+
+    Notifications sent with the same `tag` replace each other in place, so an
+    OSD-like notification is updated rather than closed and re-created.
+    """
+
+    def __init__(self, app_name="qtile", bus_address=None):
+        self.app_name = app_name
+        self.bus_address = bus_address
+        self._bus = None
+        self._connecting = asyncio.Lock()
+        self._ids = {}
+
+    async def _connect(self):
+        # dbus_next is imported with the first notification, not at startup
+        from dbus_next.aio import MessageBus
+
+        # notifications sent before the first connection is up wait for it
+        # rather than each opening their own
+        async with self._connecting:
+            if self._bus is None or not self._bus.connected:
+                self._bus = await MessageBus(bus_address=self.bus_address).connect()
+        return self._bus
+
+    async def notify(
+        self,
+        summary,
+        body="",
+        icon="",
+        tag=None,
+        value=None,
+        urgency=None,
+        timeout=-1,
+    ) -> int:
+        """Sends a notification and returns its id"""
+        from dbus_next import Message, MessageType, Variant
+
+        hints = {}
+        if value is not None:
+            hints["value"] = Variant("i", value)
+        if urgency is not None:
+            hints["urgency"] = Variant("y", urgency)
+        if tag is not None:
+            hints["x-dunst-stack-tag"] = Variant("s", tag)
+
+        bus = await self._connect()
+        reply = await bus.call(
+            Message(
+                destination=BUS_NAME,
+                path=OBJECT_PATH,
+                interface=BUS_NAME,
+                member="Notify",
+                signature="susssasa{sv}i",
+                body=[
+                    self.app_name,
+                    self._ids.get(tag, 0),
+                    icon,
+                    summary,
+                    body,
+                    [],
+                    hints,
+                    timeout,
+                ],
+            )
+        )
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{reply.error_name}: {reply.body}")
+
+        notification_id = reply.body[0]
+        if tag is not None:
+            self._ids[tag] = notification_id
+        return notification_id
+
+    def send(self, *args, **kwargs):
+        """Fire-and-forget variant of `notify` for synchronous callers"""
+
+        async def _send():
+            try:
+                await self.notify(*args, **kwargs)
+            except Exception:
+                logger.exception("Failed to send notification")
+
+        return create_task(_send())
+
+    def disconnect(self):
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
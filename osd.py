@@ -0,0 +1,66 @@
+"""On-screen display of volume and brightness levels inside the bar"""
+from dataclasses import dataclass
+
+from libqtile.utils import rgb
+
+
+@dataclass(frozen=True)
+class OsdUpdate:
+    icon: str  # glyph drawn before the level bar
+    level: int | None  # 0-100, None draws an empty bar (e.g. muted)
+    kind: str  # "volume", "brightness"...
+
+
+class Osd:
+    """Fans level updates out to the OSD widgets of every bar"""
+
+    def __init__(self):
+        self.updates = 0
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def show(self, icon, level, kind) -> bool:
+        """Shows a level, returns False when no widget can display it"""
+        self.updates += 1
+        update = OsdUpdate(icon, level, kind)
+        for callback in self._callbacks:
+            callback(update)
+        return bool(self._callbacks)
+
+
+def draw(ctx, width, height, update, colours, font, fontsize, padding=6):
+    """Draws an icon and a level bar filling `width` x `height`
+
+    `colours` holds the background, foreground (icon and fill) and track
+    colours.
+    """
+    background, foreground, track = colours
+    ctx.set_source_rgba(*rgb(background))
+    ctx.rectangle(0, 0, width, height)
+    ctx.fill()
+
+    ctx.select_font_face(font)
+    ctx.set_font_size(fontsize)
+    ascent, descent = ctx.font_extents()[:2]
+    advance = ctx.text_extents(update.icon)[4]
+    ctx.set_source_rgba(*rgb(foreground))
+    ctx.move_to(padding, (height + ascent - descent) / 2)
+    ctx.show_text(update.icon)
+
+    left = padding * 2 + advance
+    length = max(width - left - padding, 0)
+    thickness = max(height // 6, 2)
+    top = (height - thickness) / 2
+    ctx.set_source_rgba(*rgb(track))
+    ctx.rectangle(left, top, length, thickness)
+    ctx.fill()
+    if update.level:
+        ctx.set_source_rgba(*rgb(foreground))
+        ctx.rectangle(left, top, length * min(update.level, 100) / 100, thickness)
+        ctx.fill()
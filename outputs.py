@@ -0,0 +1,158 @@
+"""Monitor profiles applied in one xrandr call, with debounced hotplug"""
+import asyncio
+from dataclasses import dataclass
+
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+
+@dataclass(frozen=True)
+class Output:
+    name: str
+    primary: bool = False
+    right_of: str | None = None
+    off: bool = False
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    outputs: tuple[Output, ...]
+
+    def command(self) -> tuple[str, ...]:
+        """Returns the single xrandr call setting up every output at once"""
+        cmd = ["xrandr"]
+        for output in self.outputs:
+            cmd += ["--output", output.name]
+            if output.off:
+                cmd.append("--off")
+                continue
+            cmd.append("--auto")
+            if output.primary:
+                cmd.append("--primary")
+            if output.right_of:
+                cmd += ["--right-of", output.right_of]
+        return tuple(cmd)
+
+    @property
+    def required(self) -> set[str]:
+        return {output.name for output in self.outputs if not output.off}
+
+
+def connected_outputs(query) -> set[str]:
+    """Parses the connected output names out of `xrandr --query`"""
+    return {
+        line.split()[0]
+        for line in query.splitlines()
+        if not line.startswith((" ", "\t")) and " connected" in line
+    }
+
+
+class OutputManager:
+    """Applies monitor profiles and turns hotplug bursts into one reconfigure
+
+    Every screen change event restarts a `debounce` timer. When it fires, the
+    profile is chosen again if the set of connected outputs changed (the
+    first profile whose outputs are all connected wins), and the screens are
+    reconfigured only if the output geometry actually changed, so the bars
+    are kept otherwise. A profile applied by hand is kept until the
+    connected outputs change.
+    """
+
+    def __init__(self, profiles, run, screen_info, reconfigure, debounce=0.5):
+        self.profiles = {profile.name: profile for profile in profiles}
+        self.run = run
+        self.screen_info = screen_info
+        self.reconfigure = reconfigure
+        self.debounce = debounce
+        self.profile = None
+        self.events = 0
+        self.applied = 0
+        self.reconfigured = 0
+        self._connected = None
+        self._geometry = None
+        self._timer = None
+        self._task = None
+        self._pending = False
+
+    def start(self, profile=None):
+        """Records the current geometry and the profile applied at startup"""
+        self.profile = profile
+        self._geometry = tuple(self.screen_info())
+
+    def take_over(self, previous):
+        """Carries on from the manager a config reload replaces
+
+        The profile, connected outputs and geometry are kept, so the screen
+        change fired after a reload neither re-applies a profile over one
+        applied by hand nor rebuilds the bars. A settle the previous manager
+        had pending is cancelled, that screen change settles again.
+        """
+        if previous._timer is not None:
+            previous._timer.cancel()
+            previous._timer = None
+        if previous._task is not None:
+            previous._task.cancel()
+        if previous.profile in self.profiles:
+            self.profile = previous.profile
+        self._connected = previous._connected
+        self._geometry = previous._geometry
+
+    async def apply(self, name):
+        """Applies a profile in a single xrandr call"""
+        profile = self.profiles[name]
+        returncode, _ = await self.run(*profile.command())
+        if returncode:
+            raise RuntimeError(f"xrandr failed to apply the {name} profile")
+        self.profile = name
+        self.applied += 1
+        logger.info(f"Applied the {name} output profile")
+
+    def choose(self, connected) -> str:
+        for profile in self.profiles.values():
+            if profile.required <= connected:
+                return profile.name
+        return next(iter(self.profiles))
+
+    def hotplug(self, *_):
+        """Screen change hook, (re)starts the debounce timer"""
+        self.events += 1
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(
+            self.debounce, self._start_settle
+        )
+
+    def _start_settle(self):
+        self._timer = None
+        if self._task is not None and not self._task.done():
+            # settle again once the current run ends to catch its changes
+            self._pending = True
+            return
+        self._task = create_task(self._guard())
+
+    async def _guard(self):
+        while True:
+            try:
+                await self.settle()
+            except Exception:
+                logger.exception("Failed to settle the outputs")
+            if not self._pending:
+                break
+            self._pending = False
+
+    async def settle(self):
+        """Applies the profile matching the outputs and reconfigures if needed"""
+        _, query = await self.run("xrandr", "--query")
+        connected = connected_outputs(query)
+        if connected != self._connected:
+            self._connected = connected
+            name = self.choose(connected)
+            if name != self.profile:
+                await self.apply(name)
+
+        geometry = tuple(self.screen_info())
+        if geometry != self._geometry:
+            self._geometry = geometry
+            self.reconfigured += 1
+            self.reconfigure()
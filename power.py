@@ -0,0 +1,200 @@
+"""Battery monitoring shared by the bar and the low battery policy"""
+import asyncio
+import os
+from dataclasses import dataclass
+
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+from notifications import URGENCY_CRITICAL
+from providers import Provider
+
+SYSFS_POWER_SUPPLY = "/sys/class/power_supply"
+
+UPOWER = "org.freedesktop.UPower"
+UPOWER_DEVICE = "org.freedesktop.UPower.Device"
+DISPLAY_DEVICE = "/org/freedesktop/UPower/devices/DisplayDevice"
+
+# UPower device states that mean external power is connected
+UPOWER_CHARGING = 1
+UPOWER_FULL = 4
+UPOWER_PENDING_CHARGE = 5
+
+# (capacity above, seconds between reads) for the sysfs fallback
+POLL_INTERVALS = ((50, 120), (20, 60), (10, 30), (0, 10))
+
+
+@dataclass(frozen=True)
+class BatteryState:
+    percent: float
+    charging: bool
+    full: bool = False
+
+
+class PowerMonitor(Provider):
+    """Publishes battery state from UPower signals or adaptive sysfs polling
+
+    UPower change signals are used when the service is reachable; otherwise
+    the battery capacity is read from sysfs at an interval that shrinks as
+    the battery drains.
+    """
+
+    def __init__(
+        self, battery="BAT0", root=SYSFS_POWER_SUPPLY, bus_address=None, upower=True
+    ):
+        Provider.__init__(self)
+        self.path = os.path.join(root, battery)
+        self.bus_address = bus_address
+        self.upower = upower
+        self._values = {}
+        self._bus = None
+
+    def stop(self):
+        Provider.stop(self)
+        self.value = None
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+
+    async def run(self):
+        if self.upower:
+            try:
+                await self._watch_upower()
+                return
+            except Exception as e:
+                logger.warning(f"UPower unavailable, polling {self.path}: {e}")
+        await self._poll()
+
+    async def _watch_upower(self):
+        from dbus_next import BusType
+        from dbus_next.aio import MessageBus
+
+        if self.bus_address:
+            bus = MessageBus(bus_address=self.bus_address)
+        else:
+            bus = MessageBus(bus_type=BusType.SYSTEM)
+        self._bus = await bus.connect()
+
+        introspection = await self._bus.introspect(UPOWER, DISPLAY_DEVICE)
+        device = self._bus.get_proxy_object(UPOWER, DISPLAY_DEVICE, introspection)
+        properties = device.get_interface("org.freedesktop.DBus.Properties")
+        properties.on_properties_changed(self._on_properties_changed)
+
+        values = await properties.call_get_all(UPOWER_DEVICE)
+        self.reads += 1
+        self._values = {key: variant.value for key, variant in values.items()}
+        self.publish(self._upower_state())
+
+    def _on_properties_changed(self, interface, changed, invalidated):
+        if interface != UPOWER_DEVICE:
+            return
+        self._values.update({key: variant.value for key, variant in changed.items()})
+        self.publish(self._upower_state())
+
+    def _upower_state(self) -> BatteryState:
+        state = self._values.get("State", 0)
+        return BatteryState(
+            percent=self._values.get("Percentage", 0.0),
+            charging=state in (UPOWER_CHARGING, UPOWER_FULL, UPOWER_PENDING_CHARGE),
+            full=state == UPOWER_FULL,
+        )
+
+    def read_sysfs(self) -> BatteryState:
+        self.reads += 1
+        with open(os.path.join(self.path, "capacity")) as f:
+            percent = float(f.read())
+        with open(os.path.join(self.path, "status")) as f:
+            status = f.read().strip()
+        return BatteryState(
+            percent=percent,
+            charging=status in ("Charging", "Full", "Not charging"),
+            full=status == "Full",
+        )
+
+    async def _poll(self):
+        while True:
+            try:
+                state = self.read_sysfs()
+            except (OSError, ValueError) as e:
+                logger.error(f"Can't read battery state from {self.path}: {e}")
+                return
+            self.publish(state)
+            await asyncio.sleep(poll_interval(state.percent))
+
+
+def poll_interval(percent) -> int:
+    for above, interval in POLL_INTERVALS:
+        if percent > above:
+            return interval
+    return POLL_INTERVALS[-1][1]
+
+
+class LowBatteryPolicy:
+    """Warns on low battery and shuts the session down when it is critical
+
+    The shutdown starts with a countdown of notifications and is aborted if
+    a charger is connected before it ends. `shutdown` is a coroutine function
+    performing the actual session shutdown.
+    """
+
+    def __init__(
+        self, notifier, shutdown, warn_below=10, critical_below=5, countdown=5
+    ):
+        self.notifier = notifier
+        self.shutdown = shutdown
+        self.warn_below = warn_below
+        self.critical_below = critical_below
+        self.countdown = countdown
+        self._warned = False
+        self._task = None
+
+    def attach(self, monitor):
+        """Subscribes to a monitor, keeping it running while no bar shows it
+
+        Locking the screen or hiding the battery widgets pauses their
+        subscriptions, the policy has to go on getting readings meanwhile.
+        """
+        monitor.subscribe(self)
+        return self
+
+    def __call__(self, state):
+        if state.charging:
+            self._warned = False
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+            return
+
+        if state.percent < self.critical_below:
+            if self._task is None:
+                self._task = create_task(self._shutdown())
+                self._task.add_done_callback(self._finished)
+        elif state.percent < self.warn_below and not self._warned:
+            self._warned = True
+            self.notifier.send(
+                "Battery low", f"{state.percent:.0f}% remaining", tag="battery"
+            )
+
+    def _finished(self, task):
+        # a later critical reading starts over if the shutdown failed
+        if self._task is task:
+            self._task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Low battery shutdown failed", exc_info=task.exception())
+
+    async def _shutdown(self):
+        await self.notifier.notify(
+            "Battery level critical.",
+            "Battery level reached critical level. Shutting down PC.",
+            urgency=URGENCY_CRITICAL,
+        )
+        for i in range(self.countdown, 0, -1):
+            await self.notifier.notify(
+                "Shutdown",
+                f"Shutting down PC in {i}.",
+                tag="shutdown",
+                urgency=URGENCY_CRITICAL,
+            )
+            await asyncio.sleep(1)
+
+        await self.shutdown()
@@ -0,0 +1,120 @@
+"""Data sources shared by every widget that displays them"""
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+
+class Provider:
+    """A data source fanning out each new value to its subscribers
+
+    The source runs while it is active and has at least one non-passive
+    subscriber, so its lifetime follows the widgets bound to it. However many
+    bars display the data, it is only read once per update; only the drawing
+    happens per widget. Subclasses implement `run` and call `publish`.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.active = True
+        self.reads = 0
+        self._callbacks = []
+        self._task = None
+
+    def subscribe(self, callback, passive=False):
+        """Adds a subscriber, passive ones don't keep the source running"""
+        self._callbacks.append((callback, passive))
+        if self.value is not None:
+            callback(self.value)
+        self._update_task()
+
+    def unsubscribe(self, callback):
+        self._callbacks = [s for s in self._callbacks if s[0] != callback]
+        self._update_task()
+
+    def set_active(self, active):
+        self.active = active
+        self._update_task()
+
+    def _update_task(self):
+        wanted = self.active and not all(passive for _, passive in self._callbacks)
+        if wanted and self._task is None:
+            self._task = create_task(self.run())
+        elif not wanted and self._task is not None:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run(self):
+        raise NotImplementedError
+
+    def publish(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        for callback, _ in list(self._callbacks):
+            try:
+                callback(value)
+            except Exception:
+                logger.exception(f"{type(self).__name__} subscriber failed")
+
+
+class Subscriber:
+    """Widget fed by shared sources, which can stop listening while hidden
+
+    Visibility pauses the sources of a hidden widget, so they don't update
+    and redraw it, and stop running if nothing visible needs them. When
+    resumed, subscribing again passes the widget the latest value.
+    """
+
+    _subscriptions = ()
+    _paused = False
+
+    def subscribe_to(self, source, callback, **kwargs):
+        self._subscriptions = [*self._subscriptions, (source, callback, kwargs)]
+        if not self._paused:
+            source.subscribe(callback, **kwargs)
+
+    def pause_sources(self):
+        if not self._paused:
+            self._paused = True
+            for source, callback, _ in self._subscriptions:
+                source.unsubscribe(callback)
+
+    def resume_sources(self):
+        if self._paused:
+            self._paused = False
+            for source, callback, kwargs in self._subscriptions:
+                source.subscribe(callback, **kwargs)
+
+    def unsubscribe_all(self):
+        if not self._paused:
+            for source, callback, _ in self._subscriptions:
+                source.unsubscribe(callback)
+        self._subscriptions = ()
+        self._paused = False
+
+
+class Registry:
+    """Hands out a single provider instance per name"""
+
+    def __init__(self):
+        self._factories = {}
+        self._providers = {}
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def get(self, name) -> Provider:
+        if name not in self._providers:
+            self._providers[name] = self._factories[name]()
+        return self._providers[name]
+
+    def stop(self):
+        for provider in self._providers.values():
+            provider.stop()
+
+    def reads(self) -> dict:
+        """Returns how many times each created provider read its source"""
+        return {name: provider.reads for name, provider in self._providers.items()}
@@ -0,0 +1,462 @@
+"""Incremental config reload applying only what changed in config.py
+
+The edited config is executed as a fresh module next to the running one and
+its globals and hooks are compared structurally with the running ones.
+Changed key bindings are regrabbed and changed bar widgets are rebuilt in
+place; any other change (a setting, a constant, a function, a hook, the shape
+of the bars or a helper module) falls back to qtile's full reload.
+"""
+import dataclasses
+import functools
+import importlib.util
+import inspect
+import os
+import re
+import sys
+import time
+import types
+
+from libqtile import hook
+from libqtile.config import Screen
+from libqtile.configurable import Configurable
+from libqtile.log_utils import logger
+
+from bar_spec import BarSpec, Deferred, FrozenDict, FrozenList, WidgetSpec
+
+# objects from these modules are plain values described by their attributes
+VALUE_MODULES = ("libqtile.config", "libqtile.lazy", "libqtile.command.graph")
+PRIMITIVES = (str, int, float, bool, bytes, type(None))
+# globals compared by diff_keys and diff_bar instead of as a whole
+DIFFED_APART = ("keys", "screens")
+SCREEN_SETTINGS = ("wallpaper", "wallpaper_mode")
+POSITIONS = ("top", "bottom", "left", "right")
+
+
+class FullReload(Exception):
+    """A change that needs qtile's full reload"""
+
+
+def _global_names(code) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def describe(value, _seen=frozenset()):
+    """Returns a comparable summary of a config value
+
+    Functions are compared by their code, closures and the constants they
+    read, configurables by the options they were given, and stateful objects
+    such as providers only by their type, so an object created anew by the
+    edited config matches the running one.
+    """
+    if isinstance(value, PRIMITIVES):
+        return value
+    if isinstance(value, type):
+        return "type", value.__module__, value.__qualname__
+    if id(value) in _seen:
+        return ("cycle",)
+    seen = _seen | {id(value)}
+
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(describe(v, seen) for v in value)
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return "dict", tuple((repr(k), describe(v, seen)) for k, v in items)
+    if isinstance(value, (set, frozenset)):
+        return "set", tuple(sorted((describe(v, seen) for v in value), key=repr))
+    if dataclasses.is_dataclass(value):
+        fields = dataclasses.fields(value)
+        return describe(type(value)), tuple(
+            describe(getattr(value, f.name), seen) for f in fields
+        )
+    if isinstance(value, functools.partial):
+        return "partial", *(
+            describe(part, seen) for part in (value.func, value.args, value.keywords)
+        )
+    if isinstance(value, types.MethodType):
+        return "method", value.__func__.__qualname__, describe(value.__self__, seen)
+    if isinstance(value, types.FunctionType):
+        cells = []
+        for cell in value.__closure__ or ():
+            try:
+                cells.append(cell.cell_contents)
+            except ValueError:  # not assigned yet
+                cells.append(None)
+        # co_names holds attribute names too, not only globals
+        constants = {
+            name: value.__globals__[name]
+            for name in _global_names(value.__code__)
+            if name in value.__globals__
+            and isinstance(value.__globals__[name], PRIMITIVES)
+        }
+        return (
+            "function",
+            value.__qualname__,
+            describe(value.__code__, seen),
+            describe(cells, seen),
+            describe(constants, seen),
+        )
+    if isinstance(value, types.CodeType):
+        # line numbers are left out, editing other lines shifts them
+        return "code", value.co_code, value.co_names, describe(value.co_consts, seen)
+    if isinstance(value, re.Pattern):
+        return "re", value.pattern, value.flags
+    if isinstance(value, Configurable):
+        return describe(type(value)), describe(value._user_config, seen)
+    if type(value).__module__ in VALUE_MODULES:
+        return describe(type(value)), describe(vars(value), seen)
+    return describe(type(value))
+
+
+def adopt(new, old):
+    """Returns `new` with the parts matching `old` swapped for the old objects
+
+    Rebuilt widgets then keep using the running providers, OSD and callbacks
+    instead of the idle copies the edited config created.
+    """
+    if describe(new) == describe(old):
+        return old
+    if isinstance(new, WidgetSpec) and isinstance(old, WidgetSpec):
+        config = dict(old.config)
+        return dataclasses.replace(
+            new,
+            args=adopt(new.args, old.args),
+            config=FrozenDict(
+                (k, adopt(v, config[k]) if k in config else v) for k, v in new.config
+            ),
+        )
+    if (
+        type(new) in (tuple, FrozenList, FrozenDict, Deferred)
+        and type(new) is type(old)
+        and len(new) == len(old)
+    ):
+        return type(new)(adopt(n, o) for n, o in zip(new, old))
+    return new
+
+
+def stateful(value) -> bool:
+    """Whether a value is only compared by its type, like providers"""
+    if isinstance(value, (type, types.ModuleType)):
+        return False
+    return describe(value) == describe(type(value))
+
+
+def dispose(value):
+    """Stops whatever an unused object of a loaded config started"""
+    for name in ("shutdown", "stop", "close", "disconnect"):
+        method = getattr(value, name, None)
+        if callable(method):
+            method()
+            return
+
+
+def subscriptions() -> dict:
+    """Returns a copy of the hook subscriptions by registry and event
+
+    A deep copy would copy the widgets and other instances behind subscribed
+    bound methods.
+    """
+    return {
+        registry: {event: list(funcs) for event, funcs in events.items()}
+        for registry, events in hook.subscriptions.items()
+    }
+
+
+def load_config(path, running=None) -> types.ModuleType:
+    """Executes a config file as a new module without keeping its hooks
+
+    The hooks it subscribed are kept in its `__hooks__` for `config_hooks`.
+    Stateful objects of the new module (executors, providers, the OSD) are
+    swapped for those of the same type in the `running` config module, so
+    its functions act on the running ones, and the new copies are disposed
+    of.
+    """
+    saved = subscriptions()
+    spec = importlib.util.spec_from_file_location("config", path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+        added = {}
+        for registry, events in hook.subscriptions.items():
+            for event, funcs in events.items():
+                before = saved.get(registry, {}).get(event, ())
+                new = [func for func in funcs if func not in before]
+                if new:
+                    added.setdefault(registry, {})[event] = new
+        module.__hooks__ = added
+    finally:
+        hook.subscriptions.clear()
+        hook.subscriptions.update(saved)
+
+    if running is not None:
+        for name, value in list(vars(module).items()):
+            if name.startswith("_"):
+                continue
+            old = getattr(running, name, None)
+            if value is not old and type(value) is type(old) and stateful(value):
+                setattr(module, name, old)
+                dispose(value)
+    return module
+
+
+def config_hooks(module) -> dict:
+    """Returns the hook functions a config module subscribed
+
+    For a module qtile loaded these are the subscriptions made from the
+    module: its functions, and wrappers of them or of methods of its globals.
+    """
+    if hasattr(module, "__hooks__"):
+        return module.__hooks__
+    namespace = vars(module)
+    objects = {id(value) for value in namespace.values()}
+
+    def subscribed_by_module(func):
+        func = inspect.unwrap(func)
+        if isinstance(func, types.MethodType):
+            return id(func.__self__) in objects
+        return getattr(func, "__globals__", None) is namespace
+
+    found = {}
+    for registry, events in hook.subscriptions.items():
+        for event, funcs in events.items():
+            funcs = [func for func in funcs if subscribed_by_module(func)]
+            if funcs:
+                found.setdefault(registry, {})[event] = funcs
+    return found
+
+
+def changed_modules(config_path, since) -> list[str]:
+    """Returns the helper modules next to the config edited after `since`"""
+    config_path = os.path.realpath(config_path)
+    directory = os.path.dirname(config_path)
+    changed = []
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        path = os.path.realpath(path)
+        if path == config_path or os.path.dirname(path) != directory:
+            continue
+        try:
+            if os.stat(path).st_mtime > since:
+                changed.append(name)
+        except OSError:
+            pass
+    return changed
+
+
+def key_id(key) -> tuple:
+    return frozenset(key.modifiers), key.key
+
+
+@dataclasses.dataclass
+class Changes:
+    keys: list  # the new keys list, unchanged bindings keep the old objects
+    ungrab: list
+    grab: list
+    # (bar, position in bar.widgets, index in the bar spec, new widget spec)
+    widgets: list
+
+
+def diff_keys(old_keys, new_keys) -> tuple[list, list, list]:
+    old = {key_id(key): key for key in old_keys}
+    keys, ungrab, grab = [], [], []
+    for key in new_keys:
+        previous = old.pop(key_id(key), None)
+        if previous is not None and describe(previous) == describe(key):
+            keys.append(previous)
+            continue
+        if previous is not None:
+            ungrab.append(previous)
+        grab.append(key)
+        keys.append(key)
+    ungrab.extend(old.values())
+    return keys, ungrab, grab
+
+
+def diff_bar(old, new) -> list:
+    """Returns the widgets to rebuild in the running bar `old`"""
+    old_spec = getattr(old, "spec", None)
+    new_spec = getattr(new, "spec", None)
+    if old_spec is None or new_spec is None:
+        sizes = getattr(old, "size", None), getattr(new, "size", None)
+        if type(old) is not type(new) or sizes[0] != sizes[1]:
+            raise FullReload("a bar without a spec changed")
+        return []
+    if len(old_spec.widgets) != len(new_spec.widgets) or describe(
+        dataclasses.replace(old_spec, widgets=())
+    ) != describe(dataclasses.replace(new_spec, widgets=())):
+        raise FullReload("the layout of a bar changed")
+
+    # open widget boxes insert their widgets, so positions are looked up, in
+    # order as a spec used several times is shared by its widgets
+    positions = {}
+    for i, w in enumerate(old.widgets):
+        positions.setdefault(id(getattr(w, "spec", None)), []).append(i)
+    changed = []
+    for index, (before, after) in enumerate(zip(old_spec.widgets, new_spec.widgets)):
+        position = (positions.get(id(before)) or [None]).pop(0)
+        if describe(before) == describe(after):
+            continue
+        if position is None or getattr(old.widgets[position], "box_is_open", False):
+            raise FullReload(f"{before.name} can't be replaced in place")
+        changed.append((old, position, index, adopt(after, before)))
+    return changed
+
+
+def diffed_apart(value) -> bool:
+    """Whether a global is only part of the bars, compared by diff_bar"""
+    if isinstance(value, (WidgetSpec, BarSpec, Screen)):
+        return True
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) > 0
+        and all(diffed_apart(v) for v in value)
+    )
+
+
+def diff_globals(old, new):
+    """Raises FullReload if a global other than the keys and bars changed
+
+    Constants read when the config is executed (steps, intervals, profiles,
+    thresholds) end up in objects that are kept running, so they are
+    compared too, and a change needs the full reload that creates them anew.
+    """
+    old_vars, new_vars = vars(old), vars(new)
+    for name in sorted(old_vars.keys() | new_vars.keys()):
+        if name.startswith("_") or name in DIFFED_APART:
+            continue
+        if name not in old_vars or name not in new_vars:
+            raise FullReload(f"{name} was added or removed")
+        before, after = old_vars[name], new_vars[name]
+        if isinstance(before, types.ModuleType) or (
+            diffed_apart(before) and diffed_apart(after)
+        ):
+            continue
+        if describe(before) != describe(after):
+            raise FullReload(f"{name} changed")
+
+
+def diff_hooks(old, new):
+    """Raises FullReload if a hook function was added, removed or edited"""
+    before, after = config_hooks(old), config_hooks(new)
+    for registry in before.keys() | after.keys():
+        old_events, new_events = before.get(registry, {}), after.get(registry, {})
+        for event in old_events.keys() | new_events.keys():
+            old_funcs = [describe(f) for f in old_events.get(event, ())]
+            new_funcs = [describe(f) for f in new_events.get(event, ())]
+            if old_funcs != new_funcs:
+                raise FullReload(f"the {event} hooks changed")
+
+
+def diff(old, new) -> Changes:
+    """Compares a loaded config module with a new one
+
+    Raises FullReload if anything but the keys and bar widgets changed.
+    """
+    diff_globals(old, new)
+    diff_hooks(old, new)
+
+    if len(old.screens) != len(new.screens):
+        raise FullReload("the number of screens changed")
+    widgets = []
+    for old_screen, new_screen in zip(old.screens, new.screens):
+        for name in SCREEN_SETTINGS:
+            if getattr(old_screen, name, None) != getattr(new_screen, name, None):
+                raise FullReload(f"screen {name} changed")
+        for position in POSITIONS:
+            old_bar = getattr(old_screen, position, None)
+            new_bar = getattr(new_screen, position, None)
+            if (old_bar is None) != (new_bar is None):
+                raise FullReload(f"a {position} bar was added or removed")
+            if old_bar is not None:
+                widgets.extend(diff_bar(old_bar, new_bar))
+
+    return Changes(*diff_keys(old.keys, new.keys), widgets)
+
+
+def replace_widget(qtile, bar, position, spec):
+    old = bar.widgets[position]
+    new = spec.build()
+    for name, widget in list(qtile.widgets_map.items()):
+        if widget is old:
+            del qtile.widgets_map[name]
+    old.finalize()
+    bar.widgets[position] = new
+    if bar._configure_widget(new):
+        qtile.register_widget(new)
+
+
+def apply(qtile, changes):
+    for key in changes.ungrab:
+        qtile.ungrab_key(key)
+    for key in changes.grab:
+        qtile.grab_key(key)
+    qtile.config.keys = changes.keys
+
+    bars = {}
+    for bar, position, index, spec in changes.widgets:
+        replace_widget(qtile, bar, position, spec)
+        bars.setdefault(bar, []).append((index, spec))
+    for bar, specs in bars.items():
+        widgets = list(bar.spec.widgets)
+        for index, spec in specs:
+            widgets[index] = spec
+        bar.spec = dataclasses.replace(bar.spec, widgets=tuple(widgets))
+        # the bar keeps its window, only the new widgets are laid out and drawn
+        bar.draw()
+
+
+def running_module(path) -> types.ModuleType:
+    """Returns the config module qtile imported, its settings are only copied"""
+    module = sys.modules.get(os.path.splitext(os.path.basename(path))[0])
+    file = getattr(module, "__file__", None)
+    if file is None or os.path.realpath(file) != os.path.realpath(path):
+        raise FullReload("the running config module wasn't found")
+    return module
+
+
+class IncrementalReload:
+    """Reloads the config applying only changed keys and widgets
+
+    Falls back to qtile's full reload for anything else, or if applying the
+    changes fails.
+    """
+
+    def __init__(self):
+        self.loaded = time.time()
+        self.incremental = 0
+        self.full = 0
+
+    def __call__(self, qtile):
+        start = time.perf_counter()
+        path = qtile.config.file_path
+        try:
+            changed = changed_modules(path, self.loaded)
+            if changed:
+                raise FullReload(f"helper modules changed: {', '.join(changed)}")
+            running = running_module(path)
+            changes = diff(running, load_config(path, running))
+            apply(qtile, changes)
+            # the next reload compares with the keys grabbed now
+            running.keys = changes.keys
+        except FullReload as e:
+            logger.info(f"Full reload: {e}")
+            self.full += 1
+            qtile.reload_config()
+            return
+        except Exception:
+            logger.exception("Incremental reload failed, doing a full reload")
+            self.full += 1
+            qtile.reload_config()
+            return
+
+        self.incremental += 1
+        logger.info(
+            f"Incremental reload in {(time.perf_counter() - start) * 1e3:.1f} ms: "
+            f"{len(changes.ungrab)} keys ungrabbed, {len(changes.grab)} grabbed, "
+            f"{len(changes.widgets)} widgets rebuilt"
+        )
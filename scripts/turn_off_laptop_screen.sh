@@ -1,3 +0,0 @@
-#!/bin/bash
-
-xrandr --output eDP-1 --off
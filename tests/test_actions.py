@@ -0,0 +1,78 @@
+"""Key presses coalesced into rate-limited changes"""
+import asyncio
+from collections import Counter
+
+from actions import Coalescer
+
+WINDOW = 0.02
+
+
+def test_first_press_applies_immediately():
+    async def run():
+        applied = []
+        keys = Coalescer(applied.append, WINDOW)
+        keys.push(1)
+        assert applied == [1]
+        await asyncio.sleep(WINDOW * 2)
+        assert applied == [1]
+
+    asyncio.run(run())
+
+
+def test_presses_within_window_are_merged():
+    async def run():
+        applied = []
+        keys = Coalescer(applied.append, WINDOW)
+        for delta in (1, 1, 1, -1, 1):
+            keys.push(delta)
+        assert applied == [1]
+        await asyncio.sleep(WINDOW * 1.5)
+        assert applied == [1, 2]
+        # the window after a merged change is idle, the next press is at once
+        await asyncio.sleep(WINDOW * 1.5)
+        keys.push(-1)
+        assert applied == [1, 2, -1]
+        return keys
+
+    keys = asyncio.run(run())
+    assert keys.counters == Counter(presses=6, changes=3)
+
+
+def test_held_key_applies_once_per_window():
+    async def run():
+        applied = []
+        keys = Coalescer(applied.append, WINDOW)
+        for _ in range(20):
+            keys.push(1)
+            await asyncio.sleep(WINDOW / 5)
+        await asyncio.sleep(WINDOW * 2)
+        return applied
+
+    applied = asyncio.run(run())
+    assert sum(applied) == 20
+    assert len(applied) < 10
+
+
+def test_shared_counters_and_report():
+    async def run():
+        counters = Counter()
+        volume = Coalescer(lambda delta: None, WINDOW, counters=counters)
+        mute = Coalescer(lambda presses: None, WINDOW, counters=counters)
+        for _ in range(3):
+            volume.push(1)
+        mute.push()
+        volume.notified()
+        mute.notified()
+        await asyncio.sleep(WINDOW * 1.5)
+        volume.notified()
+        return volume
+
+    volume = asyncio.run(run())
+    assert volume.counters == Counter(presses=4, changes=3, notifications=3)
+    assert volume.report() == "4 presses, 3 changes, 3 notifications (25% merged)"
+
+
+def test_report_without_presses():
+    assert Coalescer(print).report() == (
+        "0 presses, 0 changes, 0 notifications (0% merged)"
+    )
@@ -0,0 +1,94 @@
+"""Autostart supervisor running real short-lived commands"""
+import asyncio
+import sys
+
+from autostart import ALWAYS, ON_FAILURE, Job, Supervisor, process_uptime
+
+
+def run(jobs, until):
+    async def main():
+        supervisor = Supervisor(jobs)
+        supervisor.start()
+        await asyncio.wait_for(asyncio.gather(*supervisor._tasks), until)
+        supervisor.stop()
+        return supervisor
+
+    return asyncio.run(main())
+
+
+def python(code):
+    return sys.executable, "-c", code
+
+
+def test_dependent_job_waits():
+    supervisor = run(
+        [
+            Job("slow", python("import time; time.sleep(0.2)")),
+            Job("fast", python("pass")),
+            Job("after", python("pass"), after=("slow",)),
+        ],
+        until=5,
+    )
+    timings = supervisor.timings
+    assert {t.status for t in timings.values()} == {"done"}
+    assert timings["fast"].finished < timings["slow"].finished
+    assert timings["after"].started >= timings["slow"].finished
+
+
+def test_failed_dependency_skips():
+    supervisor = run(
+        [
+            Job("fails", python("raise SystemExit(3)")),
+            Job("after", ("true",), after=("fails",)),
+        ],
+        until=5,
+    )
+    assert supervisor.timings["fails"].status == "exited 3"
+    assert supervisor.timings["after"].status == "skipped"
+
+
+def test_restarts_up_to_limit():
+    supervisor = run(
+        [
+            Job(
+                "crashes",
+                python("raise SystemExit(1)"),
+                daemon=True,
+                restart=ON_FAILURE,
+                restart_delay=0,
+                max_restarts=3,
+            ),
+        ],
+        until=5,
+    )
+    assert supervisor.timings["crashes"].restarts == 3
+
+
+def test_missing_command_is_not_retried():
+    supervisor = run(
+        [
+            Job(
+                "missing",
+                ("/nonexistent/daemon",),
+                daemon=True,
+                restart=ALWAYS,
+                restart_delay=0,
+            ),
+            Job("after", ("true",), after=("missing",)),
+        ],
+        until=5,
+    )
+    assert supervisor.timings["missing"].status == "failed to start"
+    assert supervisor.timings["missing"].restarts == 0
+    assert supervisor.timings["after"].status == "skipped"
+
+
+def test_one_shot_timeout():
+    supervisor = run(
+        [Job("hangs", python("import time; time.sleep(10)"), timeout=0.1)], until=5
+    )
+    assert supervisor.timings["hangs"].status == "exited None"
+
+
+def test_process_uptime():
+    assert 0 < process_uptime() < 3600
@@ -0,0 +1,65 @@
+"""Backlight against a fake sysfs tree"""
+import pytest
+
+from backlight import Backlight
+
+MAXIMUM = 937
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    path = tmp_path / "intel_backlight"
+    path.mkdir()
+    (path / "max_brightness").write_text(f"{MAXIMUM}\n")
+    (path / "brightness").write_text(f"{MAXIMUM // 2}\n")
+    return tmp_path
+
+
+@pytest.fixture
+def backlight(sysfs):
+    backlight = Backlight("intel_backlight", root=str(sysfs))
+    yield backlight
+    backlight.close()
+
+
+def brightness(sysfs) -> int:
+    return int((sysfs / "intel_backlight" / "brightness").read_text())
+
+
+def test_step_writes_and_returns_percent(sysfs, backlight):
+    assert backlight.step_size == 93
+    assert backlight.step(1) == (468 + 93) * 100 // MAXIMUM
+    assert brightness(sysfs) == 468 + 93
+    assert backlight.step(-2) == (468 - 93) * 100 // MAXIMUM
+    assert brightness(sysfs) == 468 - 93
+
+
+def test_step_clamps(sysfs, backlight):
+    assert backlight.step(100) == 100
+    assert brightness(sysfs) == MAXIMUM
+    assert backlight.step(-100) == 0
+    assert brightness(sysfs) == backlight.minimum
+
+
+def test_shorter_value_leaves_no_trailing_digits(sysfs, backlight):
+    backlight.write(MAXIMUM)
+    backlight.write(5)
+    assert (sysfs / "intel_backlight" / "brightness").read_text() == "5\n"
+    assert backlight.read() == 5
+
+
+def test_reads_max_brightness_once(sysfs, backlight):
+    backlight.step(1)
+    (sysfs / "intel_backlight" / "max_brightness").write_text("10\n")
+    backlight.step(1)
+    assert backlight.max_brightness == MAXIMUM
+
+
+def test_keeps_one_file_open(backlight):
+    backlight.step(1)
+    fd = backlight._fd
+    backlight.step(1)
+    assert backlight._fd == fd
+    backlight.close()
+    assert backlight._fd is None
+
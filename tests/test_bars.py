@@ -0,0 +1,100 @@
+"""Batched bars painting the same pixels as plain ones, offscreen"""
+import asyncio
+import dataclasses
+import os
+import sys
+
+import pytest
+
+try:
+    import cairocffi  # noqa: F401
+except (ImportError, OSError):
+    pytest.skip("bars draw with cairo", allow_module_level=True)
+
+from libqtile import bar
+
+import config
+from bars import BatchedBar
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from headless import configure  # noqa: E402
+
+SCREEN = 1920, 1080
+
+
+def visible(top):
+    return [w for w in top.widgets if w.length]
+
+
+def frame(top) -> bytes:
+    top.window.surface.flush()
+    return bytes(top.window.surface.get_data())
+
+
+async def build(kind):
+    screen = config.create_screen(dataclasses.replace(config.PRIMARY_BAR, kind=kind))
+    qtile = configure(screen, *SCREEN)
+    # providers started by the widgets are stopped before they run
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+    top = screen.top
+    top.draw()
+    qtile.run_pending("_actual_draw")
+    qtile.run_pending("_flush")
+    return qtile, top
+
+
+def test_batched_pixels_match_plain_bar():
+    async def run():
+        bars = [await build(kind) for kind in (bar.Bar, BatchedBar)]
+        frames = [[frame(top)] for _, top in bars]
+        for (qtile, top), painted in zip(bars, frames):
+            # adjacent widgets in one iteration, then a single widget
+            for widget in visible(top)[-3:]:
+                widget.draw()
+            qtile.run_pending("_flush")
+            painted.append(frame(top))
+            visible(top)[-1].draw()
+            qtile.run_pending("_flush")
+            painted.append(frame(top))
+        return frames
+
+    plain, batched = asyncio.run(run())
+    assert len(plain) == len(batched) == 3
+    for expected, got in zip(plain, batched):
+        assert got == expected
+
+
+def test_backgrounds_are_drawn_once_per_span_position():
+    async def run():
+        qtile, top = await build(BatchedBar)
+        backgrounds = []
+        # the cache is set up on a widget's first draw, filled on the second
+        for _ in range(3):
+            for widget in visible(top):
+                widget.draw()
+            qtile.run_pending("_flush")
+            backgrounds.append(dict(top._backgrounds))
+        return backgrounds[1:]
+
+    before, after = asyncio.run(run())
+    assert before
+    assert all(after[widget][1] is surface for widget, (_, surface) in before.items())
+
+
+def test_mirrored_drawers_paint_themselves():
+    async def run():
+        qtile, top = await build(BatchedBar)
+        first, second = visible(top)[-2:]
+        second.drawer.has_mirrors = True
+        last_surface = second.drawer.last_surface
+        paints, window_paints = top.paints, top.window.paints
+        first.draw()
+        second.draw()
+        qtile.run_pending("_flush")
+        assert second.drawer.last_surface is not last_surface
+        assert (top.paints - paints, top.window.paints - window_paints) == (1, 2)
+
+    asyncio.run(run())
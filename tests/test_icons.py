@@ -0,0 +1,157 @@
+"""Icon tables: bucket boundaries and deferred rasterisation"""
+import asyncio
+import os
+import stat
+
+import pytest
+
+from icons import LEVELS, IconTheme, lookup
+
+VOLUME = [
+    (0, "notification-audio-volume-off.svg"),
+    (33, "notification-audio-volume-low.svg"),
+    (66, "notification-audio-volume-medium.svg"),
+    (100, "notification-audio-volume-high.svg"),
+]
+BRIGHTNESS = [
+    (0, "notification-display-brightness-off.svg"),
+    (33, "notification-display-brightness-low.svg"),
+    (66, "notification-display-brightness-medium.svg"),
+    (99, "notification-display-brightness-high.svg"),
+    (100, "notification-display-brightness-full.svg"),
+]
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="48" height="48"/>'
+# stands in for rsvg-convert: writes the -o file, or fails for "broken" icons
+CONVERTER = """#!/bin/sh
+while [ "$1" != -o ]; do shift; done
+case "$3" in *broken*) exit 1 ;; esac
+echo png >"$2"
+"""
+
+
+def old_volume_icon(root, volume):
+    if volume == 0:
+        icon = "notification-audio-volume-off.svg"
+    elif volume <= 33:
+        icon = "notification-audio-volume-low.svg"
+    elif volume <= 66:
+        icon = "notification-audio-volume-medium.svg"
+    else:
+        icon = "notification-audio-volume-high.svg"
+    return os.path.join(root, "48x48", "status", icon)
+
+
+def old_brightness_icon(root, brightness):
+    if brightness == 0:
+        icon = "notification-display-brightness-off.svg"
+    elif brightness <= 33:
+        icon = "notification-display-brightness-low.svg"
+    elif brightness <= 66:
+        icon = "notification-display-brightness-medium.svg"
+    elif brightness <= 99:
+        icon = "notification-display-brightness-high.svg"
+    else:
+        icon = "notification-display-brightness-full.svg"
+    return os.path.join(root, "48x48", "status", icon)
+
+
+def make_theme(root):
+    directory = os.path.join(root, "48x48", "status")
+    os.makedirs(directory)
+    for _, name in VOLUME + BRIGHTNESS:
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(SVG)
+
+
+@pytest.fixture
+def theme(tmp_path):
+    make_theme(str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def converter(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "rsvg-convert"
+    script.write_text(CONVERTER)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+async def run_blocking(func, *args):
+    return await asyncio.to_thread(func, *args)
+
+
+@pytest.mark.parametrize("level", range(LEVELS))
+def test_buckets_match_old_functions(theme, level):
+    icons = IconTheme(theme)
+    volume, brightness = icons.levels(VOLUME), icons.levels(BRIGHTNESS)
+    assert lookup(volume, level) == old_volume_icon(theme, level)
+    assert lookup(brightness, level) == old_brightness_icon(theme, level)
+
+
+@pytest.mark.parametrize(
+    "level, icon",
+    [
+        (-5, "notification-audio-volume-off.svg"),
+        (0.4, "notification-audio-volume-off.svg"),
+        (0.6, "notification-audio-volume-low.svg"),
+        (33, "notification-audio-volume-low.svg"),
+        (33.6, "notification-audio-volume-medium.svg"),
+        (67, "notification-audio-volume-high.svg"),
+        (120, "notification-audio-volume-high.svg"),
+    ],
+)
+def test_lookup_rounds_and_clamps(theme, level, icon):
+    volume = IconTheme(theme).levels(VOLUME)
+    assert os.path.basename(lookup(volume, level)) == icon
+
+
+def test_missing_icons_fall_back(tmp_path):
+    missing = IconTheme(str(tmp_path)).levels(VOLUME, fallback="audio-volume-high")
+    assert set(missing) == {"audio-volume-high"}
+
+
+def test_svgs_until_rasterised(theme, tmp_path, converter):
+    raster_dir = str(tmp_path / "png")
+    icons = IconTheme(theme, raster_dir=raster_dir)
+    volume = icons.levels(VOLUME)
+    # resolving never converts anything
+    assert all(path.endswith(".svg") for path in volume)
+    assert not os.path.exists(raster_dir)
+
+    asyncio.run(icons.rasterise_pending(run_blocking))
+    assert lookup(volume, 50) == os.path.join(
+        raster_dir, "notification-audio-volume-medium-48.png"
+    )
+    assert all(os.path.isfile(path) and path.endswith(".png") for path in volume)
+
+    # a warm cache is used right away
+    again = IconTheme(theme, raster_dir=raster_dir)
+    assert again.levels(VOLUME) == volume
+    assert not again._pending
+
+
+def test_failed_conversion_keeps_svg(theme, tmp_path, converter):
+    directory = os.path.join(theme, "48x48", "status")
+    with open(os.path.join(directory, "broken.svg"), "w") as f:
+        f.write(SVG)
+    icons = IconTheme(theme, raster_dir=str(tmp_path / "png"))
+    path = icons.icon("broken.svg")
+    asyncio.run(icons.rasterise_pending(run_blocking))
+    assert icons.icon("broken.svg") == path == os.path.join(directory, "broken.svg")
+
+
+def test_outdated_png_is_converted_again(theme, tmp_path, converter):
+    raster_dir = str(tmp_path / "png")
+    icons = IconTheme(theme, raster_dir=raster_dir)
+    icons.levels(VOLUME)
+    asyncio.run(icons.rasterise_pending(run_blocking))
+
+    svg = os.path.join(theme, "48x48", "status", VOLUME[0][1])
+    future = os.path.getmtime(svg) + 10
+    os.utime(svg, (future, future))
+    icons = IconTheme(theme, raster_dir=raster_dir)
+    assert icons.levels(VOLUME)[0] == svg
+    assert icons._pending == {VOLUME[0][1]}
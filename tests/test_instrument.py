@@ -0,0 +1,185 @@
+"""Instrumentation and the action executor's timing, driven with a fake qtile"""
+import asyncio
+import os
+import subprocess
+import time
+
+import pytest
+
+from actions import ActionExecutor
+from instrument import BUCKETS, Instrumentation
+
+
+class FakeQtile:
+    """What lazy functions are called with, recording the calls they make"""
+
+    def __init__(self):
+        self.calls = []
+
+    def call_soon(self, func, *args):
+        self.calls.append(func.__name__)
+        return asyncio.get_running_loop().call_soon(func, *args)
+
+
+def test_disabled_records_nothing():
+    instrument = Instrumentation()
+    timed = instrument.timed(lambda qtile: qtile, name="lazy")
+    qtile = FakeQtile()
+    assert timed(qtile) is qtile
+    assert instrument.report() == {}
+
+
+def test_plain_function_blocks_for_its_whole_call():
+    instrument = Instrumentation(enabled=True)
+
+    @instrument.timed
+    def increase_brightness(qtile):
+        time.sleep(0.003)
+
+    for _ in range(3):
+        increase_brightness(FakeQtile())
+    stats = instrument.report()["increase_brightness"]
+    assert stats["calls"] == 3 and stats["children"] == 0
+    assert sum(stats["wall"]["buckets"].values()) == 3
+    assert stats["blocking"]["max_ms"] == stats["wall"]["max_ms"] >= 3
+
+
+def test_children_reaped_within_the_call_are_counted():
+    instrument = Instrumentation(enabled=True)
+
+    @instrument.timed
+    def screenshot(qtile):
+        subprocess.run(["true"], check=True)
+        os.waitpid(os.posix_spawnp("true", ["true"], os.environ), 0)
+
+    @instrument.timed
+    def outer(qtile):
+        screenshot(qtile)
+        subprocess.run(["true"], check=True)
+
+    outer(FakeQtile())
+    subprocess.run(["true"], check=True)  # not timed
+    stats = instrument.report()
+    assert stats["screenshot"]["children"] == 2
+    assert stats["outer"]["children"] == 3
+
+
+def test_coroutine_blocks_only_between_awaits():
+    instrument = Instrumentation(enabled=True)
+
+    @instrument.timed(name="mute_vol")
+    async def mute(qtile):
+        time.sleep(0.002)  # blocks the loop
+        proc = await asyncio.create_subprocess_exec("sleep", "0.05")
+        await proc.wait()
+        qtile.call_soon(painted)
+
+    def painted():
+        pass
+
+    qtile = FakeQtile()
+    asyncio.run(mute(qtile))
+    stats = instrument.report()["mute_vol"]
+    assert stats["calls"] == 1 and stats["children"] == 1
+    assert stats["wall"]["max_ms"] >= 50
+    assert 2 <= stats["blocking"]["max_ms"] < 50
+    assert qtile.calls == ["painted"]
+
+
+def test_exceptions_are_recorded_and_raised():
+    instrument = Instrumentation(enabled=True)
+
+    @instrument.timed
+    async def fails(qtile):
+        await asyncio.sleep(0)
+        raise ValueError("no backlight")
+
+    with pytest.raises(ValueError):
+        asyncio.run(fails(FakeQtile()))
+    assert instrument.report()["fails"]["calls"] == 1
+
+
+def test_histogram_buckets():
+    instrument = Instrumentation(enabled=True)
+    for seconds in (0.0005, 0.001, 0.0011, 0.3, 5):
+        instrument.record("hook", seconds, 0, 0)
+    wall = instrument.report()["hook"]["wall"]
+    assert wall["buckets"] == {"<=1ms": 2, "<=2ms": 1, "<=500ms": 1, "<=infms": 1}
+    assert sum(wall["buckets"].values()) == 5 and BUCKETS[-1] == float("inf")
+    assert wall["max_ms"] == 5000
+    instrument.reset()
+    assert instrument.report() == {}
+
+
+def test_periodic_log_dump(caplog):
+    async def run():
+        instrument = Instrumentation(log_interval=0.01)
+        instrument.set_enabled(True)
+        instrument.timed(lambda qtile: None, name="run_on_startup")(FakeQtile())
+        await asyncio.sleep(0.03)
+        instrument.set_enabled(False)
+        assert instrument._task is None
+
+    with caplog.at_level("INFO", logger="libqtile"):
+        asyncio.run(run())
+    assert "Instrumentation run_on_startup: {'calls': 1" in caplog.text
+
+
+def test_guarded_drops_calls_while_running():
+    async def run():
+        executor = ActionExecutor()
+        runs = []
+
+        async def lock():
+            runs.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+        callback = executor.guarded("lock", lock)
+        qtile = FakeQtile()
+        for _ in range(3):
+            callback(qtile)
+        await executor._tasks["lock"]
+        callback(qtile)
+        await executor._tasks["lock"]
+        executor.shutdown()
+        return runs, executor
+
+    runs, executor = asyncio.run(run())
+    assert len(runs) == 2
+    assert len(executor.durations["lock"]) == 2
+
+
+def test_timed_abandons_and_records_slow_runs(caplog):
+    async def run():
+        executor = ActionExecutor(budget=0.01)
+        executor.guarded("menu", time.sleep, 0.05, timeout=0.01)()
+        executor.guarded("lock", asyncio.sleep, 0.02, budget=1)()
+        await asyncio.gather(*executor._tasks.values())
+        executor.shutdown()
+        return executor
+
+    with caplog.at_level("WARNING", logger="libqtile"):
+        executor = asyncio.run(run())
+    assert "Action menu timed out after 0.01s" in caplog.text
+    assert "Action menu took" in caplog.text
+    assert "Action lock took" not in caplog.text
+    menu, lock = executor.durations["menu"][0], executor.durations["lock"][0]
+    assert 0.01 <= menu < 0.05 and lock >= 0.02
+
+
+def test_report_lists_slowest_first():
+    executor = ActionExecutor(budget=0.1)
+    executor._budgets["lock"] = float("inf")
+    for duration in (0.01, 0.02, 0.03):
+        executor.record("volume", duration)
+    for duration in (0.2, 5):
+        executor.record("lock", duration)
+    executor.record("wifi", 0.15)
+    executor.shutdown()
+    header, *rows = executor.report().splitlines()
+    assert header.split() == ["action", "runs", "median", "max", "over"]
+    assert [row.split() for row in rows] == [
+        ["lock", "2", "2600.0ms", "5000.0ms", "0"],
+        ["wifi", "1", "150.0ms", "150.0ms", "1"],
+        ["volume", "3", "20.0ms", "30.0ms", "0"],
+    ]
@@ -0,0 +1,109 @@
+"""System sampler against fixture /proc files"""
+import asyncio
+import os
+
+import pytest
+
+from metrics import SystemSampler
+
+STAT = "cpu  {0} 0 {0} {1} 10 0 5 0 0 0\ncpu0 1 0 1 1 0 0 0 0 0 0\n"
+MEMINFO = (
+    "MemTotal:       16000000 kB\n"
+    "MemFree:         2000000 kB\n"
+    "MemAvailable:    8000000 kB\n"
+    "Buffers:          100000 kB\n"
+)
+NET_DEV = (
+    "Inter-|   Receive                |  Transmit\n"
+    " face |bytes    packets errs drop|bytes    packets errs drop\n"
+    "    lo: {2} 1 0 0 0 0 0 0 {2} 1 0 0 0 0 0 0\n"
+    "  wlan0: {0} 10 0 0 0 0 0 0 {1} 10 0 0 0 0 0 0\n"
+    "  eth0: {0} 10 0 0 0 0 0 0 {1} 10 0 0 0 0 0 0\n"
+)
+
+
+def write_fixture(root, i):
+    """Writes the i-th tick of a machine 30% busy that moves 10/1.4 kB a tick"""
+    os.makedirs(os.path.join(root, "net"), exist_ok=True)
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write(STAT.format(1000 + i * 15, 5000 + i * 70))
+    with open(os.path.join(root, "meminfo"), "w") as f:
+        f.write(MEMINFO)
+    with open(os.path.join(root, "net", "dev"), "w") as f:
+        f.write(NET_DEV.format(10**6 + i * 5000, 10**5 + i * 700, 100 + i * 10**6))
+
+
+@pytest.fixture
+def proc(tmp_path):
+    write_fixture(tmp_path, 0)
+    return tmp_path
+
+
+def test_first_sample(proc):
+    sampler = SystemSampler(proc=str(proc), mount=str(proc))
+    sample = sampler.sample()
+    assert sample.cpu_percent == 0.0
+    assert (sample.net_down, sample.net_up) == (0.0, 0.0)
+    assert sample.mem_percent == 50.0
+    statfs = os.statvfs(proc)
+    assert sample.disk_size == statfs.f_blocks * statfs.f_frsize
+    assert 0 < sample.disk_free <= sample.disk_size
+
+
+def test_rates_between_samples(proc, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("metrics.time.monotonic", lambda: now[0])
+    sampler = SystemSampler(proc=str(proc), mount=str(proc))
+    sampler.sample()
+    write_fixture(proc, 1)
+    now[0] += 2
+    sample = sampler.sample()
+    # user and system move 15 jiffies each, idle 70
+    assert sample.cpu_percent == pytest.approx(30.0)
+    # two interfaces, loopback left out
+    assert sample.net_down == 2 * 5000 / 2
+    assert sample.net_up == 2 * 700 / 2
+
+
+def test_history_is_a_ring_buffer(proc):
+    sampler = SystemSampler(history=3, proc=str(proc), mount=str(proc))
+    samples = [sampler.sample() for _ in range(5)]
+    assert list(sampler.history) == samples[-3:]
+    assert sampler.reads == 5
+
+
+def test_unreadable_proc_keeps_running(tmp_path):
+    async def main():
+        sampler = SystemSampler(interval=0.01, proc=str(tmp_path), mount=str(tmp_path))
+        sampler.subscribe(lambda sample: None)
+        await asyncio.sleep(0.05)
+        assert sampler._task is not None and not sampler._task.done()
+        sampler.stop()
+
+    asyncio.run(main())
+
+
+def test_no_reads_while_inactive(proc):
+    async def main():
+        sampler = SystemSampler(interval=0.01, proc=str(proc), mount=str(proc))
+        samples = []
+        sampler.subscribe(samples.append)
+        await asyncio.sleep(0.05)
+        assert sampler.reads > 0
+
+        # the box closes
+        sampler.set_active(False)
+        reads = sampler.reads
+        for i in range(1, 20):
+            write_fixture(proc, i)
+            await asyncio.sleep(0.01)
+        assert sampler.reads == reads
+        assert sampler._task is None
+
+        # and opens again
+        sampler.set_active(True)
+        await asyncio.sleep(0.03)
+        assert sampler.reads > reads
+        sampler.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""Notifier against a stand-in notification server on a private bus"""
+import asyncio
+
+from dbus_next.aio import MessageBus
+from dbus_next.service import ServiceInterface, method
+
+from notifications import BUS_NAME, OBJECT_PATH, URGENCY_CRITICAL, Notifier
+
+
+class StandInServer(ServiceInterface):
+    def __init__(self):
+        super().__init__(BUS_NAME)
+        self.last_id = 0
+        self.received = []
+
+    @method()
+    def Notify(
+        self,
+        app_name: "s",  # noqa: F821
+        replaces_id: "u",  # noqa: F821
+        app_icon: "s",  # noqa: F821
+        summary: "s",  # noqa: F821
+        body: "s",  # noqa: F821
+        actions: "as",  # noqa: F821
+        hints: "a{sv}",  # noqa: F821
+        expire_timeout: "i",  # noqa: F821
+    ) -> "u":  # noqa: F821
+        hints = {name: variant.value for name, variant in hints.items()}
+        self.received.append((replaces_id, summary, body, app_icon, hints))
+        if replaces_id:
+            return replaces_id
+        self.last_id += 1
+        return self.last_id
+
+    @method()
+    def GetCapabilities(self) -> "as":  # noqa: F821
+        return ["body", "persistence"]
+
+    @method()
+    def GetServerInformation(self) -> "ssss":  # noqa: F821
+        return ["stand-in", "qtile-config", "1.0", "1.2"]
+
+
+async def serve(address):
+    bus = await MessageBus(bus_address=address).connect()
+    server = StandInServer()
+    bus.export(OBJECT_PATH, server)
+    await bus.request_name(BUS_NAME)
+    return bus, server
+
+
+def run(address, test):
+    async def main():
+        server_bus, server = await serve(address)
+        notifier = Notifier(bus_address=address)
+        try:
+            await test(notifier, server)
+        finally:
+            notifier.disconnect()
+            server_bus.disconnect()
+
+    asyncio.run(main())
+
+
+def test_tagged_notifications_replace_each_other(bus_address):
+    async def test(notifier, server):
+        first = await notifier.notify("Volume", "10%", tag="volume", value=10)
+        second = await notifier.notify("Volume", "15%", tag="volume", value=15)
+        other = await notifier.notify("Brightness", "50%", tag="brightness")
+        assert second == first and other != first
+        assert [r[0] for r in server.received] == [0, first, 0]
+        assert server.received[1][4] == {"value": 15, "x-dunst-stack-tag": "volume"}
+
+    run(bus_address, test)
+
+
+def test_untagged_notifications_are_new(bus_address):
+    async def test(notifier, server):
+        ids = [await notifier.notify("Battery", "low") for _ in range(3)]
+        assert len(set(ids)) == 3
+        assert {r[0] for r in server.received} == {0}
+
+    run(bus_address, test)
+
+
+def test_passes_icon_and_urgency(bus_address):
+    async def test(notifier, server):
+        await notifier.notify(
+            "Battery", "5%", icon="/icons/low.svg", urgency=URGENCY_CRITICAL
+        )
+        _, summary, body, icon, hints = server.received[0]
+        assert (summary, body, icon) == ("Battery", "5%", "/icons/low.svg")
+        assert hints == {"urgency": URGENCY_CRITICAL}
+
+    run(bus_address, test)
+
+
+def test_one_connection_for_concurrent_first_notifications(bus_address, monkeypatch):
+    connects = []
+    connect = MessageBus.connect
+
+    async def counted(self):
+        connects.append(self)
+        return await connect(self)
+
+    async def test(notifier, server):
+        monkeypatch.setattr(MessageBus, "connect", counted)
+        await asyncio.gather(*(notifier.notify("Volume", f"{i}%") for i in range(5)))
+        assert len(connects) == 1
+        assert len(server.received) == 5
+
+    run(bus_address, test)
+
+
+def test_send_does_not_raise_without_server(bus_address):
+    async def main():
+        notifier = Notifier(bus_address=bus_address)
+        await notifier.send("Volume", "10%")
+        notifier.disconnect()
+
+    asyncio.run(main())
@@ -0,0 +1,187 @@
+"""Output profiles and debounced hotplug, against simulated RandR bursts"""
+import asyncio
+
+import pytest
+
+from outputs import Output, OutputManager, Profile, connected_outputs
+
+PROFILES = (
+    Profile(
+        "docked",
+        (Output("DP-1-1", primary=True), Output("eDP-1", right_of="DP-1-1")),
+    ),
+    Profile("laptop", (Output("eDP-1", primary=True), Output("DP-1-1", off=True))),
+    Profile("external", (Output("DP-1-1", primary=True), Output("eDP-1", off=True))),
+)
+GEOMETRY = {"DP-1-1": (1920, 1080), "eDP-1": (1366, 768)}
+EVENTS = 8  # screen change events in a burst
+DEBOUNCE = 0.05
+
+
+class FakeRandr:
+    """Connected outputs and the geometry of those xrandr enabled"""
+
+    def __init__(self):
+        self.connected = {"eDP-1"}
+        self.enabled = ["eDP-1"]
+        self.calls = []
+
+    async def run(self, *cmd):
+        self.calls.append(cmd)
+        await asyncio.sleep(0.005)
+        if cmd[1] == "--query":
+            lines = [
+                f"{name} {'connected' if name in self.connected else 'disconnected'}"
+                for name in GEOMETRY
+            ]
+            return 0, "\n".join(lines)
+
+        self.enabled = []
+        args = list(cmd[1:])
+        while args:
+            name = args[1]
+            args = args[2:]
+            on = True
+            while args and args[0] != "--output":
+                on = on and args[0] != "--off"
+                args = args[2:] if args[0] == "--right-of" else args[1:]
+            if on and name in self.connected:
+                self.enabled.append(name)
+        return 0, ""
+
+    def screen_info(self):
+        x = 0
+        for name in self.enabled:
+            width, height = GEOMETRY[name]
+            yield x, 0, width, height
+            x += width
+
+
+async def burst(manager, randr, connected=None):
+    """Returns the rebuilds and xrandr calls a burst of events led to"""
+    if connected is not None:
+        randr.connected = connected
+    before = manager.reconfigured, len(randr.calls)
+    for _ in range(EVENTS):
+        manager.hotplug()
+        await asyncio.sleep(DEBOUNCE / 5)
+    await asyncio.sleep(DEBOUNCE + 0.1)
+    return manager.reconfigured - before[0], randr.calls[before[1] :]
+
+
+@pytest.fixture
+def setup():
+    randr = FakeRandr()
+    rebuilds = []
+    manager = OutputManager(
+        PROFILES,
+        randr.run,
+        randr.screen_info,
+        lambda: rebuilds.append(tuple(randr.screen_info())),
+        debounce=DEBOUNCE,
+    )
+    manager.start()
+    return manager, randr, rebuilds
+
+
+def test_dock_and_undock(setup):
+    manager, randr, rebuilds = setup
+
+    async def main():
+        # docking: one query, one xrandr call for both outputs, one rebuild
+        reconfigured, calls = await burst(manager, randr, {"eDP-1", "DP-1-1"})
+        assert reconfigured == 1
+        assert calls == [("xrandr", "--query"), PROFILES[0].command()]
+        assert manager.profile == "docked"
+        assert rebuilds[-1] == ((0, 0, 1920, 1080), (1920, 0, 1366, 768))
+
+        # events that change nothing keep the bars
+        reconfigured, calls = await burst(manager, randr)
+        assert reconfigured == 0
+        assert calls == [("xrandr", "--query")]
+
+        # the laptop screen turned off by hand stays off
+        await manager.apply("external")
+        reconfigured, calls = await burst(manager, randr)
+        assert reconfigured == 1
+        assert calls == [("xrandr", "--query")]
+        assert manager.profile == "external"
+
+        # undocking goes back to the laptop screen
+        reconfigured, calls = await burst(manager, randr, {"eDP-1"})
+        assert reconfigured == 1
+        assert calls == [("xrandr", "--query"), PROFILES[1].command()]
+        assert rebuilds[-1] == ((0, 0, 1366, 768),)
+        assert manager.events == 4 * EVENTS
+        assert manager.reconfigured == 3
+
+    asyncio.run(main())
+
+
+def test_events_during_settle_settle_again(setup):
+    manager, randr, rebuilds = setup
+
+    async def main():
+        randr.connected = {"eDP-1", "DP-1-1"}
+        manager.hotplug()
+        await asyncio.sleep(DEBOUNCE + 0.001)
+        # the dock is unplugged while the first settle is running
+        assert manager._task is not None and not manager._task.done()
+        randr.connected = {"eDP-1"}
+        manager.hotplug()
+        await asyncio.sleep(DEBOUNCE + 0.1)
+        assert manager.profile == "laptop"
+        # the external output never came up, the bars were kept
+        assert rebuilds == []
+
+    asyncio.run(main())
+
+
+def test_reload_keeps_the_profile_applied_by_hand(setup):
+    manager, randr, rebuilds = setup
+
+    async def main():
+        await burst(manager, randr, {"eDP-1", "DP-1-1"})
+        await manager.apply("external")
+        await burst(manager, randr)
+        # a reload builds a new manager, then qtile fires a screen change
+        manager.hotplug()
+        reloaded = OutputManager(
+            PROFILES, randr.run, randr.screen_info, manager.reconfigure, DEBOUNCE
+        )
+        reloaded.take_over(manager)
+        reconfigured, calls = await burst(reloaded, randr)
+        assert reconfigured == 0
+        assert calls == [("xrandr", "--query")]
+        assert reloaded.profile == "external" and randr.enabled == ["DP-1-1"]
+        assert manager._timer is None and len(rebuilds) == 2
+
+    asyncio.run(main())
+
+
+def test_profile_command():
+    assert PROFILES[0].command() == (
+        "xrandr",
+        *("--output", "DP-1-1", "--auto", "--primary"),
+        *("--output", "eDP-1", "--auto", "--right-of", "DP-1-1"),
+    )
+    assert PROFILES[2].command()[-3:] == ("--output", "eDP-1", "--off")
+
+
+def test_choose_falls_back_to_the_first_profile(setup):
+    manager, _, _ = setup
+    assert manager.choose({"eDP-1", "DP-1-1"}) == "docked"
+    assert manager.choose({"DP-1-1"}) == "external"
+    assert manager.choose(set()) == "docked"
+
+
+def test_connected_outputs():
+    query = (
+        "Screen 0: minimum 8 x 8, current 3286 x 1080, maximum 32767 x 32767\n"
+        "eDP-1 connected primary 1366x768+0+0 (normal left inverted) 309mm x 174mm\n"
+        "   1366x768      60.00*+\n"
+        "DP-1 disconnected (normal left inverted right x axis y axis)\n"
+        "DP-1-1 connected 1920x1080+1366+0 (normal left inverted) 527mm x 296mm\n"
+        "HDMI-1 disconnected (normal left inverted right x axis y axis)\n"
+    )
+    assert connected_outputs(query) == {"eDP-1", "DP-1-1"}
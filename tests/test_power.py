@@ -0,0 +1,184 @@
+"""Battery monitoring against a fake UPower service and a fake sysfs tree"""
+import asyncio
+
+import pytest
+from dbus_next import PropertyAccess, Variant
+from dbus_next.aio import MessageBus
+from dbus_next.service import ServiceInterface, dbus_property
+
+from power import (
+    DISPLAY_DEVICE,
+    UPOWER,
+    UPOWER_CHARGING,
+    UPOWER_DEVICE,
+    BatteryState,
+    LowBatteryPolicy,
+    PowerMonitor,
+    poll_interval,
+)
+
+UPOWER_DISCHARGING = 2
+
+
+class FakeDisplayDevice(ServiceInterface):
+    def __init__(self, percentage, state):
+        super().__init__(UPOWER_DEVICE)
+        self._percentage = percentage
+        self._state = state
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Percentage(self) -> "d":  # noqa: F821
+        return self._percentage
+
+    @dbus_property(access=PropertyAccess.READ)
+    def State(self) -> "u":  # noqa: F821
+        return self._state
+
+    def change(self, percentage, state):
+        self._percentage, self._state = percentage, state
+        self.emit_properties_changed({"Percentage": percentage, "State": state})
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, summary, body="", **kwargs):
+        self.sent.append(summary)
+
+    async def notify(self, summary, body="", **kwargs):
+        self.sent.append(summary)
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    battery = tmp_path / "BAT0"
+    battery.mkdir()
+
+    def write(capacity, status):
+        (battery / "capacity").write_text(f"{capacity}\n")
+        (battery / "status").write_text(f"{status}\n")
+
+    write(80, "Discharging")
+    return tmp_path, write
+
+
+async def until(condition, timeout=2):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_upower_signals(bus_address):
+    async def main():
+        service = await MessageBus(bus_address=bus_address).connect()
+        device = FakeDisplayDevice(80.0, UPOWER_DISCHARGING)
+        service.export(DISPLAY_DEVICE, device)
+        await service.request_name(UPOWER)
+
+        monitor = PowerMonitor(bus_address=bus_address)
+        states = []
+        monitor.subscribe(states.append)
+        await until(lambda: states)
+        device.change(42.0, UPOWER_CHARGING)
+        await until(lambda: len(states) == 2)
+        monitor.stop()
+        service.disconnect()
+
+        assert states == [
+            BatteryState(percent=80.0, charging=False),
+            BatteryState(percent=42.0, charging=True),
+        ]
+        # changes arrive as signals, only the initial state is read
+        assert monitor.reads == 1
+
+    asyncio.run(main())
+
+
+def test_falls_back_to_sysfs_without_upower(bus_address, sysfs):
+    root, write = sysfs
+
+    async def main():
+        monitor = PowerMonitor(root=str(root), bus_address=bus_address)
+        states = []
+        monitor.subscribe(states.append)
+        await until(lambda: states)
+        monitor.stop()
+        assert states == [BatteryState(percent=80.0, charging=False)]
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    "status, charging, full",
+    [
+        ("Discharging", False, False),
+        ("Charging", True, False),
+        ("Not charging", True, False),
+        ("Full", True, True),
+    ],
+)
+def test_read_sysfs(sysfs, status, charging, full):
+    root, write = sysfs
+    write(55, status)
+    monitor = PowerMonitor(root=str(root), upower=False)
+    assert monitor.read_sysfs() == BatteryState(55.0, charging, full)
+    assert monitor.reads == 1
+
+
+def test_poll_interval_shrinks_as_battery_drains():
+    percents = 100, 51, 50, 21, 20, 11, 10, 0
+    intervals = 120, 120, 60, 60, 30, 30, 10, 10
+    assert tuple(map(poll_interval, percents)) == intervals
+
+
+def test_policy_warns_once():
+    async def main():
+        notifier = FakeNotifier()
+        policy = LowBatteryPolicy(notifier, shutdown=None)
+        for percent in (9, 8, 7):
+            policy(BatteryState(percent, charging=False))
+        assert notifier.sent == ["Battery low"]
+        policy(BatteryState(7, charging=True))
+        policy(BatteryState(6, charging=False))
+        assert notifier.sent == ["Battery low", "Battery low"]
+
+    asyncio.run(main())
+
+
+def test_policy_charger_aborts_shutdown():
+    async def main():
+        shutdowns = []
+
+        async def shutdown():
+            shutdowns.append(True)
+
+        policy = LowBatteryPolicy(FakeNotifier(), shutdown, countdown=1)
+        policy(BatteryState(4, charging=False))
+        await asyncio.sleep(0)
+        policy(BatteryState(4, charging=True))
+        await asyncio.sleep(1.1)
+        assert not shutdowns and policy._task is None
+
+    asyncio.run(main())
+
+
+def test_policy_retries_failed_shutdown():
+    async def main():
+        attempts = []
+
+        async def shutdown():
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise RuntimeError("systemctl failed")
+
+        policy = LowBatteryPolicy(FakeNotifier(), shutdown, countdown=0)
+        policy(BatteryState(4, charging=False))
+        await until(lambda: policy._task is None)
+        policy(BatteryState(3, charging=False))
+        await until(lambda: policy._task is None)
+        assert len(attempts) == 2
+
+    asyncio.run(main())
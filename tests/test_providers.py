@@ -0,0 +1,113 @@
+"""Shared providers read their source once per interval, whatever the screens"""
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from clock import ClockProvider
+from power import PowerMonitor, poll_interval
+from providers import Registry
+
+HORIZON = 600  # seconds of virtual time each case runs for
+EPOCH = datetime(2024, 1, 1)
+# widgets bound to each source on every bar, as on the primary bar
+WIDGETS_PER_SCREEN = {"battery": 2, "clock": 2}
+real_sleep = asyncio.sleep
+
+
+class VirtualTime:
+    """Event loop sleeps that return at once, in virtual time order"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+        self._order = itertools.count()
+
+    def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + seconds, next(self._order), future))
+        return future
+
+    async def run(self, until):
+        while True:
+            # lets woken tasks run up to their next sleep
+            for _ in range(10):
+                await real_sleep(0)
+            if not self._sleepers or self._sleepers[0][0] > until:
+                return
+            self.now, _, future = heapq.heappop(self._sleepers)
+            future.set_result(None)
+
+
+@pytest.fixture
+def virtual_time(monkeypatch):
+    time = VirtualTime()
+    monkeypatch.setattr(asyncio, "sleep", time.sleep)
+    return time
+
+
+@pytest.fixture
+def battery(tmp_path):
+    (tmp_path / "BAT0").mkdir()
+    (tmp_path / "BAT0" / "capacity").write_text("80\n")
+    (tmp_path / "BAT0" / "status").write_text("Discharging\n")
+    return str(tmp_path)
+
+
+def run(screens, virtual_time, battery, clock_format=None):
+    """Returns the reads of each source and the updates of each widget"""
+
+    async def main():
+        sources = Registry()
+        sources.register("battery", lambda: PowerMonitor(root=battery, upower=False))
+        sources.register(
+            "clock",
+            lambda: ClockProvider(
+                now=lambda: EPOCH + timedelta(seconds=virtual_time.now)
+            ),
+        )
+        updates = {name: [] for name in WIDGETS_PER_SCREEN}
+        for _ in range(screens):
+            for name, count in WIDGETS_PER_SCREEN.items():
+                for _ in range(count):
+                    counts = updates[name]
+                    counts.append(0)
+
+                    def callback(value, counts=counts, i=len(counts) - 1):
+                        counts[i] += 1
+
+                    kwargs = {"format": clock_format} if name == "clock" else {}
+                    sources.get(name).subscribe(callback, **kwargs)
+
+        await virtual_time.run(until=HORIZON)
+        for name in WIDGETS_PER_SCREEN:
+            sources.get(name).stop()
+        return sources.reads(), updates
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("screens", [1, 2, 3])
+def test_one_read_per_interval(screens, virtual_time, battery):
+    reads, updates = run(screens, virtual_time, battery)
+    # at the start, then at every interval up to the horizon
+    assert reads == {
+        "battery": HORIZON // poll_interval(80) + 1,
+        "clock": HORIZON + 1,
+    }
+    # only the drawing happens per widget: each clock widget every second,
+    # the battery ones once as its state doesn't change
+    assert updates == {
+        "battery": [1] * screens * WIDGETS_PER_SCREEN["battery"],
+        "clock": [HORIZON + 1] * screens * WIDGETS_PER_SCREEN["clock"],
+    }
+
+
+@pytest.mark.parametrize("screens", [1, 2, 3])
+def test_clock_wakes_at_format_resolution(screens, virtual_time, battery):
+    reads, updates = run(screens, virtual_time, battery, clock_format="%H:%M")
+    assert reads["clock"] == HORIZON // 60 + 1
+    widgets = screens * WIDGETS_PER_SCREEN["clock"]
+    assert updates["clock"] == [HORIZON // 60 + 1] * widgets
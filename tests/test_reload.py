@@ -0,0 +1,285 @@
+"""Diffing an edited config against the running one, and loading it aside"""
+import importlib.util
+import sys
+from types import SimpleNamespace
+
+import pytest
+from libqtile import hook
+from libqtile.config import Key
+from libqtile.configurable import Configurable
+from libqtile.lazy import lazy
+
+from actions import ActionExecutor
+from bar_spec import bar_spec, spec
+from providers import Registry
+from reload import (
+    FullReload,
+    adopt,
+    config_hooks,
+    describe,
+    diff,
+    diff_bar,
+    diff_keys,
+    dispose,
+    load_config,
+    running_module,
+    stateful,
+    subscriptions,
+)
+
+CONFIG = """
+from libqtile import hook
+from libqtile.config import Key
+from libqtile.lazy import lazy
+
+from actions import ActionExecutor
+from clock import ClockProvider
+from instrument import Instrumentation
+from providers import Registry
+
+STEP = {step}
+executor = ActionExecutor()
+instrument = Instrumentation()
+sources = Registry()
+sources.register("clock", ClockProvider)
+clock = sources.get("clock")
+created = [executor, sources]
+
+
+@hook.subscribe.startup
+def rasterise_icons():
+    executor.submit("icons", {icons!r})
+
+
+hook.subscribe.screen_change(instrument.timed(clock.set_active, "screen_change"))
+hook.subscribe.startup_complete(lambda: executor.submit("paint", {paint!r}))
+
+keys = [Key(["mod4"], "Return", lazy.spawn({terminal!r}))]
+screens = []
+"""
+EDITS = dict(step=5, icons="icons", paint="wallpaper", terminal="alacritty")
+
+
+class Gauge(Configurable):
+    defaults = [("step", 1, "Step of the gauge")]
+
+    def __init__(self, **config):
+        Configurable.__init__(self, **config)
+        self.add_defaults(Gauge.defaults)
+
+
+def define(source, name="f"):
+    namespace = {"STEP": 5}
+    exec(source, namespace)
+    return namespace[name]
+
+
+def fake_bar(bar):
+    """A running bar built from a spec, without any window"""
+    widgets = [SimpleNamespace(spec=w) for w in bar.widgets]
+    return SimpleNamespace(spec=bar, widgets=widgets, size=bar.size)
+
+
+@pytest.fixture
+def restore_hooks():
+    saved = subscriptions()
+    yield
+    hook.subscriptions.clear()
+    hook.subscriptions.update(saved)
+
+
+@pytest.fixture
+def write(tmp_path, restore_hooks):
+    def write(name="config.py", **edits):
+        path = tmp_path / name
+        path.write_text(CONFIG.format(**{**EDITS, **edits}))
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def modules():
+    loaded = []
+    yield loaded
+    for module in loaded:
+        for value in (module.executor, module.sources, module.instrument):
+            dispose(value)
+
+
+def import_config(path):
+    """Executes a config the way qtile does, keeping its hooks subscribed"""
+    spec = importlib.util.spec_from_file_location("config", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_functions_are_described_by_code_and_constants():
+    f = define("def f(qtile):\n    qtile.step(STEP)\n")
+    moved = define("\n\n\ndef f(qtile):\n    qtile.step(STEP)\n")
+    edited = define("def f(qtile):\n    qtile.step(STEP * 2)\n")
+    assert describe(f) == describe(moved)
+    assert describe(f) != describe(edited)
+    f.__globals__["STEP"] = 10
+    assert describe(f) != describe(moved)
+
+
+def test_stateful_objects_are_described_by_type():
+    executors = ActionExecutor(), ActionExecutor(budget=1)
+    assert describe(executors[0]) == describe(executors[1])
+    assert stateful(executors[0]) and not stateful(Gauge(step=2))
+    assert describe(Gauge(step=2)) == describe(Gauge(step=2))
+    assert describe(Gauge(step=2)) != describe(Gauge(step=3))
+    assert describe(Gauge()) != describe(Gauge(step=1))
+    for executor in executors:
+        executor.shutdown()
+
+
+def test_cycles_are_described():
+    cycle = []
+    cycle.append(cycle)
+    assert describe(cycle) == ("list", (("cycle",),))
+
+
+def test_diff_keys_keeps_unchanged_bindings():
+    a, b, c = (Key(["mod4"], k, lazy.spawn(k)) for k in "abc")
+    same_a = Key(["mod4"], "a", lazy.spawn("a"))
+    new_b = Key(["mod4"], "b", lazy.spawn("B"))
+    d = Key(["mod4", "shift"], "a", lazy.spawn("a"))
+    keys, ungrab, grab = diff_keys([a, b, c], [same_a, new_b, d])
+    assert keys == [a, new_b, d]
+    assert ungrab == [b, c] and grab == [new_b, d]
+
+
+def test_diff_bar_returns_changed_widgets_at_their_position():
+    old = bar_spec([spec("Spacer"), spec("Clock", format="%H:%M")], 34)
+    running = fake_bar(old)
+    new = bar_spec([spec("Spacer"), spec("Clock", format="%H:%M:%S")], 34)
+    [(bar, position, index, widget)] = diff_bar(running, fake_bar(new))
+    assert (bar, position, index) == (running, 1, 1)
+    assert widget == new.widgets[1]
+    assert diff_bar(running, fake_bar(old)) == []
+
+
+@pytest.mark.parametrize(
+    "widgets, size",
+    [
+        ([spec("Spacer"), spec("Clock", format="%H:%M")], 30),
+        ([spec("Clock", format="%H:%M")], 34),
+    ],
+)
+def test_diff_bar_needs_a_full_reload_for_the_bar_layout(widgets, size):
+    running = fake_bar(bar_spec([spec("Spacer"), spec("Clock", format="%H:%M")], 34))
+    with pytest.raises(FullReload):
+        diff_bar(running, fake_bar(bar_spec(widgets, size)))
+
+
+def test_diff_bar_needs_a_full_reload_for_open_boxes():
+    old = bar_spec([spec("WidgetBox", widgets=[spec("Clock")])], 34)
+    running = fake_bar(old)
+    running.widgets[0].box_is_open = True
+    new = bar_spec([spec("WidgetBox", widgets=[spec("Clock", format="%H")])], 34)
+    with pytest.raises(FullReload, match="WidgetBox"):
+        diff_bar(running, fake_bar(new))
+
+
+def test_adopt_keeps_the_running_objects():
+    running, created = ActionExecutor(), ActionExecutor()
+    old = spec("Clock", format="%H:%M", executor=running, widgets=[spec("Spacer")])
+    new = spec("Clock", format="%H", executor=created, widgets=[spec("Spacer")])
+    adopted = adopt(new, old)
+    assert dict(adopted.config)["executor"] is running
+    assert dict(adopted.config)["format"] == "%H"
+    assert dict(adopted.config)["widgets"] is dict(old.config)["widgets"]
+    unchanged = spec("Clock", executor=running)
+    assert adopt(spec("Clock", executor=created), unchanged) is unchanged
+    running.shutdown()
+    created.shutdown()
+
+
+def test_hooks_are_restored_by_registry(write, modules):
+    def started():
+        pass
+
+    hook.subscribe.startup(started)
+    before = subscriptions()
+    module = load_config(write())
+    modules.append(module)
+    assert hook.subscriptions == before
+    assert hook.subscriptions["qtile"]["startup"][-1] is started
+    assert module.__hooks__["qtile"]["startup"] == [module.rasterise_icons]
+
+
+def test_running_objects_are_kept_new_ones_disposed(write):
+    running = SimpleNamespace(executor=ActionExecutor(), sources=Registry())
+    module = load_config(write(), running)
+    executor, sources = module.created
+    assert module.executor is running.executor and module.sources is running.sources
+    assert executor._pool._shutdown and not running.executor._pool._shutdown
+    assert sources.get("clock")._task is None
+    running.executor.shutdown()
+    dispose(module.instrument)
+
+
+def test_without_running_config_nothing_is_swapped(write, modules):
+    module = load_config(write())
+    modules.append(module)
+    assert module.created == [module.executor, module.sources]
+
+
+def test_hooks_of_a_module_qtile_loaded(write, modules):
+    def unrelated():
+        pass
+
+    hook.subscribe.startup(unrelated)
+    running = import_config(write())
+    modules.append(running)
+    hooks = config_hooks(running)
+    assert hooks["qtile"]["startup"] == [running.rasterise_icons]
+    [timed] = hooks["qtile"]["screen_change"]
+    assert timed.__wrapped__ == running.clock.set_active
+
+
+def test_diff_applies_key_changes(write, modules):
+    running = import_config(write())
+    modules.append(running)
+    assert diff(running, load_config(write("same.py"), running)).grab == []
+    changes = diff(running, load_config(write("edited.py", terminal="kitty"), running))
+    [old], [new] = changes.ungrab, changes.grab
+    assert old is running.keys[0] and changes.keys == [new]
+
+
+@pytest.mark.parametrize(
+    "edits, reason",
+    [
+        (dict(step=10), "STEP changed"),
+        (dict(icons="other"), "rasterise_icons changed"),
+        (dict(paint="other"), "the startup_complete hooks changed"),
+    ],
+)
+def test_diff_needs_a_full_reload(write, modules, edits, reason):
+    running = import_config(write())
+    modules.append(running)
+    with pytest.raises(FullReload, match=reason):
+        diff(running, load_config(write("edited.py", **edits), running))
+
+
+def test_diff_needs_a_full_reload_for_added_globals(write, modules):
+    path = write()
+    running = load_config(path)
+    modules.append(running)
+    with open(path, "a") as f:
+        f.write("VOLUME_STEP = 5\n")
+    with pytest.raises(FullReload, match="VOLUME_STEP was added"):
+        diff(running, load_config(path, running))
+
+
+def test_running_module(write, modules, monkeypatch):
+    path = write()
+    running = import_config(path)
+    modules.append(running)
+    monkeypatch.setitem(sys.modules, "config", running)
+    assert running_module(path) is running
+    with pytest.raises(FullReload):
+        running_module(write("other.py"))
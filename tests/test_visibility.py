@@ -0,0 +1,197 @@
+"""Visibility suspending the timers and sources of hidden widgets"""
+import asyncio
+
+from osd import Osd
+from power import LowBatteryPolicy, PowerMonitor
+from providers import Provider, Subscriber
+from visibility import Visibility
+
+
+class Source(Provider):
+    async def run(self):
+        await asyncio.Event().wait()
+
+
+class FakeBar:
+    def __init__(self):
+        self.draws = 0
+
+    def draw(self):
+        self.draws += 1
+
+
+class FakeWidget(Subscriber):
+    """The parts of a libqtile widget Visibility uses"""
+
+    def __init__(self, source=None):
+        self.bar = FakeBar()
+        self.configured = True
+        self._futures = []
+        self.values = []
+        self.draws = 0
+        self.timers = 0
+        if source is not None:
+            self.subscribe_to(source, self.on_value)
+
+    def on_value(self, value):
+        self.values.append(value)
+        self.draw()
+        # like _TextBox.update when the text length changes
+        self.bar.draw()
+
+    def draw(self):
+        self.draws += 1
+
+    def timer_setup(self):
+        self.timers += 1
+        loop = asyncio.get_running_loop()
+        self._futures.append(loop.call_later(60, self.timer_setup))
+
+
+def test_hidden_widget_gets_no_source_updates():
+    async def main():
+        source = Source()
+        widget = FakeWidget(source)
+        visibility = Visibility()
+        visibility.add_widgets("box:system", lambda: [widget])
+        source.publish(1)
+        assert source._task is not None
+
+        visibility.set("box:system", True)
+        draws, bar_draws = widget.draws, widget.bar.draws
+        source.publish(2)
+        source.publish(3)
+        assert widget.values == [1]
+        assert (widget.draws, widget.bar.draws) == (draws, bar_draws)
+        # nothing visible needs it any more
+        assert source._task is None
+
+        visibility.set("box:system", False)
+        assert widget.values == [1, 3]
+        assert source._task is not None
+        source.stop()
+
+    asyncio.run(main())
+
+
+def test_shared_source_keeps_running_for_visible_widgets():
+    async def main():
+        source = Source()
+        hidden, shown = FakeWidget(source), FakeWidget(source)
+        visibility = Visibility()
+        visibility.add_widgets("screen:1", lambda: [hidden])
+        visibility.set("screen:1", True)
+        source.publish(1)
+        assert shown.values == [1] and hidden.values == []
+        assert source._task is not None
+        source.stop()
+
+    asyncio.run(main())
+
+
+def test_resume_leaves_one_timer():
+    async def main():
+        widget = FakeWidget()
+        visibility = Visibility()
+        visibility.add_widgets("locked", lambda: [widget])
+        visibility.refresh()
+        widget.timer_setup()
+
+        visibility.set("locked", True)
+        assert widget._futures == []
+        # a poll that was in flight when the widget was hidden
+        widget._futures.append(asyncio.get_running_loop().call_later(60, print))
+        visibility.set("locked", False)
+        assert len(widget._futures) == 1
+        assert widget.bar.draws == 1
+
+        visibility.set("locked", True)
+        visibility.set("locked", False)
+        assert len(widget._futures) == 1
+        for future in widget._futures:
+            future.cancel()
+
+    asyncio.run(main())
+
+
+def test_wakeups_while_hidden_are_dropped():
+    async def main():
+        widget = FakeWidget()
+        visibility = Visibility()
+        visibility.add_widgets("locked", lambda: [widget])
+        visibility.refresh()
+        widget.timer_setup()
+        visibility.set("locked", True)
+        timers = widget.timers
+        # a timer that fired anyway
+        widget.timer_setup()
+        assert widget.timers == timers and visibility.wakeups == 1
+        visibility.set("locked", False)
+        for future in widget._futures:
+            future.cancel()
+
+    asyncio.run(main())
+
+
+def test_listeners_follow_their_conditions():
+    visibility = Visibility()
+    calls = []
+    visibility.add_listener(calls.append, "box:system", "locked")
+    visibility.set("box:system", True)
+    visibility.set("screen:1", True)
+    visibility.set("locked", True)
+    visibility.set("box:system", False)
+    visibility.set("locked", False)
+    assert calls == [True, False, False, False, True]
+
+
+def test_locked_screen_keeps_the_battery_policy_fed(tmp_path):
+    battery = tmp_path / "BAT0"
+    battery.mkdir()
+    (battery / "capacity").write_text("8\n")
+    (battery / "status").write_text("Discharging\n")
+
+    class Notifier:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, summary, *args, **kwargs):
+            self.sent.append(summary)
+
+    async def main():
+        monitor = PowerMonitor(root=str(tmp_path), upower=False)
+        notifier = Notifier()
+        LowBatteryPolicy(notifier, shutdown=None).attach(monitor)
+        gauge, text = FakeWidget(monitor), FakeWidget(monitor)
+        visibility = Visibility()
+        visibility.add_widgets("locked", lambda: [gauge, text])
+        # locked before the monitor's first read
+        visibility.set("locked", True)
+        assert monitor._task is not None
+        for _ in range(100):
+            if notifier.sent:
+                break
+            await asyncio.sleep(0.01)
+        assert notifier.sent == ["Battery low"]
+        assert gauge.values == text.values == []
+        monitor.stop()
+
+    asyncio.run(main())
+
+
+def test_widget_finalized_while_hidden():
+    async def main():
+        osd, source = Osd(), Source()
+        widget = FakeWidget(osd)
+        widget.subscribe_to(source, widget.on_value)
+        visibility = Visibility()
+        visibility.add_widgets("locked", lambda: [widget])
+        visibility.set("locked", True)
+        # what OsdBar.finalize does, e.g. in a reload's replace_widget
+        widget.unsubscribe_all()
+        assert osd._callbacks == [] and source._callbacks == []
+        assert not osd.show("x", 50, "volume")
+        # an unsubscribe that comes twice is ignored
+        osd.unsubscribe(widget.on_value)
+
+    asyncio.run(main())
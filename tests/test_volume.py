@@ -0,0 +1,84 @@
+"""Volume controller reconnecting and falling back after a backend failure"""
+import asyncio
+
+from volume import VolumeController
+
+
+class FakeBackend:
+    def __init__(self, level=50):
+        self.level = level
+        self.connects = 0
+        self.closes = 0
+        self.down = False
+
+    async def connect(self):
+        if self.down:
+            raise ConnectionError("sound server is gone")
+        self.connects += 1
+
+    def close(self):
+        self.closes += 1
+
+    async def change(self, delta):
+        if self.down:
+            raise ConnectionError("sound server is gone")
+        self.level += delta
+        return self.level, False
+
+    async def get(self):
+        return self.level, False
+
+
+async def settle(volume):
+    while volume._task is not None and not volume._task.done():
+        await asyncio.sleep(0)
+
+
+def test_reconnects_after_failure():
+    async def run():
+        backend = FakeBackend()
+        volume = VolumeController(backends=[backend])
+        volume.step(1)
+        await settle(volume)
+        backend.down = True
+        volume.step(1)
+        await settle(volume)
+        assert volume._backend is None and backend.closes == 1
+        backend.down = False
+        volume.step(1)
+        await settle(volume)
+        assert backend.connects == 2
+        assert volume.get() == (60, False)
+
+    asyncio.run(run())
+
+
+def test_falls_back_when_server_stays_down():
+    async def run():
+        pulse, amixer = FakeBackend(), FakeBackend(level=30)
+        volume = VolumeController(backends=[pulse, amixer])
+        volume.step(1)
+        await settle(volume)
+        pulse.down = True
+        volume.step(1)
+        await settle(volume)
+        volume.step(1)
+        await settle(volume)
+        assert volume._backend is amixer
+        assert volume.get() == (35, False)
+
+    asyncio.run(run())
+
+
+def test_close_cancels_and_closes_backends():
+    async def run():
+        pulse, amixer = FakeBackend(), FakeBackend()
+        volume = VolumeController(backends=[pulse, amixer])
+        volume.step(1)
+        task = volume._task
+        volume.close()
+        await asyncio.sleep(0)
+        assert task.cancelled() and volume._task is None
+        assert (pulse.closes, amixer.closes) == (1, 1)
+
+    asyncio.run(run())
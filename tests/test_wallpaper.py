@@ -0,0 +1,108 @@
+"""Wallpaper surfaces scaled once per output size, repainted on every paint"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    import cairocffi
+except (ImportError, OSError):
+    pytest.skip("needs cairo", allow_module_level=True)
+
+import wallpaper
+from wallpaper import WallpaperCache
+
+
+class RootPainter:
+    """qtile's X11 painter, over an offscreen root pixmap"""
+
+    def __init__(self, width, height):
+        self.root = cairocffi.ImageSurface(cairocffi.FORMAT_RGB24, width, height)
+        self.updates = 0
+
+    def _get_root_pixmap_and_surface(self, screen):
+        # the painter finishes the surface, hand out a view of the root
+        return None, cairocffi.ImageSurface.create_for_data(
+            self.root.get_data(),
+            cairocffi.FORMAT_RGB24,
+            self.root.get_width(),
+            self.root.get_height(),
+        )
+
+    def _update_root_pixmap(self, root_pixmap):
+        self.updates += 1
+
+
+class Screen:
+    def __init__(self, painter, x, width, height):
+        self.qtile = SimpleNamespace(core=SimpleNamespace(painter=painter))
+        self.x, self.y, self.width, self.height = x, 0, width, height
+        self.painted = []
+
+    def set_wallpaper(self, path, mode):
+        self.painted.append((path, mode))
+
+
+@pytest.fixture
+def source(tmp_path):
+    wallpaper._surfaces.clear()
+    image = cairocffi.ImageSurface(cairocffi.FORMAT_RGB24, 40, 20)
+    ctx = cairocffi.Context(image)
+    ctx.set_source_rgb(1, 0, 0)
+    ctx.paint()
+    path = tmp_path / "wallpaper.png"
+    image.write_to_png(str(path))
+    return str(path)
+
+
+async def run_blocking(func, *args):
+    return func(*args)
+
+
+def test_equal_outputs_share_a_surface(source, tmp_path):
+    painter = RootPainter(200, 50)
+    screens = [Screen(painter, 0, 100, 50), Screen(painter, 100, 100, 50)]
+    wallpapers = WallpaperCache(source, str(tmp_path / "cache"))
+    asyncio.run(wallpapers.paint(screens, run_blocking))
+    asyncio.run(wallpapers.paint(screens, run_blocking))
+    assert (wallpapers.rendered, wallpapers.decoded) == (1, 1)
+    assert painter.updates == 4
+    # red all over the root, both halves painted
+    data = bytes(painter.root.get_data())
+    stride = painter.root.get_stride()
+    for x in (0, 150, 199):
+        assert data[stride * 49 + x * 4 + 2] == 255
+
+
+def test_reload_keeps_surfaces_restart_reads_disk(source, tmp_path):
+    painter = RootPainter(100, 50)
+    screens = [Screen(painter, 0, 100, 50)]
+    WallpaperCache(source, str(tmp_path / "cache")).surface(100, 50)
+    reloaded = WallpaperCache(source, str(tmp_path / "cache"))
+    asyncio.run(reloaded.paint(screens, run_blocking))
+    assert (reloaded.rendered, reloaded.decoded) == (0, 0)
+    wallpaper._surfaces.clear()
+    restarted = WallpaperCache(source, str(tmp_path / "cache"))
+    asyncio.run(restarted.paint(screens, run_blocking))
+    assert (restarted.rendered, restarted.decoded) == (0, 1)
+
+
+def test_resize_drops_unused_sizes(source, tmp_path):
+    painter = RootPainter(100, 50)
+    screen = Screen(painter, 0, 100, 50)
+    wallpapers = WallpaperCache(source, str(tmp_path / "cache"))
+    asyncio.run(wallpapers.paint([screen], run_blocking))
+    screen.width = 80
+    asyncio.run(wallpapers.paint([screen], run_blocking))
+    assert [key[1:] for key in wallpaper._surfaces] == [(80, 50)]
+    assert wallpapers.rendered == 2
+
+
+def test_other_backends_paint_the_scaled_file(source, tmp_path):
+    screen = Screen(object(), 0, 100, 50)
+    wallpapers = WallpaperCache(source, str(tmp_path / "cache"))
+    asyncio.run(wallpapers.paint([screen], run_blocking))
+    asyncio.run(wallpapers.paint([screen], run_blocking))
+    path = wallpapers.path(100, 50)
+    assert screen.painted == [(path, None), (path, None)]
+    assert cairocffi.ImageSurface.create_from_png(path).get_width() == 100
@@ -0,0 +1,97 @@
+"""Weather provider against a local HTTP stand-in"""
+import asyncio
+import http.server
+import json
+import threading
+
+import pytest
+
+from weather import HttpBackend, WeatherProvider
+
+DATA = {"name": "Kraków", "main": {"temp": 12.3}, "weather": [{"description": "fog"}]}
+ETAG = '"1"'
+
+
+class StandIn(http.server.BaseHTTPRequestHandler):
+    # responses cut short before the next one is served whole
+    truncated = 0
+    requests = 0
+
+    def do_GET(self):
+        StandIn.requests += 1
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(DATA).encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if StandIn.truncated:
+            StandIn.truncated -= 1
+            body = body[: len(body) // 2]
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    StandIn.requests = StandIn.truncated = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+async def first(provider, timeout=5):
+    published = asyncio.get_running_loop().create_future()
+    provider.subscribe(lambda w: published.done() or published.set_result(w))
+    try:
+        return await asyncio.wait_for(published, timeout)
+    finally:
+        provider.stop()
+
+
+def test_fetches_and_caches(url, tmp_path):
+    cache = str(tmp_path / "weather.json")
+    weather = asyncio.run(first(WeatherProvider(HttpBackend(url), cache)))
+    assert weather.data == DATA and not weather.stale
+    with open(cache) as f:
+        assert json.load(f)["etag"] == ETAG
+
+
+def test_survives_incomplete_read(url, tmp_path):
+    StandIn.truncated = 2
+    provider = WeatherProvider(
+        HttpBackend(url), str(tmp_path / "weather.json"), retry=0.01
+    )
+    weather = asyncio.run(first(provider))
+    assert weather.data == DATA
+    assert StandIn.requests == 3
+    # the failure count is reset by the successful request
+    assert provider.failures == 0
+
+
+def test_stale_cache_is_revalidated(url, tmp_path):
+    cache = tmp_path / "weather.json"
+    cache.write_text(
+        json.dumps(dict(data=DATA, fetched=0, etag=ETAG, last_modified=None))
+    )
+
+    async def main():
+        provider = WeatherProvider(HttpBackend(url), str(cache))
+        published = []
+        provider.subscribe(published.append)
+        while StandIn.requests == 0 or len(published) < 2:
+            await asyncio.sleep(0.01)
+        provider.stop()
+        return published
+
+    published = asyncio.run(main())
+    # the stale data first, then the same data once the server answered 304
+    assert [w.stale for w in published[:2]] == [True, False]
+    assert published[1].data == DATA
@@ -0,0 +1,321 @@
+"""Wi-Fi menu against a stand-in NetworkManager on a private bus"""
+import asyncio
+import time
+
+import pytest
+from dbus_next import PropertyAccess, Variant
+from dbus_next.aio import MessageBus
+from dbus_next.service import ServiceInterface, dbus_property, method
+
+from wifi import (
+    ACTIVE_ACTIVATED,
+    DEVICE_TYPE_WIFI,
+    NM,
+    NM_ACCESS_POINT,
+    NM_ACTIVE,
+    NM_CONNECTION,
+    NM_DEVICE,
+    NM_PATH,
+    NM_SETTINGS,
+    NM_SETTINGS_PATH,
+    NM_WIRELESS,
+    WifiMenu,
+    key_mgmt,
+)
+
+DEVICE_PATH = f"{NM_PATH}/Devices/3"
+ACTIVE_PATH = f"{NM_PATH}/ActiveConnection/1"
+SCAN = 0.5  # seconds a rescan takes
+PRIVACY = 0x1
+# pairwise/group CCMP plus the key management
+WPA2 = 0x188
+WPA3 = 0x488
+WPA3_TRANSITION = 0x588
+ENTERPRISE = 0x288
+OWE = 0x888
+
+# (ssid, strength, Flags, WpaFlags, RsnFlags), cached before the rescan
+CACHED = [
+    ("home", 70, PRIVACY, 0, WPA2),
+    ("home", 40, PRIVACY, 0, WPA2),
+    ("cafe", 60, 0, 0, 0),
+    ("wpa3", 50, PRIVACY, 0, WPA3),
+    ("", 90, PRIVACY, 0, WPA2),
+]
+# found by the rescan
+SCANNED = [
+    ("old-router", 30, PRIVACY, 0, 0),
+    ("office", 20, PRIVACY, 0, ENTERPRISE),
+    ("mixed", 80, PRIVACY, WPA2, WPA3_TRANSITION),
+]
+SAVED = ["cafe"]
+
+
+class StandInManager(ServiceInterface):
+    def __init__(self):
+        super().__init__(NM)
+        self.wireless = None
+        self.activated = []
+        self.added = []
+
+    @method()
+    def GetDevices(self) -> "ao":  # noqa: F821
+        return [DEVICE_PATH]
+
+    @dbus_property(access=PropertyAccess.READ)
+    def WirelessEnabled(self) -> "b":  # noqa: F821
+        return True
+
+    @method()
+    def ActivateConnection(
+        self, connection: "o", device: "o", specific: "o"  # noqa: F821
+    ) -> "o":  # noqa: F821
+        self.activated.append((connection, device, specific))
+        return ACTIVE_PATH
+
+    @method()
+    def AddAndActivateConnection(
+        self, settings: "a{sa{sv}}", device: "o", specific: "o"  # noqa: F821
+    ) -> "oo":  # noqa: F821
+        settings = {
+            group: {key: variant.value for key, variant in values.items()}
+            for group, values in settings.items()
+        }
+        self.added.append((settings, device, specific))
+        return [f"{NM_SETTINGS_PATH}/new", ACTIVE_PATH]
+
+
+class StandInActive(ServiceInterface):
+    def __init__(self):
+        super().__init__(NM_ACTIVE)
+
+    @dbus_property(access=PropertyAccess.READ)
+    def State(self) -> "u":  # noqa: F821
+        return ACTIVE_ACTIVATED
+
+
+class StandInDevice(ServiceInterface):
+    def __init__(self):
+        super().__init__(NM_DEVICE)
+
+    @dbus_property(access=PropertyAccess.READ)
+    def DeviceType(self) -> "u":  # noqa: F821
+        return DEVICE_TYPE_WIFI
+
+
+class StandInAccessPoint(ServiceInterface):
+    def __init__(self, ssid, strength, flags, wpa_flags, rsn_flags):
+        super().__init__(NM_ACCESS_POINT)
+        self.ssid = ssid.encode()
+        self.strength = strength
+        self.flags = flags
+        self.wpa_flags = wpa_flags
+        self.rsn_flags = rsn_flags
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Ssid(self) -> "ay":  # noqa: F821
+        return self.ssid
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Strength(self) -> "y":  # noqa: F821
+        return self.strength
+
+    @dbus_property(access=PropertyAccess.READ)
+    def Flags(self) -> "u":  # noqa: F821
+        return self.flags
+
+    @dbus_property(access=PropertyAccess.READ)
+    def WpaFlags(self) -> "u":  # noqa: F821
+        return self.wpa_flags
+
+    @dbus_property(access=PropertyAccess.READ)
+    def RsnFlags(self) -> "u":  # noqa: F821
+        return self.rsn_flags
+
+
+class StandInWireless(ServiceInterface):
+    def __init__(self, bus):
+        super().__init__(NM_WIRELESS)
+        self.bus = bus
+        self.paths = []
+        self.last_scan = 1
+        self.scans = 0
+        self.add(CACHED)
+
+    def add(self, access_points):
+        for properties in access_points:
+            path = f"{NM_PATH}/AccessPoint/{len(self.paths)}"
+            self.bus.export(path, StandInAccessPoint(*properties))
+            self.paths.append(path)
+
+    @method()
+    def GetAllAccessPoints(self) -> "ao":  # noqa: F821
+        return self.paths
+
+    @method()
+    def RequestScan(self, options: "a{sv}"):  # noqa: F821
+        self.scans += 1
+        asyncio.get_running_loop().call_later(SCAN, self.finish_scan)
+
+    def finish_scan(self):
+        self.add(SCANNED)
+        self.last_scan += 1
+
+    @dbus_property(access=PropertyAccess.READ)
+    def LastScan(self) -> "x":  # noqa: F821
+        return self.last_scan
+
+
+class StandInSettings(ServiceInterface):
+    def __init__(self, bus):
+        super().__init__(NM_SETTINGS)
+        self.paths = []
+        for ssid in SAVED:
+            path = f"{NM_SETTINGS_PATH}/{len(self.paths)}"
+            bus.export(path, StandInConnection(ssid))
+            self.paths.append(path)
+
+    @method()
+    def ListConnections(self) -> "ao":  # noqa: F821
+        return self.paths
+
+
+class StandInConnection(ServiceInterface):
+    def __init__(self, ssid):
+        super().__init__(NM_CONNECTION)
+        self.ssid = ssid.encode()
+
+    @method()
+    def GetSettings(self) -> "a{sa{sv}}":  # noqa: F821
+        return {
+            "connection": {"type": Variant("s", "802-11-wireless")},
+            "802-11-wireless": {"ssid": Variant("ay", self.ssid)},
+        }
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    async def notify(self, summary, body="", **kwargs):
+        self.sent.append(summary)
+
+
+def run(address, test):
+    async def main():
+        bus = await MessageBus(bus_address=address).connect()
+        manager = StandInManager()
+        manager.wireless = StandInWireless(bus)
+        bus.export(NM_PATH, manager)
+        bus.export(DEVICE_PATH, StandInDevice())
+        bus.export(DEVICE_PATH, manager.wireless)
+        bus.export(NM_SETTINGS_PATH, StandInSettings(bus))
+        bus.export(ACTIVE_PATH, StandInActive())
+        await bus.request_name(NM)
+
+        menu = WifiMenu(FakeNotifier(), bus_address=address, scan_timeout=SCAN + 5)
+        try:
+            await test(menu, manager)
+        finally:
+            menu.disconnect()
+            bus.disconnect()
+
+    asyncio.run(main())
+
+
+def test_cached_rows_come_before_the_rescan(bus_address):
+    async def test(menu, manager):
+        device = await menu.wifi_device()
+        assert device == DEVICE_PATH
+        start = time.perf_counter()
+        rows, arrivals = [], []
+        async for row in menu.rows(device):
+            rows.append(row[2:])
+            arrivals.append(time.perf_counter() - start)
+        # strongest first, one row per SSID, hidden networks left out
+        assert rows == ["home", "cafe", "wpa3", "mixed", "old-router", "office"]
+        assert max(arrivals[:3]) < SCAN / 2
+        assert min(arrivals[3:]) >= SCAN
+
+    run(bus_address, test)
+
+
+def test_saved_connection_index(bus_address):
+    async def test(menu, manager):
+        assert await menu.saved_connections() == {"cafe": f"{NM_SETTINGS_PATH}/0"}
+
+    run(bus_address, test)
+
+
+@pytest.mark.parametrize(
+    "flags, wpa_flags, rsn_flags, expected",
+    [
+        (0, 0, 0, None),
+        (PRIVACY, 0, 0, "none"),
+        (PRIVACY, WPA2, 0, "wpa-psk"),
+        (PRIVACY, 0, WPA2, "wpa-psk"),
+        (PRIVACY, 0, WPA3, "sae"),
+        (PRIVACY, 0, WPA3_TRANSITION, "wpa-psk"),
+        (PRIVACY, 0, ENTERPRISE, "wpa-eap"),
+        (0, 0, OWE, "owe"),
+    ],
+)
+def test_key_mgmt(flags, wpa_flags, rsn_flags, expected):
+    assert key_mgmt(flags, wpa_flags, rsn_flags) == expected
+
+
+async def choose(menu, ssid, password="secret"):
+    async def ask():
+        return password
+
+    menu.password = ask
+    device = await menu.wifi_device()
+    await menu.access_points(device)
+    await menu.activate(device, f"x {ssid}", await menu.saved_connections())
+
+
+@pytest.mark.parametrize(
+    "ssid, security",
+    [
+        ("home", {"key-mgmt": "wpa-psk", "psk": "secret"}),
+        ("wpa3", {"key-mgmt": "sae", "psk": "secret"}),
+        (
+            "old-router",
+            {"key-mgmt": "none", "wep-key0": "secret", "wep-key-type": 1},
+        ),
+        ("open", None),
+    ],
+)
+def test_new_connection_security(bus_address, ssid, security):
+    async def test(menu, manager):
+        # the rescan's networks are known too
+        manager.wireless.finish_scan()
+        manager.wireless.add([("open", 10, 0, 0, 0)])
+        await choose(menu, ssid)
+        ((settings, device, specific),) = manager.added
+        assert settings.get("802-11-wireless-security") == security
+        assert device == DEVICE_PATH
+        assert specific.startswith(f"{NM_PATH}/AccessPoint/")
+        assert menu.notifier.sent == ["Connection Established"]
+
+    run(bus_address, test)
+
+
+def test_saved_connection_is_activated(bus_address):
+    async def test(menu, manager):
+        await choose(menu, "cafe")
+        assert manager.activated == [(f"{NM_SETTINGS_PATH}/0", DEVICE_PATH, "/")]
+        assert not manager.added
+
+    run(bus_address, test)
+
+
+@pytest.mark.parametrize("ssid", ["nowhere", "office"])
+def test_unusable_network_is_an_error(bus_address, ssid):
+    async def test(menu, manager):
+        manager.wireless.finish_scan()
+        await choose(menu, ssid)
+        assert not manager.added and not manager.activated
+        assert menu.notifier.sent == ["Connection Failed"]
+
+    run(bus_address, test)
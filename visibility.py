@@ -0,0 +1,134 @@
+"""Suspends widgets and services while nobody can see them"""
+import time
+
+from libqtile.log_utils import logger
+
+from providers import Subscriber
+
+
+def _skip_draw():
+    pass
+
+
+class Visibility:
+    """Tracks hiding conditions and suspends what they hide
+
+    A condition (a closed WidgetBox, a disabled output, the locked screen)
+    hides a dynamic set of widgets. Hidden widgets have their timers
+    cancelled, their sources paused and their draws skipped; when they become
+    visible again their timers are set up anew and their sources resumed,
+    which refreshes them immediately. Listeners such as the metrics sampler
+    are told whether all their conditions are clear.
+    """
+
+    def __init__(self):
+        self.hidden = set()
+        self.wakeups = 0
+        self._widgets = {}
+        self._listeners = []
+        self._suspended = set()
+        self._wrapped = set()
+        self._since = time.monotonic()
+
+    def add_widgets(self, condition, get_widgets):
+        """Registers a callable returning the widgets a condition hides"""
+        self._widgets[condition] = get_widgets
+
+    def add_listener(self, callback, *conditions):
+        """Calls back with True when none of the conditions hide anything"""
+        self._listeners.append((callback, conditions))
+        callback(not self.hidden.intersection(conditions))
+
+    def watch_box(self, name):
+        """Returns a WatchedWidgetBox observer hiding its widgets while closed"""
+        condition = f"box:{name}"
+
+        def observer(box):
+            self.add_widgets(condition, lambda: box.widgets)
+            self.set(condition, not box.box_is_open)
+
+        return observer
+
+    def set(self, condition, hidden):
+        if hidden == (condition in self.hidden):
+            return
+        if hidden:
+            self.hidden.add(condition)
+        else:
+            self.hidden.discard(condition)
+
+        self.refresh()
+        for callback, conditions in self._listeners:
+            if condition in conditions:
+                callback(not self.hidden.intersection(conditions))
+
+    def refresh(self):
+        """Suspends and resumes widgets to match the current conditions"""
+        hidden = set()
+        for condition in self.hidden:
+            if condition in self._widgets:
+                hidden.update(self._widgets[condition]())
+
+        known = set()
+        for get_widgets in self._widgets.values():
+            known.update(get_widgets())
+        for widget in known - self._wrapped:
+            self._wrap_timer(widget)
+
+        for widget in hidden - self._suspended:
+            self._suspend(widget)
+        bars = set()
+        for widget in self._suspended - hidden:
+            self._resume(widget)
+            if widget.configured:
+                bars.add(widget.bar)
+        for bar in bars:
+            bar.draw()
+
+    def _suspend(self, widget):
+        self._suspended.add(widget)
+        for future in widget._futures:
+            future.cancel()
+        widget._futures.clear()
+        widget.draw = _skip_draw
+        if isinstance(widget, Subscriber):
+            widget.pause_sources()
+
+    def _resume(self, widget):
+        self._suspended.discard(widget)
+        widget.__dict__.pop("draw", None)
+        if widget.configured:
+            # timers added while suspended (by a poll that was in flight) are
+            # dropped, so the one set up here is the only one
+            for future in widget._futures:
+                future.cancel()
+            widget._futures.clear()
+            widget.timer_setup()
+        if isinstance(widget, Subscriber):
+            widget.resume_sources()
+
+    def _wrap_timer(self, widget):
+        """Counts timer wakeups and drops those arriving while suspended"""
+        self._wrapped.add(widget)
+        timer_setup = widget.timer_setup
+
+        def wrapped():
+            if widget in self._suspended:
+                return
+            self.wakeups += 1
+            timer_setup()
+
+        widget.timer_setup = wrapped
+
+    def wakeups_per_minute(self, reset=False) -> float:
+        now = time.monotonic()
+        rate = self.wakeups / max(now - self._since, 1e-6) * 60
+        if reset:
+            self.wakeups = 0
+            self._since = now
+        return rate
+
+
+def log_wakeups(visibility, label):
+    rate = visibility.wakeups_per_minute(reset=True)
+    logger.info(f"Widget wakeups {label}: {rate:.1f} per minute")
@@ -0,0 +1,194 @@
+"""Volume control through a persistent sound server connection"""
+import asyncio
+import re
+
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+
+class PulseBackend:
+    """Talks to PulseAudio/PipeWire over one long-lived pulsectl connection"""
+
+    pulse = None
+
+    async def connect(self):
+        import pulsectl_asyncio
+
+        self.close()
+        self.pulse = pulsectl_asyncio.PulseAsync("qtile-config")
+        await self.pulse.connect()
+
+    def close(self):
+        if self.pulse is not None:
+            self.pulse.close()
+            self.pulse = None
+
+    async def _sink(self):
+        info = await self.pulse.server_info()
+        return await self.pulse.get_sink_by_name(info.default_sink_name)
+
+    async def change(self, delta: int) -> tuple[int, bool]:
+        sink = await self._sink()
+        level = min(max(round(sink.volume.value_flat * 100) + delta, 0), 100)
+        await self.pulse.volume_set_all_chans(sink, level / 100)
+        return level, bool(sink.mute)
+
+    async def set(self, level: int) -> tuple[int, bool]:
+        sink = await self._sink()
+        await self.pulse.volume_set_all_chans(sink, level / 100)
+        return level, bool(sink.mute)
+
+    async def toggle_mute(self) -> tuple[int, bool]:
+        sink = await self._sink()
+        muted = not sink.mute
+        await self.pulse.mute(sink, muted)
+        return round(sink.volume.value_flat * 100), muted
+
+    async def get(self) -> tuple[int, bool]:
+        sink = await self._sink()
+        return round(sink.volume.value_flat * 100), bool(sink.mute)
+
+
+class AmixerBackend:
+    """Fallback that runs one amixer process per applied change"""
+
+    STATE = re.compile(r"\[(\d+)%\](?:.*\[(on|off)\])?")
+
+    def __init__(self, control="Master", device="pulse"):
+        self.control = control
+        # like the old script, go through the sound server's ALSA plugin so
+        # the control is the one PulseAudio/PipeWire shows
+        self.device = device
+
+    async def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def _amixer(self, *args) -> tuple[int, bool]:
+        device = ("-D", self.device) if self.device else ()
+        proc = await asyncio.create_subprocess_exec(
+            "amixer", *device, *args, stdout=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(f"amixer {' '.join(args)} exited with {proc.returncode}")
+
+        # amixer prints the new state of the control after changing it
+        match = self.STATE.search(stdout.decode())
+        if match is None:
+            raise RuntimeError(f"Can't parse amixer output for {self.control}")
+        return int(match.group(1)), match.group(2) == "off"
+
+    async def change(self, delta: int) -> tuple[int, bool]:
+        sign = "+" if delta >= 0 else "-"
+        return await self._amixer("set", self.control, f"{abs(delta)}%{sign}")
+
+    async def set(self, level: int) -> tuple[int, bool]:
+        return await self._amixer("set", self.control, f"{level}%")
+
+    async def toggle_mute(self) -> tuple[int, bool]:
+        return await self._amixer("set", self.control, "toggle")
+
+    async def get(self) -> tuple[int, bool]:
+        return await self._amixer("sget", self.control)
+
+
+class VolumeController:
+    """Non-blocking volume control that coalesces repeated requests
+
+    Requests only update the pending state and return immediately. A single
+    task applies everything that piled up while the previous change was in
+    flight, so holding a volume key never queues more than one round-trip.
+    Subscribers are called with `(level, muted)` once the queue drains.
+    """
+
+    def __init__(self, step=5, backends=None):
+        self.step_size = step
+        self.backends = backends or [PulseBackend(), AmixerBackend()]
+        self.level = None
+        self.muted = False
+        self._backend = None
+        self._delta = 0
+        self._target = None
+        self._mute_toggles = 0
+        self._task = None
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def step(self, steps: int):
+        self._delta += steps * self.step_size
+        self._schedule()
+
+    def set(self, level: int):
+        self._target = min(max(level, 0), 100)
+        self._delta = 0
+        self._schedule()
+
+    def toggle_mute(self):
+        self._mute_toggles += 1
+        self._schedule()
+
+    def get(self) -> tuple[int | None, bool]:
+        """Returns the last known state without querying the sound server"""
+        return self.level, self.muted
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for backend in self.backends:
+            backend.close()
+        self._backend = None
+
+    def _schedule(self):
+        if self._task is None or self._task.done():
+            self._task = create_task(self._apply())
+
+    async def _connect(self):
+        if self._backend is not None:
+            return self._backend
+
+        for backend in self.backends:
+            try:
+                await backend.connect()
+                self.level, self.muted = await backend.get()
+            except Exception as e:
+                name = type(backend).__name__
+                logger.warning(f"Volume backend {name} unavailable: {e}")
+                continue
+            self._backend = backend
+            return backend
+
+        raise RuntimeError("No volume backend available")
+
+    async def _apply(self):
+        try:
+            backend = await self._connect()
+            while self._target is not None or self._delta or self._mute_toggles:
+                if self._target is not None:
+                    target, self._target = self._target, None
+                    self.level, self.muted = await backend.set(target)
+                if self._delta:
+                    delta, self._delta = self._delta, 0
+                    self.level, self.muted = await backend.change(delta)
+                if self._mute_toggles:
+                    toggles, self._mute_toggles = self._mute_toggles, 0
+                    if toggles % 2:
+                        self.level, self.muted = await backend.toggle_mute()
+        except Exception:
+            logger.exception("Failed to change volume")
+            # the sound server may have restarted: reconnect, or fall back,
+            # on the next change
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+            self._delta = self._mute_toggles = 0
+            self._target = None
+            return
+
+        for callback in self._callbacks:
+            callback(self.level, self.muted)
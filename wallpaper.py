@@ -0,0 +1,108 @@
+"""Wallpaper scaled once per output size and cached in memory and on disk"""
+import hashlib
+import os
+
+import cairocffi
+
+if "_digests" not in globals():
+    # qtile reloads this module with the config, the caches are kept
+    # (path, mtime, size) -> digest
+    _digests = {}
+    # (digest, width, height) -> scaled surface
+    _surfaces = {}
+
+
+def digest(path) -> str:
+    stat = os.stat(path)
+    key = path, stat.st_mtime_ns, stat.st_size
+    if key not in _digests:
+        with open(path, "rb") as f:
+            _digests[key] = hashlib.file_digest(f, "sha256").hexdigest()[:16]
+    return _digests[key]
+
+
+class WallpaperCache:
+    """Hands out surfaces of a PNG wallpaper pre-scaled to each output size
+
+    Scaled copies are keyed by the source's content hash and the output size,
+    kept in memory for the outputs in use and as PNGs on disk, so outputs of
+    equal size share one surface and a copy is only rendered again when the
+    wallpaper file or the output size changes. The source is decoded once,
+    when a size is first rendered.
+    """
+
+    def __init__(self, source, cache_dir):
+        self.source = os.path.expanduser(source)
+        self.cache_dir = cache_dir
+        self.rendered = 0
+        self.decoded = 0
+
+    def path(self, width, height) -> str:
+        return os.path.join(
+            self.cache_dir, f"{digest(self.source)}-{width}x{height}.png"
+        )
+
+    def surface(self, width, height) -> cairocffi.ImageSurface:
+        key = digest(self.source), width, height
+        if key not in _surfaces:
+            path = self.path(width, height)
+            if os.path.exists(path):
+                _surfaces[key] = cairocffi.ImageSurface.create_from_png(path)
+                self.decoded += 1
+            else:
+                _surfaces[key] = self.render(path, width, height)
+        return _surfaces[key]
+
+    def render(self, path, width, height) -> cairocffi.ImageSurface:
+        """Stretches the source to width x height, like wallpaper_mode stretch"""
+        image = cairocffi.ImageSurface.create_from_png(self.source)
+        self.decoded += 1
+        surface = cairocffi.ImageSurface(cairocffi.FORMAT_RGB24, width, height)
+        ctx = cairocffi.Context(surface)
+        ctx.scale(width / image.get_width(), height / image.get_height())
+        ctx.set_source_surface(image)
+        ctx.get_source().set_filter(cairocffi.FILTER_BEST)
+        ctx.paint()
+        surface.flush()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = f"{path}.tmp"
+        surface.write_to_png(temporary)
+        os.replace(temporary, path)
+        self.rendered += 1
+        return surface
+
+    async def paint(self, screens, run_blocking):
+        """Paints every screen with the surface matching its size
+
+        Screens are always repainted: the X11 root pixmap is recreated blank
+        when the root window changes size. Other backends only paint files,
+        they are given the scaled copy on disk.
+        """
+        used = set()
+        for screen in screens:
+            size = screen.width, screen.height
+            surface = await run_blocking(self.surface, *size)
+            used.add((digest(self.source), *size))
+            painter = screen.qtile.core.painter
+            if hasattr(painter, "_get_root_pixmap_and_surface"):
+                paint_root(painter, screen, surface)
+            else:
+                screen.set_wallpaper(self.path(*size), None)
+        for key in _surfaces.keys() - used:
+            del _surfaces[key]
+
+
+def paint_root(painter, screen, surface):
+    """Paints a surface on a screen's part of the X11 root pixmap
+
+    What qtile's X11 painter does with the file it decodes.
+    """
+    root_pixmap, root = painter._get_root_pixmap_and_surface(screen)
+    with cairocffi.Context(root) as ctx:
+        ctx.rectangle(screen.x, screen.y, screen.width, screen.height)
+        ctx.clip()
+        ctx.set_source_surface(surface, screen.x, screen.y)
+        ctx.paint()
+    root.finish()
+    painter._update_root_pixmap(root_pixmap)
@@ -0,0 +1,170 @@
+"""Weather provider backed by an on-disk cache"""
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+from libqtile.log_utils import logger
+
+from providers import Provider
+
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+# the key libqtile's OpenWeather widget ships with
+OPENWEATHER_KEY = "7834197c2338888258f8cb94ae14ef49"
+
+
+def cache_dir() -> str:
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "qtile")
+
+
+@dataclass(frozen=True)
+class Response:
+    status: int  # 200, or 304 when the cached data is still current
+    data: dict | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class HttpBackend:
+    """Fetches JSON with conditional requests, from a blocking thread"""
+
+    def __init__(self, url, params=None, timeout=10):
+        self.url = url
+        if params:
+            self.url += "?" + urllib.parse.urlencode(params)
+        self.timeout = timeout
+
+    def fetch(self, etag=None, last_modified=None) -> Response:
+        # imported with the first request (and ssl with it), not at startup
+        import urllib.error
+        import urllib.request
+
+        request = urllib.request.Request(self.url)
+        if etag:
+            request.add_header("If-None-Match", etag)
+        if last_modified:
+            request.add_header("If-Modified-Since", last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return Response(
+                    response.status,
+                    json.load(response),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return Response(304, etag=etag, last_modified=last_modified)
+            raise
+
+
+class OpenWeatherBackend(HttpBackend):
+    def __init__(
+        self, location, app_key=OPENWEATHER_KEY, units="metric", url=OPENWEATHER_URL
+    ):
+        HttpBackend.__init__(self, url, dict(q=location, appid=app_key, units=units))
+
+
+@dataclass(frozen=True)
+class Weather:
+    data: dict
+    fetched: float  # time.time() of the last successful request
+    stale: bool = False
+
+
+class WeatherProvider(Provider):
+    """Publishes weather data from a cache refreshed every `ttl` seconds
+
+    The cached data is published as soon as the provider starts, so the bar
+    never waits on the network. Requests are conditional on the cached
+    validators. When they fail, the last known data stays up, marked stale
+    once it outlives `ttl`, and retries back off exponentially up to
+    `max_backoff` seconds.
+    """
+
+    def __init__(self, backend, cache_path, ttl=600, retry=30, max_backoff=3600):
+        Provider.__init__(self)
+        self.backend = backend
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retry = retry
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self._cache = None
+
+    async def run(self):
+        # like urllib in the backend, not imported at startup (it loads ssl)
+        from http.client import HTTPException
+
+        if self._cache is None:
+            self._cache = self.load()
+        while True:
+            if self._cache is not None:
+                age = time.time() - self._cache["fetched"]
+                self.publish(self.weather(stale=age > self.ttl))
+                if age < self.ttl:
+                    await asyncio.sleep(self.ttl - age)
+                    continue
+
+            try:
+                self.reads += 1
+                response = await asyncio.to_thread(
+                    self.backend.fetch,
+                    self._cache and self._cache["etag"],
+                    self._cache and self._cache["last_modified"],
+                )
+            except (OSError, ValueError, HTTPException) as e:
+                delay = min(self.retry * 2**self.failures, self.max_backoff)
+                self.failures += 1
+                logger.warning(f"Weather request failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            self.failures = 0
+            self.store(response)
+
+    def weather(self, stale=False) -> Weather:
+        return Weather(self._cache["data"], self._cache["fetched"], stale)
+
+    def store(self, response):
+        if response.status == 304 and self._cache is not None:
+            data = self._cache["data"]
+        else:
+            data = response.data
+        self._cache = dict(
+            data=data,
+            fetched=time.time(),
+            etag=response.etag,
+            last_modified=response.last_modified,
+        )
+        temporary = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temporary, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(temporary, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to write the weather cache: {e}")
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring the weather cache: {e}")
+            return None
+
+
+def open_weather(location, **config) -> WeatherProvider:
+    """Returns a provider for OpenWeather's current weather at `location`"""
+    name = urllib.parse.quote(location.lower(), safe="")
+    return WeatherProvider(
+        OpenWeatherBackend(location),
+        os.path.join(cache_dir(), f"weather-{name}.json"),
+        **config,
+    )
@@ -0,0 +1,545 @@
+"""Custom bar widgets fed by the config's shared services
+
+They are plain libqtile widgets; build them with `qtile_extras.widget.modify`
+so they accept decorations like the rest of the bar.
+"""
+import time
+
+from libqtile import bar
+from libqtile.command.base import expose_command
+from libqtile.log_utils import logger
+from libqtile.widget import base
+from libqtile.widget.widgetbox import WidgetBox
+
+import clockface
+from osd import draw as draw_level
+from providers import Subscriber
+
+
+class BatteryText(Subscriber, base._TextBox):
+    """Battery text driven by a PowerMonitor instead of its own polling"""
+
+    defaults = [
+        ("monitor", None, "PowerMonitor publishing the battery state"),
+        ("format", "{char} {percent:2.0%}", "Display format"),
+        ("charge_char", "^", "Character shown while charging"),
+        ("discharge_char", "V", "Character shown while discharging"),
+        ("empty_char", "x", "Character shown when the battery is empty"),
+        ("full_char", "=", "Character shown when the battery is full"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(BatteryText.defaults)
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self.subscribe_to(self.monitor, self.on_battery)
+
+    def on_battery(self, state):
+        if state.full:
+            char = self.full_char
+        elif state.charging:
+            char = self.charge_char
+        elif state.percent <= 0:
+            char = self.empty_char
+        else:
+            char = self.discharge_char
+        self.update(self.format.format(char=char, percent=state.percent / 100))
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._TextBox.finalize(self)
+
+
+class BatteryGauge(Subscriber, base._Widget):
+    """Battery icon driven by a PowerMonitor, drawn like UPowerWidget"""
+
+    defaults = [
+        ("monitor", None, "PowerMonitor publishing the battery state"),
+        ("battery_width", 20, "Width of the battery icon"),
+        ("battery_height", 10, "Height of the battery icon"),
+        ("margin", 2, "Space around the battery icon"),
+        ("border_colour", "dbdbe0", "Border colour"),
+        ("border_charge_colour", "8fbcbb", "Border colour while charging"),
+        ("border_critical_colour", "cc0000", "Border colour when critical"),
+        ("fill_normal", "dbdbe0", "Fill colour"),
+        ("fill_low", "aa00aa", "Fill colour when low"),
+        ("fill_critical", "cc0000", "Fill colour when critical"),
+        ("fill_charge", None, "Fill colour while charging, fill_normal if None"),
+        ("percentage_low", 0.4, "Fraction below which the battery is low"),
+        ("percentage_critical", 0.2, "Fraction below which it is critical"),
+    ]
+
+    TIP_WIDTH = 2
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, bar.CALCULATED, **config)
+        self.add_defaults(BatteryGauge.defaults)
+        self.state = None
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.subscribe_to(self.monitor, self.on_battery)
+
+    def calculate_length(self):
+        return self.battery_width + self.TIP_WIDTH + 2 * self.margin
+
+    def on_battery(self, state):
+        self.state = state
+        self.draw()
+
+    def colours(self, fraction) -> tuple[str, str]:
+        if self.state.charging:
+            return self.border_charge_colour, self.fill_charge or self.fill_normal
+        if fraction <= self.percentage_critical:
+            return self.border_critical_colour, self.fill_critical
+        if fraction <= self.percentage_low:
+            return self.border_colour, self.fill_low
+        return self.border_colour, self.fill_normal
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        if self.state is not None:
+            fraction = min(max(self.state.percent / 100, 0), 1)
+            border, fill = self.colours(fraction)
+            x = self.margin
+            y = (self.bar.height - self.battery_height) / 2
+            ctx = self.drawer.ctx
+
+            self.drawer.set_source_rgb(border)
+            ctx.set_line_width(1)
+            ctx.rectangle(x + 0.5, y + 0.5, self.battery_width, self.battery_height)
+            ctx.stroke()
+            ctx.rectangle(
+                x + self.battery_width + 1,
+                y + self.battery_height / 4,
+                self.TIP_WIDTH - 1,
+                self.battery_height / 2,
+            )
+            ctx.fill()
+
+            self.drawer.set_source_rgb(fill)
+            ctx.rectangle(
+                x + 2,
+                y + 2,
+                (self.battery_width - 3) * fraction,
+                self.battery_height - 3,
+            )
+            ctx.fill()
+
+        self.drawer.draw(offsetx=self.offset, offsety=self.offsety, width=self.length)
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._Widget.finalize(self)
+
+
+class ClockText(Subscriber, base._TextBox):
+    """Clock text driven by a shared ClockProvider, redrawn when it changes"""
+
+    defaults = [
+        ("clock", None, "ClockProvider publishing the time"),
+        ("format", "%H:%M", "strftime format"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(ClockText.defaults)
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self.subscribe_to(self.clock, self.on_tick, format=self.format)
+
+    def on_tick(self, now):
+        self.update(now.strftime(self.format))
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._TextBox.finalize(self)
+
+
+class AnalogueClock(Subscriber, base._Widget):
+    """Analogue clock driven by a shared ClockProvider
+
+    Takes the options of qtile_extras' AnalogueClock without the seconds
+    hand. The face is rendered once per size and colours and only the hands
+    are drawn on top of it, when the clock calls back once a minute.
+    """
+
+    defaults = [
+        ("clock", None, "ClockProvider publishing the time"),
+        ("face_shape", "circle", "Face shape, 'circle' or 'square'"),
+        ("face_background", "ffffff", "Face colour"),
+        ("face_border_colour", "ffffff", "Face border colour"),
+        ("face_border_width", 0, "Face border width, 0 for no border"),
+        ("hour_colour", "000000", "Hour hand colour"),
+        ("hour_size", 2, "Hour hand width"),
+        ("hour_length", 0.75, "Hour hand length as a fraction of the radius"),
+        ("minute_colour", "000000", "Minute hand colour"),
+        ("minute_size", 2, "Minute hand width"),
+        ("minute_length", 0.9, "Minute hand length as a fraction of the radius"),
+        ("margin", 2, "Space around the face"),
+        ("adjust_x", 0, "Horizontal offset of the face"),
+        ("adjust_y", 0, "Vertical offset of the face"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, bar.CALCULATED, **config)
+        self.add_defaults(AnalogueClock.defaults)
+        self.now = None
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.face = (
+            self.face_shape,
+            self.face_background,
+            self.face_border_colour,
+            self.face_border_width,
+        )
+        self.hands = dict(
+            hour_colour=self.hour_colour,
+            hour_size=self.hour_size,
+            hour_length=self.hour_length,
+            minute_colour=self.minute_colour,
+            minute_size=self.minute_size,
+            minute_length=self.minute_length,
+        )
+        self.subscribe_to(self.clock, self.on_tick, format="%H:%M")
+
+    def calculate_length(self):
+        return self.bar.height if self.bar else 0
+
+    def on_tick(self, now):
+        self.now = now
+        self.draw()
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        diameter = int(self.bar.height - 2 * self.margin)
+        if self.now is not None and diameter > 0:
+            clockface.draw_clock(
+                self.drawer.ctx,
+                (self.length - diameter) / 2 + self.adjust_x,
+                self.margin + self.adjust_y,
+                diameter,
+                self.now,
+                self.face,
+                self.hands,
+            )
+        self.drawer.draw(offsetx=self.offset, offsety=self.offsety, width=self.length)
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._Widget.finalize(self)
+
+
+class MetricText(Subscriber, base._TextBox):
+    """Text showing values from a shared SystemSampler"""
+
+    defaults = [
+        ("sampler", None, "SystemSampler publishing the samples"),
+        ("format", "{}", "Display format"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(MetricText.defaults)
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self.subscribe_to(self.sampler, self.on_sample)
+
+    def values(self, sample) -> dict:
+        raise NotImplementedError
+
+    def on_sample(self, sample):
+        text = self.format.format(**self.values(sample))
+        if text != self.text:
+            self.update(text)
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._TextBox.finalize(self)
+
+
+class NetText(MetricText):
+    """Network throughput, with the same format fields as widget.Net"""
+
+    UNITS = ["B", "kB", "MB", "GB", "TB"]
+
+    def values(self, sample) -> dict:
+        down, down_suffix = self.convert(sample.net_down)
+        up, up_suffix = self.convert(sample.net_up)
+        return dict(down=down, down_suffix=down_suffix, up=up, up_suffix=up_suffix)
+
+    def convert(self, value) -> tuple[float, str]:
+        power = 0
+        while value >= 1000 and power < len(self.UNITS) - 1:
+            value /= 1000
+            power += 1
+        return value, self.UNITS[power]
+
+
+class CpuText(MetricText):
+    """CPU load, with the same format fields as widget.CPU"""
+
+    def values(self, sample) -> dict:
+        return dict(load_percent=round(sample.cpu_percent, 1))
+
+
+class MemoryText(MetricText):
+    """Memory usage, with the same format fields as widget.Memory"""
+
+    def values(self, sample) -> dict:
+        return dict(MemPercent=round(sample.mem_percent, 1))
+
+
+class DiskText(MetricText):
+    """Free disk space, with the same format fields as widget.DF"""
+
+    defaults = [
+        ("measure", "G", "Measurement (G, M, B)"),
+        ("warn_color", "ff0000", "Text colour when free space is low"),
+        ("warn_space", 2, "Free space (in `measure` units) below which to warn"),
+    ]
+    MEASURES = {"G": 1024**3, "M": 1024**2, "B": 1024}
+
+    def __init__(self, **config):
+        MetricText.__init__(self, **config)
+        self.add_defaults(DiskText.defaults)
+
+    def values(self, sample) -> dict:
+        calc = self.MEASURES[self.measure]
+        size = sample.disk_size // calc
+        user_free = sample.disk_free // calc
+        self.layout.colour = (
+            self.warn_color if user_free <= self.warn_space else self.foreground
+        )
+        return dict(
+            s=size,
+            uf=user_free,
+            m=self.measure,
+            r=(size - user_free) / size * 100 if size else 0,
+        )
+
+
+class OsdBar(Subscriber, base._Widget):
+    """Level bar shown in place by an Osd, hidden again after `timeout`
+
+    It takes no space while hidden. The bar is only laid out again when it
+    appears or hides, updates in between redraw this widget alone.
+    """
+
+    defaults = [
+        ("osd", None, "Osd publishing the levels"),
+        ("width", 160, "Width while shown"),
+        ("timeout", 1.5, "Seconds after the last update before hiding"),
+        ("font", "sans", "Icon font"),
+        ("fontsize", 16, "Icon size"),
+        ("foreground", "ffffff", "Icon and level colour"),
+        ("track_colour", "555555", "Colour of the empty part of the level bar"),
+        ("padding", 6, "Space around the icon and the level bar"),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, bar.CALCULATED, **config)
+        self.add_defaults(OsdBar.defaults)
+        self.state = None
+        self.frames = 0
+        self._hide = None
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.subscribe_to(self.osd, self.on_update)
+
+    def calculate_length(self):
+        return self.width if self.state is not None else 0
+
+    def on_update(self, update):
+        shown = self.state is not None
+        self.state = update
+        if self._hide is not None:
+            self._hide.cancel()
+        self._hide = self.timeout_add(self.timeout, self.hide)
+        if shown:
+            self.draw()
+        else:
+            self.bar.draw()
+
+    def hide(self):
+        self._hide = None
+        self.state = None
+        self.bar.draw()
+
+    def draw(self):
+        if self.state is None:
+            return
+        background = self.background or self.bar.background
+        draw_level(
+            self.drawer.ctx,
+            self.length,
+            self.bar.height,
+            self.state,
+            (background, self.foreground, self.track_colour),
+            self.font,
+            self.fontsize,
+            self.padding,
+        )
+        self.frames += 1
+        self.drawer.draw(offsetx=self.offset, offsety=self.offsety, width=self.length)
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._Widget.finalize(self)
+
+
+class WeatherText(Subscriber, base._TextBox):
+    """Weather text driven by a WeatherProvider
+
+    The format takes the fields of the response flattened with underscores
+    (`main_temp`, `weather_0_description`...) and the shorthands `temp`,
+    `humidity`, `location_city` and `weather_details`.
+    """
+
+    defaults = [
+        ("weather", None, "WeatherProvider publishing the weather"),
+        ("format", "{location_city}: {temp}°C {weather_details}", "Display format"),
+        ("stale_foreground", None, "Text colour while the data is outdated"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(WeatherText.defaults)
+
+    def _configure(self, qtile, bar):
+        base._TextBox._configure(self, qtile, bar)
+        self.subscribe_to(self.weather, self.on_weather)
+
+    def on_weather(self, weather):
+        fields = flatten(weather.data)
+        fields.update(
+            temp=round(fields.get("main_temp", 0)),
+            humidity=fields.get("main_humidity", ""),
+            location_city=fields.get("name", ""),
+            weather_details=fields.get("weather_0_description", ""),
+        )
+        if weather.stale and self.stale_foreground:
+            self.layout.colour = self.stale_foreground
+        else:
+            self.layout.colour = self.foreground
+        try:
+            self.update(self.format.format(**fields))
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"Invalid weather format: {e}")
+
+    def finalize(self):
+        self.unsubscribe_all()
+        base._TextBox.finalize(self)
+
+
+def flatten(data, prefix="") -> dict:
+    if isinstance(data, list):
+        data = dict(enumerate(data))
+    if not isinstance(data, dict):
+        return {prefix[:-1]: data}
+    fields = {}
+    for key, value in data.items():
+        fields.update(flatten(value, f"{prefix}{key}_"))
+    return fields
+
+
+class InstrumentationCommands(base._Widget):
+    """Zero-width widget exposing an Instrumentation to qtile's command API
+
+    qtile cmd-obj -o widget instrumentation -f stats
+    qtile cmd-obj -o widget instrumentation -f keys
+    """
+
+    defaults = [
+        ("instrumentation", None, "Instrumentation to expose"),
+        ("coalescers", {}, "Key coalescers by name, whose counters `keys` returns"),
+    ]
+
+    def __init__(self, **config):
+        config.setdefault("name", "instrumentation")
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(InstrumentationCommands.defaults)
+
+    def draw(self):
+        pass
+
+    @expose_command()
+    def stats(self) -> dict:
+        """Returns the histograms recorded so far"""
+        return self.instrumentation.report()
+
+    @expose_command()
+    def keys(self) -> dict:
+        """Returns the presses, changes and notifications of each coalescer"""
+        return {name: dict(keys.counters) for name, keys in self.coalescers.items()}
+
+    @expose_command()
+    def enable(self):
+        self.instrumentation.set_enabled(True)
+
+    @expose_command()
+    def disable(self):
+        self.instrumentation.set_enabled(False)
+
+    @expose_command()
+    def reset(self):
+        self.instrumentation.reset()
+
+
+class WatchedWidgetBox(WidgetBox):
+    """WidgetBox that tells observers when it opens or closes
+
+    `widgets` may also be given as widget specs, which are only built (and
+    their modules imported) when the box first opens.
+    """
+
+    defaults = [
+        ("observers", [], "Callables called with the box when it toggles"),
+    ]
+
+    def __init__(self, **config):
+        WidgetBox.__init__(self, **config)
+        self.add_defaults(WatchedWidgetBox.defaults)
+        self._specs = []
+        if self.widgets and all(hasattr(w, "build") for w in self.widgets):
+            self._specs, self.widgets = list(self.widgets), []
+
+    def _configure(self, qtile, bar):
+        WidgetBox._configure(self, qtile, bar)
+        self.notify_observers()
+
+    @expose_command()
+    def toggle(self):
+        if self._specs and not self.box_is_open:
+            self.build_widgets()
+        WidgetBox.toggle(self)
+        self.notify_observers()
+
+    def build_widgets(self):
+        """Builds and configures the deferred widgets, as WidgetBox does"""
+        start = time.perf_counter()
+        self.widgets = [spec.build() for spec in self._specs]
+        self._specs = []
+        for w in self.widgets:
+            self.qtile.register_widget(w)
+            w._configure(self.qtile, self.bar)
+            w.offsety = self.bar.border_width[0]
+            # drawn off screen until the box shows it
+            w.offsetx = self.bar.width
+            self.qtile.call_soon(w.draw)
+            w.configured = True
+            w.drawer.disable()
+        logger.debug(
+            f"{self.name}: built {len(self.widgets)} widgets in "
+            f"{(time.perf_counter() - start) * 1e3:.1f} ms"
+        )
+
+    def notify_observers(self):
+        for observer in self.observers:
+            observer(self)
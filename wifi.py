@@ -0,0 +1,352 @@
+"""Wi-Fi menu talking to NetworkManager over D-Bus"""
+import asyncio
+import subprocess
+from dataclasses import dataclass
+
+from dbus_next import BusType, Message, MessageType, Variant
+from dbus_next.aio import MessageBus
+from libqtile.log_utils import logger
+from libqtile.utils import create_task
+
+NM = "org.freedesktop.NetworkManager"
+NM_PATH = "/org/freedesktop/NetworkManager"
+NM_DEVICE = f"{NM}.Device"
+NM_WIRELESS = f"{NM}.Device.Wireless"
+NM_ACCESS_POINT = f"{NM}.AccessPoint"
+NM_ACTIVE = f"{NM}.Connection.Active"
+NM_SETTINGS = f"{NM}.Settings"
+NM_SETTINGS_PATH = f"{NM_PATH}/Settings"
+NM_CONNECTION = f"{NM}.Settings.Connection"
+PROPERTIES = "org.freedesktop.DBus.Properties"
+
+DEVICE_TYPE_WIFI = 2
+ACTIVE_ACTIVATED = 2
+ACTIVE_DEACTIVATED = 4
+AP_FLAGS_PRIVACY = 1
+# key management bits of an access point's WpaFlags and RsnFlags
+AP_SEC_KEY_MGMT_PSK = 0x100
+AP_SEC_KEY_MGMT_802_1X = 0x200
+AP_SEC_KEY_MGMT_SAE = 0x400
+AP_SEC_KEY_MGMT_OWE = 0x800
+AP_SEC_KEY_MGMT_OWE_TM = 0x1000
+WEP_KEY_TYPE_KEY = 1
+
+SECURED = ""
+OPEN = ""
+ENABLE = "󰖩  Enable Wi-Fi"
+DISABLE = "󰖪  Disable Wi-Fi"
+
+ROFI = ("rofi", "-dmenu", "-i", "-async-pre-read", "0", "-selected-row", "1")
+
+
+@dataclass(frozen=True)
+class AccessPoint:
+    path: str
+    ssid: str
+    strength: int
+    key_mgmt: str | None  # the 802-11-wireless-security key-mgmt, None if open
+
+    @property
+    def secured(self) -> bool:
+        return self.key_mgmt not in (None, "owe")
+
+    @property
+    def row(self) -> str:
+        return f"{SECURED if self.secured else OPEN} {self.ssid}"
+
+
+def key_mgmt(flags, wpa_flags, rsn_flags) -> str | None:
+    """Returns the key management NetworkManager needs for an access point"""
+    security = wpa_flags | rsn_flags
+    if security & AP_SEC_KEY_MGMT_PSK:
+        # WPA/WPA2, and WPA3 transition mode which also accepts a PSK
+        return "wpa-psk"
+    if security & AP_SEC_KEY_MGMT_SAE:
+        return "sae"
+    if security & AP_SEC_KEY_MGMT_802_1X:
+        return "wpa-eap"
+    if security & (AP_SEC_KEY_MGMT_OWE | AP_SEC_KEY_MGMT_OWE_TM):
+        return "owe"
+    if flags & AP_FLAGS_PRIVACY:
+        # privacy without WPA is WEP, with static keys
+        return "none"
+    return None
+
+
+def security_settings(key_mgmt, password=None) -> dict:
+    """Returns the 802-11-wireless-security settings of a new connection"""
+    settings = {"key-mgmt": Variant("s", key_mgmt)}
+    if key_mgmt == "none":
+        settings["wep-key0"] = Variant("s", password)
+        settings["wep-key-type"] = Variant("u", WEP_KEY_TYPE_KEY)
+    elif password is not None:
+        settings["psk"] = Variant("s", password)
+    return settings
+
+
+class WifiMenu:
+    """Rofi menu of Wi-Fi networks, shown without waiting for a rescan
+
+    The access points NetworkManager already knows are listed at once, a
+    rescan is requested in the background and networks it finds are
+    streamed into the open menu. Saved connections are looked up in an SSID
+    index built while the menu is open.
+    """
+
+    def __init__(self, notifier, bus_address=None, rofi=ROFI, scan_timeout=10):
+        self.notifier = notifier
+        self.bus_address = bus_address
+        self.rofi = rofi
+        self.scan_timeout = scan_timeout
+        self._bus = None
+        self._device = None
+        self._access_points = {}
+
+    async def _connect(self) -> MessageBus:
+        if self._bus is None or not self._bus.connected:
+            if self.bus_address is None:
+                bus = MessageBus(bus_type=BusType.SYSTEM)
+            else:
+                bus = MessageBus(bus_address=self.bus_address)
+            self._bus = await bus.connect()
+        return self._bus
+
+    async def call(self, path, interface, member, signature="", body=()):
+        bus = await self._connect()
+        reply = await bus.call(
+            Message(
+                destination=NM,
+                path=path,
+                interface=interface,
+                member=member,
+                signature=signature,
+                body=list(body),
+            )
+        )
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{reply.error_name}: {reply.body}")
+        return reply.body
+
+    async def properties(self, path, interface) -> dict:
+        (values,) = await self.call(path, PROPERTIES, "GetAll", "s", [interface])
+        return {name: variant.value for name, variant in values.items()}
+
+    async def wifi_device(self) -> str | None:
+        if self._device is None:
+            (devices,) = await self.call(NM_PATH, NM, "GetDevices")
+            for device in devices:
+                properties = await self.properties(device, NM_DEVICE)
+                if properties["DeviceType"] == DEVICE_TYPE_WIFI:
+                    self._device = device
+                    break
+        return self._device
+
+    async def access_points(self, device) -> list[AccessPoint]:
+        """Lists known access points, strongest first, one per SSID"""
+        (paths,) = await self.call(device, NM_WIRELESS, "GetAllAccessPoints")
+        for path in paths:
+            if path not in self._access_points:
+                properties = await self.properties(path, NM_ACCESS_POINT)
+                self._access_points[path] = AccessPoint(
+                    path,
+                    properties["Ssid"].decode(errors="replace"),
+                    properties["Strength"],
+                    key_mgmt(
+                        properties["Flags"],
+                        properties["WpaFlags"],
+                        properties["RsnFlags"],
+                    ),
+                )
+
+        strongest = {}
+        for path in paths:
+            ap = self._access_points[path]
+            best = strongest.get(ap.ssid)
+            if ap.ssid and (best is None or ap.strength > best.strength):
+                strongest[ap.ssid] = ap
+        return sorted(strongest.values(), key=lambda ap: -ap.strength)
+
+    async def saved_connections(self) -> dict[str, str]:
+        """Returns the saved Wi-Fi connection path of each SSID"""
+        index = {}
+        (paths,) = await self.call(NM_SETTINGS_PATH, NM_SETTINGS, "ListConnections")
+        for path in paths:
+            (settings,) = await self.call(path, NM_CONNECTION, "GetSettings")
+            wireless = settings.get("802-11-wireless")
+            if wireless and "ssid" in wireless:
+                index[bytes(wireless["ssid"].value).decode(errors="replace")] = path
+        return index
+
+    async def wifi_enabled(self) -> bool:
+        (enabled,) = await self.call(
+            NM_PATH, PROPERTIES, "Get", "ss", [NM, "WirelessEnabled"]
+        )
+        return enabled.value
+
+    async def set_wifi_enabled(self, enabled):
+        await self.call(
+            NM_PATH,
+            PROPERTIES,
+            "Set",
+            "ssv",
+            [NM, "WirelessEnabled", Variant("b", enabled)],
+        )
+
+    async def rows(self, device):
+        """Yields menu rows: cached networks first, then those a scan finds"""
+        sent = set()
+        for ap in await self.access_points(device):
+            sent.add(ap.ssid)
+            yield ap.row
+
+        (last_scan,) = await self.call(
+            device, PROPERTIES, "Get", "ss", [NM_WIRELESS, "LastScan"]
+        )
+        try:
+            await self.call(device, NM_WIRELESS, "RequestScan", "a{sv}", [{}])
+        except RuntimeError as e:
+            # e.g. a scan was requested moments ago, the cached list is fresh
+            logger.info(f"Wi-Fi rescan not started: {e}")
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.scan_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(0.5)
+            for ap in await self.access_points(device):
+                if ap.ssid not in sent:
+                    sent.add(ap.ssid)
+                    yield ap.row
+            (scan,) = await self.call(
+                device, PROPERTIES, "Get", "ss", [NM_WIRELESS, "LastScan"]
+            )
+            if scan.value != last_scan.value:
+                return
+
+    async def choose(self, device, enabled) -> str:
+        rofi = await asyncio.create_subprocess_exec(
+            *self.rofi,
+            "-p",
+            "Wi-Fi SSID: ",
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+        async def feed():
+            try:
+                rofi.stdin.write(f"{DISABLE if enabled else ENABLE}\n".encode())
+                if enabled:
+                    async for row in self.rows(device):
+                        rofi.stdin.write(f"{row}\n".encode())
+                        await rofi.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # a network was chosen before the scan finished
+            except RuntimeError as e:
+                logger.warning(f"Failed to list Wi-Fi networks: {e}")
+            finally:
+                rofi.stdin.close()
+
+        # stdin stays open while rows are streamed, unlike with communicate()
+        feeder = create_task(feed())
+        try:
+            stdout = await rofi.stdout.read()
+            await rofi.wait()
+        finally:
+            feeder.cancel()
+            if rofi.returncode is None:
+                rofi.kill()
+        return stdout.decode().strip()
+
+    async def password(self) -> str:
+        rofi = await asyncio.create_subprocess_exec(
+            *self.rofi,
+            "-password",
+            "-p",
+            "Password: ",
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+        )
+        stdout, _ = await rofi.communicate()
+        return stdout.decode().rstrip("\n")
+
+    async def run(self):
+        device = await self.wifi_device()
+        if device is None:
+            logger.warning("No Wi-Fi device found")
+            return
+
+        saved = create_task(self.saved_connections())
+        try:
+            chosen = await self.choose(device, await self.wifi_enabled())
+            if chosen in (ENABLE, DISABLE):
+                await self.set_wifi_enabled(chosen == ENABLE)
+            elif chosen:
+                await self.activate(device, chosen, await saved)
+        finally:
+            saved.cancel()
+
+    async def activate(self, device, chosen, saved):
+        ssid = chosen[2:]
+        if ssid in saved:
+            (active,) = await self.call(
+                NM_PATH, NM, "ActivateConnection", "ooo", [saved[ssid], device, "/"]
+            )
+        else:
+            ap = next(
+                (ap for ap in self._access_points.values() if ap.ssid == ssid), None
+            )
+            if ap is None or ap.key_mgmt == "wpa-eap":
+                reason = "was not found" if ap is None else "needs 802.1X settings"
+                await self.notifier.notify(
+                    "Connection Failed",
+                    f'The Wi-Fi network "{ssid}" {reason}.',
+                    tag="wifi",
+                )
+                return
+
+            settings = {}
+            if ap.key_mgmt is not None:
+                password = None
+                if ap.secured:
+                    password = await self.password()
+                    if not password:
+                        return
+                settings["802-11-wireless-security"] = security_settings(
+                    ap.key_mgmt, password
+                )
+            _, active = await self.call(
+                NM_PATH,
+                NM,
+                "AddAndActivateConnection",
+                "a{sa{sv}}oo",
+                [settings, device, ap.path],
+            )
+
+        if await self.wait_activated(active):
+            summary = "Connection Established"
+            body = f'You are now connected to the Wi-Fi network "{ssid}".'
+        else:
+            summary = "Connection Failed"
+            body = f'Could not connect to the Wi-Fi network "{ssid}".'
+        await self.notifier.notify(summary, body, tag="wifi")
+
+    async def wait_activated(self, active, timeout=30) -> bool:
+        for _ in range(timeout * 2):
+            try:
+                (state,) = await self.call(
+                    active, PROPERTIES, "Get", "ss", [NM_ACTIVE, "State"]
+                )
+            except RuntimeError:
+                return False  # the active connection is gone
+            if state.value == ACTIVE_ACTIVATED:
+                return True
+            if state.value == ACTIVE_DEACTIVATED:
+                return False
+            await asyncio.sleep(0.5)
+        return False
+
+    def disconnect(self):
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None